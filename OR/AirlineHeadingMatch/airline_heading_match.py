@@ -2,44 +2,98 @@ from arrival_assignment import *
 from departure_assignment import *
 from process_final_result import *
 from utils import load_data, complete_day1_assignments, complete_day3_assignments
-from config import OUTPUT_FILE, FINAL_FILE
+from excel_to_dataset import load_template
+from stage_cache import cached_stage, stage_key, load_stage, save_stage
+from config import OUTPUT_FILE, FINAL_FILE, PARALLEL_DEPARTURES, STAGE_CACHE_DIR
+import config
+
+# 各步骤内部使用的配置，按市场计入步骤缓存的键：如修改 INT_DEP_WIDE_BIAS 时只重新求解国际离港模型；
+# 不带市场前缀的配置（建模方式、热启动）计入两个市场的键，有时间限制时它们可能改变求得的解
+ARR_STAGE_CONFIG = ['DOM_ARR_GAP', 'INT_ARR_GAP', 'DOM_ARR_WAVE_BIAS', 'INT_ARR_WAVE_BIAS', 'DOM_ARR_WIDE_BIAS',
+                    'INT_ARR_WIDE_BIAS', 'ARR_MODEL_BUILDER', 'WARM_START']
+DEP_STAGE_CONFIG = ['DOM_DEP_GAP', 'INT_DEP_GAP', 'DOM_DEP_WAVE_BIAS', 'INT_DEP_WAVE_BIAS', 'DOM_DEP_WIDE_BIAS',
+                    'INT_DEP_WIDE_BIAS', 'WARM_START']
+
+
+def config_values(names, market_type):
+    """读取 config.py 中某个市场的配置值，不带市场前缀的配置对两个市场都计入"""
+    return {name: getattr(config, name) for name in names
+            if name.startswith(market_type) or not name.startswith(('DOM_', 'INT_'))}
+
+
+def arrival_solved(result):
+    """进港分配求解成功时结果的第一项不为 None"""
+    return result[0] is not None
 
 
 def main():
     # 加载数据
     current_status, arrival_flights, departure_flights, hourly_dom_stats, hourly_int_stats, hourly_dom_dep_stats, hourly_int_dep_stats = load_data()
 
+    # 读取输入模板，各步骤共用同一份配置
+    template = load_template()
+
+    # 各步骤的输入（数据、模板和相关配置）与之前某次运行相同时直接使用缓存结果
     # 分配国内进港航班，传入离港航班数据
-    dom_arr_assignments, dom_dep_counts, int_dep_counts = assign_arrival_flights(
-        current_status, arrival_flights, 'DOM', hourly_dom_stats, hourly_int_stats, departure_flights
+    dom_arr_assignments, dom_dep_counts, int_dep_counts = cached_stage(
+        STAGE_CACHE_DIR, 'arrival_DOM', assign_arrival_flights,
+        (current_status, arrival_flights, 'DOM', hourly_dom_stats, hourly_int_stats, departure_flights),
+        {'template': template}, config_values(ARR_STAGE_CONFIG, 'DOM'), arrival_solved
     )
 
     # 分配国际进港航班，传入离港航班数据和之前的分配结果
-    int_arr_assignments, _, _ = assign_arrival_flights(
-        current_status, arrival_flights, 'INT', hourly_dom_stats, hourly_int_stats,
-        departure_flights, dom_dep_counts, int_dep_counts
+    int_arr_assignments, _, _ = cached_stage(
+        STAGE_CACHE_DIR, 'arrival_INT', assign_arrival_flights,
+        (current_status, arrival_flights, 'INT', hourly_dom_stats, hourly_int_stats,
+         departure_flights, dom_dep_counts, int_dep_counts),
+        {'template': template}, config_values(ARR_STAGE_CONFIG, 'INT'), arrival_solved
     )
 
     # 合并进港航班分配结果
     all_day2_arr_assignments = pd.concat([dom_arr_assignments, int_arr_assignments])
 
-    # 分配国内离港航班
-    dom_dep_assignments = assign_departure_flights(all_day2_arr_assignments, departure_flights, current_status, 'DOM',
-                                                   hourly_dom_dep_stats, hourly_int_dep_stats)
-
-    # 分配国际离港航班
-    int_dep_assignments = assign_departure_flights(all_day2_arr_assignments, departure_flights, current_status, 'INT',
-                                                   hourly_dom_dep_stats, hourly_int_dep_stats)
+    def departure_args(market_type):
+        return (all_day2_arr_assignments, departure_flights, current_status, market_type, hourly_dom_dep_stats,
+                hourly_int_dep_stats)
+
+    if PARALLEL_DEPARTURES:
+        # 国内和国际离港航班分配互相独立，并行求解输入有变化的市场
+        dep_keys = {market_type: stage_key(f"departure_{market_type}", departure_args(market_type),
+                                           {'template': template}, config_values(DEP_STAGE_CONFIG, market_type))
+                    for market_type in ['DOM', 'INT']}
+        dep_results = {market_type: load_stage(STAGE_CACHE_DIR, f"departure_{market_type}", key)
+                       for market_type, key in dep_keys.items()}
+        missing = [market_type for market_type, result in dep_results.items() if result is None]
+        if missing:
+            solved = assign_departure_flights_parallel(
+                all_day2_arr_assignments, departure_flights, current_status, hourly_dom_dep_stats,
+                hourly_int_dep_stats, market_types=missing, template=template
+            )
+            for market_type, result in zip(missing, solved):
+                dep_results[market_type] = result
+                if result is not None:
+                    save_stage(STAGE_CACHE_DIR, f"departure_{market_type}", dep_keys[market_type], result)
+        dom_dep_assignments, int_dep_assignments = dep_results['DOM'], dep_results['INT']
+    else:
+        # 分配国内离港航班
+        dom_dep_assignments = cached_stage(STAGE_CACHE_DIR, 'departure_DOM', assign_departure_flights,
+                                           departure_args('DOM'), {'template': template},
+                                           config_values(DEP_STAGE_CONFIG, 'DOM'))
+
+        # 分配国际离港航班
+        int_dep_assignments = cached_stage(STAGE_CACHE_DIR, 'departure_INT', assign_departure_flights,
+                                           departure_args('INT'), {'template': template},
+                                           config_values(DEP_STAGE_CONFIG, 'INT'))
 
     # 合并离港航班分配结果
     all_day2_dep_assignments = pd.concat([dom_dep_assignments, int_dep_assignments])
 
     # 补齐日期为1的进港航班分配
     day1_arr_assignments = complete_day1_assignments(all_day2_dep_assignments,
-                                                     arrival_flights, departure_flights)
+                                                     arrival_flights, departure_flights, template)
 
     # 补齐日期为3的离港航班分配
-    day3_dep_assignments = complete_day3_assignments(all_day2_arr_assignments, departure_flights)
+    day3_dep_assignments = complete_day3_assignments(all_day2_arr_assignments, departure_flights, template)
 
     # 合并所有分配结果
     all_arr_assignments = pd.concat([day1_arr_assignments, all_day2_arr_assignments])
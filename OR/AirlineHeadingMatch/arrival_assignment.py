@@ -1,17 +1,95 @@
 import gurobipy as gp
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from gurobipy import GRB
 
 from OR.AirlineHeadingMatch.utils import get_main_headings, get_hour_from_time, diagnose_infeasibility
-from config import DOM_ARR_GAP, INT_ARR_GAP, DOM_ARR_WAVE_BIAS, INT_ARR_WAVE_BIAS, DOM_ARR_WIDE_BIAS, INT_ARR_WIDE_BIAS
-from excel_to_dataset import DOM_AIRLINES, INT_AIRLINES, HEADINGS_ARR, AIRLINES_WIDE, ABSOLUTE_LONG_ROUTING, \
-    MAIN_HEADING_EXCEPTION_AIRLINES, WAVE_EXCEPTION_AIRLINES, ARR_DOM_WIDE_EXCEPTION_ROUTING, \
-    ARR_INT_WIDE_EXCEPTION_ROUTING, ARR_INT_WIDE_UP_ROUTING, ARR_DOM_WIDE_UP_ROUTING
+from assignment_index import ACFT_CATEGORY, build_arrival_index, build_incidence_matrix
+from config import DOM_ARR_GAP, INT_ARR_GAP, DOM_ARR_WAVE_BIAS, INT_ARR_WAVE_BIAS, DOM_ARR_WIDE_BIAS, INT_ARR_WIDE_BIAS, \
+    ARR_MODEL_BUILDER, WARM_START, WARM_START_DIR
+from excel_to_dataset import load_template
 from exceptions import get_valid_airline_heading_pairs
+from warm_start import load_solution, save_solution, start_values, set_start
+
+
+def build_arrival_candidates(day2_arrivals, market_type, all_airlines, all_headings, valid_airline_heading_pairs,
+                             departure_flights=None, template=None):
+    """
+    枚举进港航班所有可行的 (航班, 航司, 航向) 组合
+
+    可行的航司-航向对只与航班是否为宽体机有关，因此先分别计算宽体/非宽体两类的可行对，
+    再与航班表连接，避免对每个航班重复遍历全部航司和航向。
+
+    Args:
+        day2_arrivals: 日期为2的待分配进港航班，需包含 ID、小时、机型 列
+        market_type: 'DOM' 或 'INT'
+        all_airlines: [(航司, 主基地/非主基地)] 列表
+        all_headings: [(航向, 国际性质)] 列表
+        valid_airline_heading_pairs: 现状中存在的 (航司, 航向) 集合
+        departure_flights: 所有离港航班数据，用于标记同ID离港航班的市场
+        template: 输入模板配置，见 load_template，为 None 时读取默认模板
+
+    Returns:
+        DataFrame: 每行对应一个决策变量 x[i, a, h]，顺序与逐航班、逐航司、逐航向枚举一致
+    """
+    template = template if template is not None else load_template()
+
+    def allowed_pairs(is_wide_body):
+        pairs = []
+        for airline, base_type in all_airlines:
+            for heading, heading_type in all_headings:
+                # 1. 绝对远程航向只分配给主基地航司或东航南航海航集团
+                if market_type == 'INT' and heading_type == '绝对远程' and base_type == '非主基地' and \
+                        airline not in template.ABSOLUTE_LONG_ROUTING:
+                    continue
+
+                # 2. 绝对远程航向分配宽体机
+                if market_type == 'INT' and heading_type == '绝对远程' and not is_wide_body:
+                    continue
+
+                # 3. 特定航向不能有宽体机
+                if is_wide_body:
+                    if market_type == 'DOM' and heading in template.ARR_DOM_WIDE_EXCEPTION_ROUTING:
+                        continue
+                    if market_type == 'INT' and heading in template.ARR_INT_WIDE_EXCEPTION_ROUTING:
+                        continue
+
+                # 4. 新增约束：只有当航司在现状中存在该航向时，才能分配
+                if airline != '其它' and (airline, heading) not in valid_airline_heading_pairs:
+                    continue
+
+                pairs.append((is_wide_body, airline, heading))
+        return pairs
+
+    pairs = pd.DataFrame(allowed_pairs(False) + allowed_pairs(True), columns=['宽体', '航司', '航向'])
+    pairs['_pair'] = np.arange(len(pairs))
+
+    flights = pd.DataFrame({
+        'ID': day2_arrivals['ID'].to_numpy(),
+        '小时': day2_arrivals['小时'].to_numpy(),
+        '机型': day2_arrivals['机型'].to_numpy(),
+    })
+    flights['_row'] = np.arange(len(flights))
+    flights['宽体'] = flights['机型'].isin(['E', 'F'])
+    flights['机型类别'] = flights['机型'].map(ACFT_CATEGORY)
+
+    # 标记相同ID的日期为2的离港航班市场，用于离港配额约束
+    if departure_flights is not None:
+        day2_departures = departure_flights[departure_flights['日期'] == 2]
+        departure_market = day2_departures.drop_duplicates('ID').set_index('ID')['市场']
+        flights['离港市场'] = flights['ID'].map(departure_market)
+    else:
+        flights['离港市场'] = None
+
+    candidates = flights.merge(pairs, on='宽体')
+    candidates = candidates.sort_values(['_row', '_pair'], kind='stable').reset_index(drop=True)
+    return candidates.drop(columns=['_row', '_pair'])
 
 
 def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_dom_stats, hourly_int_stats,
-                           departure_flights=None, prev_dom_dep_counts=None, prev_int_dep_counts=None):
+                           departure_flights=None, prev_dom_dep_counts=None, prev_int_dep_counts=None,
+                           builder=ARR_MODEL_BUILDER, warm_start=WARM_START, template=None):
     """
     为进港航班分配航司和航向
 
@@ -24,12 +102,17 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
         departure_flights: 所有离港航班数据，用于检查配额限制
         prev_dom_dep_counts: 之前分配的国内离港航班数量
         prev_int_dep_counts: 之前分配的国际离港航班数量
+        builder: 模型构建方式，'loop' 逐个添加变量和约束，'matrix' 使用矩阵API，两种方式构建的模型相同
+        warm_start: 是否以上次运行保存的分配结果作为初始解，并在求解成功后保存本次结果
+        template: 输入模板配置，见 load_template，为 None 时读取默认模板
 
     Returns:
         带有航司和航向分配的进港航班数据，以及各航司的DOM和INT离港航班分配数量
     """
     print(f"开始分配{market_type}进港航班...")
 
+    template = template if template is not None else load_template()
+
     main_headings = get_main_headings(current_status)
 
     # 选择对应的小时统计数据
@@ -55,13 +138,13 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
 
     # 获取所有可能的航司和航向
     if market_type == 'DOM':
-        airlines_data = DOM_AIRLINES
-        headings_data = HEADINGS_ARR
-        wide_up_routings = ARR_DOM_WIDE_UP_ROUTING
+        airlines_data = template.DOM_AIRLINES
+        headings_data = template.HEADINGS_ARR
+        wide_up_routings = template.ARR_DOM_WIDE_UP_ROUTING
     else:
-        airlines_data = INT_AIRLINES
-        headings_data = HEADINGS_ARR
-        wide_up_routings = ARR_INT_WIDE_UP_ROUTING
+        airlines_data = template.INT_AIRLINES
+        headings_data = template.HEADINGS_ARR
+        wide_up_routings = template.ARR_INT_WIDE_UP_ROUTING
 
     all_airlines = []
     for base_type in airlines_data:
@@ -73,98 +156,174 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
         heading_type = headings_data[heading]['INT性质'] if market_type == 'INT' else None
         all_headings.append((heading, heading_type))
 
+    # 按航司集团和小时统计现状航班数量
+    airline_hour_counts = current_arrivals.groupby(['AirlineGroup', '小时']).size().to_dict()
+
+    # 计算现状中需要提高宽体机比例的各航向的宽体机比例
+    current_wide_ratio = {}
+    for heading in wide_up_routings:
+        # 筛选该航向的航班
+        heading_flights = current_arrivals[current_arrivals['Routing'] == heading]
+        if not heading_flights.empty:
+            # 计算宽体机航班数量
+            wide_count = heading_flights[heading_flights['Acft Cat'].isin(['E', 'F'])].shape[0]
+            total_count = heading_flights.shape[0]
+            if total_count > 0:
+                current_wide_ratio[heading] = wide_count / total_count
+            else:
+                current_wide_ratio[heading] = 0
+        else:
+            current_wide_ratio[heading] = 0
+
+    # 计算当前分布的小时分布情况
+    current_hour_distribution = {}
+    for _, row in hourly_stats.iterrows():
+        airline = row['AirlineGroup']
+        routing = row['Routing']
+        acft_cat = row['Acft Cat']
+
+        # 获取该行的小时分布数据
+        for hour in range(24):
+            hour_col = hour
+            if hour_col in row and not pd.isna(row[hour_col]):
+                key = (airline, routing, acft_cat, hour)
+                current_hour_distribution[key] = row[hour_col]
+
+    # 枚举候选变量并构建稀疏索引，各约束族直接按索引取变量
+    candidates = build_arrival_candidates(day2_arrivals, market_type, all_airlines, all_headings,
+                                          valid_airline_heading_pairs, departure_flights, template)
+    index = build_arrival_index(candidates)
+
     # 创建Gurobi模型
-    model = gp.Model("Arrival_Assignment")
+    if builder == 'matrix':
+        build_model = build_arrival_model_matrix
+    elif builder == 'loop':
+        build_model = build_arrival_model
+    else:
+        raise ValueError(f"未知的模型构建方式: {builder}")
+    model, x = build_model(candidates, index, day2_arrivals['ID'], market_type, all_airlines, all_headings, main_headings,
+                           airline_hour_counts, current_wide_ratio, current_hour_distribution,
+                           departure_flights, prev_dom_dep_counts, prev_int_dep_counts, template)
 
-    # 创建决策变量
-    # x[i, a, h] = 1 表示航班i分配给航司a和航向h
-    x = {}
-    for i, flight in day2_arrivals.iterrows():
-        flight_id = flight['ID']
-        flight_hour = flight['小时']
-        flight_acft = flight['机型']
-        is_wide_body = flight_acft in ['E', 'F']
+    # 以上次运行的分配结果作为初始解
+    if warm_start:
+        previous = load_solution(WARM_START_DIR, f"arrival_{market_type}")
+        set_start(model, x, start_values(candidates, previous, ['ID', '航司', '航向']))
 
-        for airline, base_type in all_airlines:
-            for heading, heading_type in all_headings:
-                # 检查是否满足约束条件
-                # 1. 绝对远程航向只分配给主基地航司或东航南航海航集团
-                if market_type == 'INT' and heading_type == '绝对远程' and base_type == '非主基地' and airline not in ABSOLUTE_LONG_ROUTING:
-                    continue
+    if market_type == 'DOM':
+        model.Params.MIPGap = DOM_ARR_GAP  # 设置Gap（相对间隙）
+    else:
+        model.Params.MIPGap = INT_ARR_GAP
+    # 求解模型
+    model.optimize()
+    # 创建用于返回的离港航班分配数量字典
+    dom_dep_counts = {}
+    int_dep_counts = {}
 
-                # 2. 绝对远程航向分配宽体机
-                if market_type == 'INT' and heading_type == '绝对远程' and flight_acft not in ['E', 'F']:
-                    continue
+    if model.status == gp.GRB.OPTIMAL:
+        x_values = x.X if isinstance(x, gp.MVar) else np.array(model.getAttr('X', x))
 
-                # 3. 特定航向不能有宽体机
-                if is_wide_body:
-                    if market_type == 'DOM' and heading in ARR_DOM_WIDE_EXCEPTION_ROUTING:
-                        continue
-                    if market_type == 'INT' and heading in ARR_INT_WIDE_EXCEPTION_ROUTING:
-                        continue
+        # 计算各航司的离港航班分配数量
+        if departure_flights is not None:
+            for airline, _ in all_airlines:
+                dom_dep_counts[airline] = x_values[index['airline_dep_market'].get((airline, 'DOM'), [])].sum()
+                int_dep_counts[airline] = x_values[index['airline_dep_market'].get((airline, 'INT'), [])].sum()
+        for airline, count in dom_dep_counts.items():
+            print(f"{airline} DOM:", count)
+        for airline, count in int_dep_counts.items():
+            print(f"{airline} INT:", count)
+        print("-----------------------------------------------------------------------")
+        print(f"{market_type}进港航班分配成功！")
+        print("-----------------------------------------------------------------------")
 
-                # 4. 新增约束：只有当航司在现状中存在该航向时，才能分配
-                if airline != '其它' and (airline, heading) not in valid_airline_heading_pairs:
-                    continue
+        # 将结果添加到航班数据中
+        result_df = day2_arrivals.copy()
+        assigned = candidates[x_values > 0.5].set_index('ID')
+        result_df['航司'] = result_df['ID'].map(assigned['航司']).fillna("")
+        result_df['航向'] = result_df['ID'].map(assigned['航向']).fillna("")
+
+        if warm_start:
+            save_solution(WARM_START_DIR, f"arrival_{market_type}", result_df)
+
+        return result_df, dom_dep_counts, int_dep_counts
+    else:
+        diagnose_infeasibility(model)
+        print("-----------------------------------------------------------------------")
+        print(f"{market_type}进港航班分配失败！模型不可行。")
+        print("-----------------------------------------------------------------------")
+        return None, {}, {}
 
-                x[flight_id, airline, heading] = model.addVar(vtype=GRB.BINARY,
-                                                              name=f"x_{flight_id}_{airline}_{heading}")
+
+def build_arrival_model(candidates, index, flight_ids, market_type, all_airlines, all_headings, main_headings,
+                        airline_hour_counts, current_wide_ratio, current_hour_distribution, departure_flights=None,
+                        prev_dom_dep_counts=None, prev_int_dep_counts=None, template=None):
+    """
+    逐个添加变量和约束，构建进港航班分配模型
+
+    Args:
+        candidates: 候选变量表，见 build_arrival_candidates
+        index: 候选变量稀疏索引，见 build_arrival_index
+        flight_ids: 需要分配的航班ID
+        market_type: 'DOM' 或 'INT'
+        all_airlines: [(航司, 主基地/非主基地)] 列表
+        all_headings: [(航向, 国际性质)] 列表
+        main_headings: 各航司主航向，见 get_main_headings
+        airline_hour_counts: 现状中各 (航司, 小时) 的航班数量
+        current_wide_ratio: 需要提高宽体机比例的航向及其现状宽体机比例
+        current_hour_distribution: 现状 (航司, 航向, 机型, 小时) 的航班比例
+        departure_flights: 所有离港航班数据，用于检查配额限制
+        prev_dom_dep_counts: 之前分配的国内离港航班数量
+        prev_int_dep_counts: 之前分配的国际离港航班数量
+        template: 输入模板配置，见 load_template，为 None 时读取默认模板
+
+    Returns:
+        (Gurobi模型, 与候选变量表逐行对应的决策变量列表)
+    """
+    template = template if template is not None else load_template()
+
+    # 创建Gurobi模型
+    model = gp.Model("Arrival_Assignment")
+
+    # 创建决策变量
+    # x[k] = 1 表示候选变量表第k行的航班i分配给航司a和航向h
+    x = [model.addVar(vtype=GRB.BINARY, name=f"x_{flight_id}_{airline}_{heading}")
+         for flight_id, airline, heading in zip(candidates['ID'], candidates['航司'], candidates['航向'])]
+
+    def x_sum(group, key):
+        return gp.quicksum(x[k] for k in index[group].get(key, ()))
 
     # 每个航班只能分配给一个航司和一个航向
-    for i, flight in day2_arrivals.iterrows():
-        flight_id = flight['ID']
-        model.addConstr(
-            gp.quicksum(x[flight_id, airline, heading]
-                        for airline, _ in all_airlines
-                        for heading, _ in all_headings
-                        if (flight_id, airline, heading) in x) == 1,
-            f"one_assignment_{flight_id}"
-        )
+    for flight_id in flight_ids:
+        model.addConstr(x_sum('flight', flight_id) == 1, f"one_assignment_{flight_id}")
 
     # 航司配额约束
     for airline, base_type in all_airlines:
         if market_type == 'DOM':
-            quota = DOM_AIRLINES[base_type][airline]['ARR']
+            quota = template.DOM_AIRLINES[base_type][airline]['ARR']
         else:
-            quota = INT_AIRLINES[base_type][airline]['ARR']
-        model.addConstr(
-            gp.quicksum(x[flight_id, airline, heading]
-                        for i, flight in day2_arrivals.iterrows()
-                        for heading, _ in all_headings
-                        if (flight_id := flight['ID'], airline, heading) in x) == quota,
-            f"{market_type}_airline_quota_{airline}"
-        )
+            quota = template.INT_AIRLINES[base_type][airline]['ARR']
+        model.addConstr(x_sum('airline', airline) == quota, f"{market_type}_airline_quota_{airline}")
 
     # 航向配额约束
     for heading, heading_type in all_headings:
         if market_type == 'DOM':
-            quota = HEADINGS_ARR[heading]['DOM']
+            quota = template.HEADINGS_ARR[heading]['DOM']
             bias = 0  # 使用DOM的偏差值
         else:
-            quota = HEADINGS_ARR[heading]['INT']
+            quota = template.HEADINGS_ARR[heading]['INT']
             bias = 0  # 使用INT的偏差值
 
+        heading_expr = x_sum('heading', heading)
+
         # 添加下限约束
-        model.addConstr(
-            gp.quicksum(x[flight_id, airline, heading]
-                        for i, flight in day2_arrivals.iterrows()
-                        for airline, _ in all_airlines
-                        if (flight_id := flight['ID'], airline, heading) in x) >= quota - bias,
-            f"heading_quota_min_{heading}"
-        )
+        model.addConstr(heading_expr >= quota - bias, f"heading_quota_min_{heading}")
 
         # 添加上限约束
-        model.addConstr(
-            gp.quicksum(x[flight_id, airline, heading]
-                        for i, flight in day2_arrivals.iterrows()
-                        for airline, _ in all_airlines
-                        if (flight_id := flight['ID'], airline, heading) in x) <= quota + bias,
-            f"heading_quota_max_{heading}"
-        )
+        model.addConstr(heading_expr <= quota + bias, f"heading_quota_max_{heading}")
 
     # 主航向比例约束：确保各航司的主航向比例不低于现状
     for airline, _ in all_airlines:
-        if airline in MAIN_HEADING_EXCEPTION_AIRLINES:
+        if airline in template.MAIN_HEADING_EXCEPTION_AIRLINES:
             continue
 
         key = (airline, market_type, 'Arrival')
@@ -172,15 +331,10 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
             main_heading, current_ratio = main_headings[key]
 
             # 计算该航司的总航班数
-            total_flights_expr = gp.quicksum(x[flight_id, airline, heading]
-                                             for i, flight in day2_arrivals.iterrows()
-                                             for heading, _ in all_headings
-                                             if (flight_id := flight['ID'], airline, heading) in x)
+            total_flights_expr = x_sum('airline', airline)
 
             # 计算该航司分配给主航向的航班数
-            main_heading_flights_expr = gp.quicksum(x[flight_id, airline, main_heading]
-                                                    for i, flight in day2_arrivals.iterrows()
-                                                    if (flight_id := flight['ID'], airline, main_heading) in x)
+            main_heading_flights_expr = x_sum('airline_heading', (airline, main_heading))
 
             # 添加比例约束
             if total_flights_expr.size() > 0:  # 确保有航班分配给该航司
@@ -192,55 +346,24 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
                 # 添加新约束：确保主航向仍然是航班量最多的航向
                 for heading, _ in all_headings:
                     if heading != main_heading:
-                        heading_flights_expr = gp.quicksum(x[flight_id, airline, heading]
-                                                           for i, flight in day2_arrivals.iterrows()
-                                                           if (flight_id := flight['ID'], airline, heading) in x)
+                        heading_flights_expr = x_sum('airline_heading', (airline, heading))
 
                         model.addConstr(
                             main_heading_flights_expr >= heading_flights_expr,
                             f"main_heading_dominance_{airline}_{market_type}_{heading}_Arrival"
                         )
 
-    dom_expressions = {}  # 存储各航司的DOM表达式
-    int_expressions = {}
-
     # 每个航司分配的进港航班对应的离港航班总量不超过配额
     if departure_flights is not None:
-        # 筛选出日期为2的离港航班
-        day2_departures = departure_flights[departure_flights['日期'] == 2]
-
-        # 获取进港航班ID对应的离港航班
-        arrival_to_departure = {}
-        for i, flight in day2_arrivals.iterrows():
-            flight_id = flight['ID']
-            # 查找相同ID的离港航班
-            matching_departures = day2_departures[day2_departures['ID'] == flight_id]
-            if not matching_departures.empty:
-                arrival_to_departure[flight_id] = matching_departures.iloc[0]['市场']
-
         # 为每个航司添加离港航班配额约束
         for airline, base_type in all_airlines:
             # 获取该航司的国内和国际离港配额
-            dom_quota = DOM_AIRLINES[base_type][airline]['DEP']
-            int_quota = INT_AIRLINES[base_type][airline]['DEP']
+            dom_quota = template.DOM_AIRLINES[base_type][airline]['DEP']
+            int_quota = template.INT_AIRLINES[base_type][airline]['DEP']
 
             # 计算分配给该航司的进港航班中，对应的国内和国际离港航班数量
-            dom_dep_expr = gp.quicksum(x[flight_id, airline, heading]
-                                       for i, flight in day2_arrivals.iterrows()
-                                       for heading, _ in all_headings
-                                       if (flight_id := flight['ID']) in arrival_to_departure
-                                       and arrival_to_departure[flight_id] == 'DOM'
-                                       and (flight_id, airline, heading) in x)
-
-            int_dep_expr = gp.quicksum(x[flight_id, airline, heading]
-                                       for i, flight in day2_arrivals.iterrows()
-                                       for heading, _ in all_headings
-                                       if (flight_id := flight['ID']) in arrival_to_departure
-                                       and arrival_to_departure[flight_id] == 'INT'
-                                       and (flight_id, airline, heading) in x)
-
-            dom_expressions[airline] = dom_dep_expr
-            int_expressions[airline] = int_dep_expr
+            dom_dep_expr = x_sum('airline_dep_market', (airline, 'DOM'))
+            int_dep_expr = x_sum('airline_dep_market', (airline, 'INT'))
 
             # 考虑之前分配的航班数量
             prev_dom_count = prev_dom_dep_counts.get(airline, 0) if prev_dom_dep_counts else 0
@@ -253,32 +376,17 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
             model.addConstr(int_dep_expr + prev_int_count <= int_quota, f"int_dep_quota_{airline}")
 
     # 新增约束：确保各航司集团的未来小时波形大于现状波形
-    # 按航司集团和小时统计现状航班数量
-    airline_hour_counts = current_arrivals.groupby(['AirlineGroup', '小时']).size().reset_index(name='count')
-
     # 为每个航司和每个小时添加约束
     for airline, _ in all_airlines:
-        if airline in WAVE_EXCEPTION_AIRLINES:
+        if airline in template.WAVE_EXCEPTION_AIRLINES:
             continue
 
         for hour in range(24):
             # 获取现状中该航司该小时的航班数量
-            current_count = airline_hour_counts[
-                (airline_hour_counts['AirlineGroup'] == airline) &
-                (airline_hour_counts['小时'] == hour)
-                ]['count'].sum() if not airline_hour_counts[
-                (airline_hour_counts['AirlineGroup'] == airline) &
-                (airline_hour_counts['小时'] == hour)
-                ].empty else 0
+            current_count = airline_hour_counts.get((airline, hour), 0)
 
             # 计算未来分布中该航司该小时的航班数量
-            future_count_expr = gp.quicksum(
-                x[flight_id, airline, heading]
-                for i, flight in day2_arrivals.iterrows()
-                if flight['小时'] == hour
-                for heading, _ in all_headings
-                if (flight_id := flight['ID'], airline, heading) in x
-            )
+            future_count_expr = x_sum('airline_hour', (airline, hour))
 
             # 添加约束：未来分布不低于现状
             if current_count > 0:
@@ -294,16 +402,10 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
     # 添加宽体机配额约束
     for airline, _ in all_airlines:
         # 获取该航司在该市场类型的宽体机配额
-        wide_body_quota = AIRLINES_WIDE.get(airline, {}).get(market_type, 0)
-
-        # 计算分配给该航司的宽体机航班数量
-        wide_body_expr = gp.quicksum(
-            x[flight_id, airline, heading]
-            for i, flight in day2_arrivals.iterrows()
-            for heading, _ in all_headings
-            if (flight_id := flight['ID'], airline, heading) in x
-            and flight['机型'] in ['E', 'F']  # E和F代表宽体机
-        )
+        wide_body_quota = template.AIRLINES_WIDE.get(airline, {}).get(market_type, 0)
+
+        # 计算分配给该航司的宽体机航班数量（E和F代表宽体机）
+        wide_body_expr = x_sum('airline_wide', airline)
 
         # 添加约束：宽体机数量必须等于配额
         if market_type == 'DOM':
@@ -320,90 +422,33 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
         )
 
     # 添加宽体机比例升高约束
-    if wide_up_routings:  # 如果有需要提高宽体机比例的航向
-        # 计算现状中各航向的宽体机比例
-        current_wide_ratio = {}
-        for heading in wide_up_routings:
-            # 筛选该航向的航班
-            heading_flights = current_arrivals[current_arrivals['Routing'] == heading]
-            if not heading_flights.empty:
-                # 计算宽体机航班数量
-                wide_count = heading_flights[heading_flights['Acft Cat'].isin(['E', 'F'])].shape[0]
-                total_count = heading_flights.shape[0]
-                if total_count > 0:
-                    current_wide_ratio[heading] = wide_count / total_count
-                else:
-                    current_wide_ratio[heading] = 0
-            else:
-                current_wide_ratio[heading] = 0
-
-        # 为每个需要提高宽体机比例的航向添加约束
-        for heading in wide_up_routings:
-            if heading in current_wide_ratio:
-                # 计算未来该航向的总航班数
-                future_total_expr = gp.quicksum(
-                    x[flight_id, airline, heading]
-                    for i, flight in day2_arrivals.iterrows()
-                    for airline, _ in all_airlines
-                    if (flight_id := flight['ID'], airline, heading) in x
-                )
-
-                # 计算未来该航向的宽体机航班数
-                future_wide_expr = gp.quicksum(
-                    x[flight_id, airline, heading]
-                    for i, flight in day2_arrivals.iterrows()
-                    for airline, _ in all_airlines
-                    if (flight_id := flight['ID'], airline, heading) in x
-                    and flight['机型'] in ['E', 'F']
-                )
-
-                # 添加约束：未来宽体机比例 > 现状宽体机比例
-                if future_total_expr.size() > 0:  # 确保有航班分配给该航向
-                    model.addConstr(
-                        future_wide_expr - 0.0001 >= current_wide_ratio[heading] * future_total_expr,
-                        f"wide_body_ratio_increase_{heading}_{market_type}_Arrival"
-                    )
+    for heading in current_wide_ratio:
+        # 计算未来该航向的总航班数
+        future_total_expr = x_sum('heading', heading)
+
+        # 计算未来该航向的宽体机航班数
+        future_wide_expr = x_sum('heading_wide', heading)
+
+        # 添加约束：未来宽体机比例 > 现状宽体机比例
+        if future_total_expr.size() > 0:  # 确保有航班分配给该航向
+            model.addConstr(
+                future_wide_expr - 0.0001 >= current_wide_ratio[heading] * future_total_expr,
+                f"wide_body_ratio_increase_{heading}_{market_type}_Arrival"
+            )
 
     # 添加基于小时统计数据的约束和目标函数
     # 目标函数：最大化与小时统计数据的匹配度
 
-    # 首先，计算当前分布的小时分布情况
-    current_hour_distribution = {}
-    for _, row in hourly_stats.iterrows():
-        airline = row['AirlineGroup']
-        routing = row['Routing']
-        acft_cat = row['Acft Cat']
-
-        # 获取该行的小时分布数据
-        for hour in range(24):
-            hour_col = hour
-            if hour_col in row and not pd.isna(row[hour_col]):
-                key = (airline, routing, acft_cat, hour)
-                current_hour_distribution[key] = row[hour_col]
-
     # 创建变量来表示未来分布
     future_distribution = {}
     for hour in range(24):
-        hour_flights = day2_arrivals[day2_arrivals['小时'] == hour]
-
         for airline, _ in all_airlines:
             for heading, _ in all_headings:
                 for acft_cat in ['C', 'E']:  # 简化为窄体机和宽体机两类
                     key = (airline, heading, acft_cat, hour)
 
-                    # 计算该组合的航班数量表达式
-                    count_expr = gp.LinExpr()
-
-                    for i, flight in hour_flights.iterrows():
-                        flight_id = flight['ID']
-                        flight_acft = flight['机型']
-
-                        # 检查机型是否匹配
-                        is_matching_acft = (acft_cat == 'C' and flight_acft in ['A', 'B', 'C', 'D']) or \
-                                           (acft_cat == 'E' and flight_acft in ['E', 'F'])
-
-                        if is_matching_acft and (flight_id, airline, heading) in x:
-                            count_expr += x[flight_id, airline, heading]
+                    # 计算该组合的航班数量表达式（机型类别C对应A-D，E对应E、F）
+                    count_expr = x_sum('distribution', key)
 
                     # 如果有航班可能被分配到这个组合
                     if count_expr.size() > 0:
@@ -416,7 +461,7 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
                                         f"future_distr_{airline}_{heading}_{acft_cat}_{hour}")
 
     # 计算总航班数
-    total_flights = day2_arrivals.shape[0]
+    total_flights = len(flight_ids)
 
     # ========== 新增：多目标优化 ==========
     # 第一目标：最小化各航司集团（除其它）未来波形与现状波形的差异
@@ -426,22 +471,10 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
             continue
         for hour in range(24):
             # 现状
-            current_count = airline_hour_counts[
-                (airline_hour_counts['AirlineGroup'] == airline) &
-                (airline_hour_counts['小时'] == hour)
-                ]['count'].sum() if not airline_hour_counts[
-                (airline_hour_counts['AirlineGroup'] == airline) &
-                (airline_hour_counts['小时'] == hour)
-                ].empty else 0
+            current_count = airline_hour_counts.get((airline, hour), 0)
 
             # 未来
-            future_count_expr = gp.quicksum(
-                x[flight_id, airline, heading]
-                for i, flight in day2_arrivals.iterrows()
-                if flight['小时'] == hour
-                for heading, _ in all_headings
-                if (flight_id := flight['ID'], airline, heading) in x
-            )
+            future_count_expr = x_sum('airline_hour', (airline, hour))
 
             # 绝对偏差
             dev_var = model.addVar(lb=0, name=f"wave_dev_{airline}_{hour}")
@@ -480,48 +513,173 @@ def assign_arrival_flights(current_status, arrival_flights, market_type, hourly_
     # 设置目标函数为最小化偏离度
     # ========== 设置多目标 ==========
     model.setObjective(airline_wave_deviation * 10000 + obj_expr, GRB.MINIMIZE)
-    if market_type == 'DOM':
-        model.Params.MIPGap = DOM_ARR_GAP  # 设置Gap（相对间隙）
-    else:
-        model.Params.MIPGap = INT_ARR_GAP
-    # 求解模型
-    model.optimize()
-    # 创建用于返回的离港航班分配数量字典
-    dom_dep_counts = {}
-    int_dep_counts = {}
-    if model.status == gp.GRB.OPTIMAL:
-        for airline, expr in dom_expressions.items():
-            print(f"{airline} DOM:", expr.getValue())
-        for airline, expr in int_expressions.items():
-            print(f"{airline} INT:", expr.getValue())
 
-    if model.status == gp.GRB.OPTIMAL:
-        # 计算各航司的离港航班分配数量
-        for airline in dom_expressions:
-            dom_dep_counts[airline] = dom_expressions[airline].getValue()
-        for airline in int_expressions:
-            int_dep_counts[airline] = int_expressions[airline].getValue()
-        print("-----------------------------------------------------------------------")
-        print(f"{market_type}进港航班分配成功！")
-        print("-----------------------------------------------------------------------")
+    return model, x
 
-        # 将结果添加到航班数据中
-        result_df = day2_arrivals.copy()
-        result_df['航司'] = ""
-        result_df['航向'] = ""
 
-        for i, flight in day2_arrivals.iterrows():
-            flight_id = flight['ID']
-            for airline, _ in all_airlines:
-                for heading, _ in all_headings:
-                    if (flight_id, airline, heading) in x and x[flight_id, airline, heading].X > 0.5:
-                        result_df.loc[i, '航司'] = airline
-                        result_df.loc[i, '航向'] = heading
+def build_arrival_model_matrix(candidates, index, flight_ids, market_type, all_airlines, all_headings, main_headings,
+                               airline_hour_counts, current_wide_ratio, current_hour_distribution,
+                               departure_flights=None, prev_dom_dep_counts=None, prev_int_dep_counts=None,
+                               template=None):
+    """
+    使用矩阵API构建进港航班分配模型
 
-        return result_df, dom_dep_counts, int_dep_counts
-    else:
-        diagnose_infeasibility(model)
-        print("-----------------------------------------------------------------------")
-        print(f"{market_type}进港航班分配失败！模型不可行。")
-        print("-----------------------------------------------------------------------")
-        return None, {}, {}
+    各约束族由分组索引生成稀疏关联矩阵后通过 addMConstr 一次性添加，变量名和约束名与
+    build_arrival_model 一致，两者构建的模型相同，参数含义见 build_arrival_model。
+
+    Returns:
+        (Gurobi模型, 与候选变量表逐行对应的决策变量MVar)
+    """
+    template = template if template is not None else load_template()
+    n = len(candidates)
+
+    def incidence(group, keys):
+        return build_incidence_matrix(index[group], keys, n)
+
+    def add_rows(A, sense, rhs, names):
+        if len(names) > 0:
+            model.addMConstr(A, x, sense, np.asarray(rhs, dtype=float), name=names)
+
+    # 创建Gurobi模型
+    model = gp.Model("Arrival_Assignment")
+
+    # 创建决策变量
+    # x[k] = 1 表示候选变量表第k行的航班i分配给航司a和航向h
+    x = model.addMVar(n, vtype=GRB.BINARY,
+                      name=[f"x_{flight_id}_{airline}_{heading}" for flight_id, airline, heading
+                            in zip(candidates['ID'], candidates['航司'], candidates['航向'])])
+
+    # 每个航班只能分配给一个航司和一个航向
+    flight_ids = list(flight_ids)
+    add_rows(incidence('flight', flight_ids), '=', np.ones(len(flight_ids)),
+             [f"one_assignment_{flight_id}" for flight_id in flight_ids])
+
+    # 航司配额约束
+    airlines_data = template.DOM_AIRLINES if market_type == 'DOM' else template.INT_AIRLINES
+    airlines = [airline for airline, _ in all_airlines]
+    add_rows(incidence('airline', airlines), '=',
+             [airlines_data[base_type][airline]['ARR'] for airline, base_type in all_airlines],
+             [f"{market_type}_airline_quota_{airline}" for airline in airlines])
+
+    # 航向配额约束，上下限偏差均为0
+    headings = [heading for heading, _ in all_headings]
+    heading_quota = np.array([template.HEADINGS_ARR[heading][market_type] for heading in headings], dtype=float)
+    heading_matrix = incidence('heading', headings)
+    add_rows(heading_matrix, '>', heading_quota, [f"heading_quota_min_{heading}" for heading in headings])
+    add_rows(heading_matrix, '<', heading_quota, [f"heading_quota_max_{heading}" for heading in headings])
+
+    # 主航向比例约束：确保各航司的主航向比例不低于现状，且主航向仍然是航班量最多的航向
+    ratio_airlines, ratio_main_keys, ratio_values = [], [], []
+    dominance_main_keys, dominance_other_keys, dominance_names = [], [], []
+    for airline in airlines:
+        key = (airline, market_type, 'Arrival')
+        if airline in template.MAIN_HEADING_EXCEPTION_AIRLINES or key not in main_headings:
+            continue
+        if airline not in index['airline']:
+            continue
+        main_heading, current_ratio = main_headings[key]
+        ratio_airlines.append(airline)
+        ratio_main_keys.append((airline, main_heading))
+        ratio_values.append(current_ratio)
+        for heading in headings:
+            if heading != main_heading:
+                dominance_main_keys.append((airline, main_heading))
+                dominance_other_keys.append((airline, heading))
+                dominance_names.append(f"main_heading_dominance_{airline}_{market_type}_{heading}_Arrival")
+    add_rows(incidence('airline_heading', ratio_main_keys)
+             - sp.diags(np.asarray(ratio_values, dtype=float)) @ incidence('airline', ratio_airlines),
+             '>', np.zeros(len(ratio_airlines)),
+             [f"main_heading_ratio_{airline}_{market_type}_Arrival" for airline in ratio_airlines])
+    add_rows(incidence('airline_heading', dominance_main_keys) - incidence('airline_heading', dominance_other_keys),
+             '>', np.zeros(len(dominance_names)), dominance_names)
+
+    # 每个航司分配的进港航班对应的离港航班总量不超过配额（扣除之前已分配的数量）
+    if departure_flights is not None:
+        for market, prev_counts in (('DOM', prev_dom_dep_counts), ('INT', prev_int_dep_counts)):
+            market_data = template.DOM_AIRLINES if market == 'DOM' else template.INT_AIRLINES
+            prev_counts = prev_counts or {}
+            add_rows(incidence('airline_dep_market', [(airline, market) for airline in airlines]), '<',
+                     [market_data[base_type][airline]['DEP'] - prev_counts.get(airline, 0)
+                      for airline, base_type in all_airlines],
+                     [f"{market.lower()}_dep_quota_{airline}" for airline in airlines])
+
+    # 确保各航司集团的未来小时波形不低于现状波形
+    wave_bias = DOM_ARR_WAVE_BIAS if market_type == 'DOM' else INT_ARR_WAVE_BIAS
+    wave_keys = [(airline, hour) for airline in airlines if airline not in template.WAVE_EXCEPTION_AIRLINES
+                 for hour in range(24) if airline_hour_counts.get((airline, hour), 0) > 0]
+    add_rows(incidence('airline_hour', wave_keys), '>',
+             [airline_hour_counts[key] - wave_bias for key in wave_keys],
+             [f"hourly_wave_{airline}_{hour}_{market_type}_Arrival" for airline, hour in wave_keys])
+
+    # 宽体机配额约束
+    wide_bias = DOM_ARR_WIDE_BIAS if market_type == 'DOM' else INT_ARR_WIDE_BIAS
+    wide_quota = np.array([template.AIRLINES_WIDE.get(airline, {}).get(market_type, 0) for airline in airlines],
+                          dtype=float)
+    wide_matrix = incidence('airline_wide', airlines)
+    add_rows(wide_matrix, '>', wide_quota - wide_bias,
+             [f"wide_body_quota_{airline}_{market_type}_min_Arrival" for airline in airlines])
+    add_rows(wide_matrix, '<', wide_quota + wide_bias,
+             [f"wide_body_quota_{airline}_{market_type}_max_Arrival" for airline in airlines])
+
+    # 宽体机比例升高约束：未来宽体机比例 > 现状宽体机比例
+    wide_up_headings = [heading for heading in current_wide_ratio if heading in index['heading']]
+    add_rows(incidence('heading_wide', wide_up_headings)
+             - sp.diags(np.array([current_wide_ratio[heading] for heading in wide_up_headings], dtype=float))
+             @ incidence('heading', wide_up_headings),
+             '>', np.full(len(wide_up_headings), 0.0001),
+             [f"wide_body_ratio_increase_{heading}_{market_type}_Arrival" for heading in wide_up_headings])
+
+    # 未来分布变量：各 (航司, 航向, 机型类别, 小时) 组合的航班数量
+    distribution_keys = [(airline, heading, acft_cat, hour) for hour in range(24) for airline in airlines
+                         for heading in headings for acft_cat in ['C', 'E']
+                         if (airline, heading, acft_cat, hour) in index['distribution']]
+    distribution_names = ["{}_{}_{}_{}".format(*key) for key in distribution_keys]
+    future = model.addMVar(len(distribution_keys), lb=0, vtype=GRB.INTEGER,
+                           name=[f"future_{name}" for name in distribution_names])
+    if distribution_keys:
+        model.addConstr(future == incidence('distribution', distribution_keys) @ x,
+                        name=[f"future_distr_{name}" for name in distribution_names])
+    future_position = {key: k for k, key in enumerate(distribution_keys)}
+
+    # 计算总航班数
+    total_flights = len(flight_ids)
+
+    # 第一目标：最小化各航司集团（除其它）未来波形与现状波形的差异
+    dev_keys = [(airline, hour) for airline in airlines if airline != '其它' for hour in range(24)]
+    dev_names = [f"{airline}_{hour}" for airline, hour in dev_keys]
+    wave_dev = model.addMVar(len(dev_keys), lb=0, name=[f"wave_dev_{name}" for name in dev_names])
+    airline_wave_deviation = 0
+    if dev_keys:
+        current_counts = np.array([airline_hour_counts.get(key, 0) for key in dev_keys], dtype=float)
+        future_counts = incidence('airline_hour', dev_keys) @ x
+        model.addConstr(wave_dev >= future_counts - current_counts, name=[f"wave_dev_pos_{name}" for name in dev_names])
+        model.addConstr(wave_dev >= current_counts - future_counts, name=[f"wave_dev_neg_{name}" for name in dev_names])
+        airline_wave_deviation = wave_dev @ wave_dev
+
+    # 第二目标：未来分布与当前分布的偏离度
+    deviation_keys, deviation_current = [], []
+    missing_value = 0
+    for key in set(current_hour_distribution.keys()) | set(future_position.keys()):
+        current_value = current_hour_distribution.get(key, 0)
+        if key in future_position:
+            deviation_keys.append(key)
+            deviation_current.append(current_value)
+        elif current_value > 0:
+            # 未来分布中没有这个组合，偏离度为当前值
+            missing_value += current_value * 100
+    deviation_names = ["{}_{}_{}_{}".format(*key) for key in deviation_keys]
+    deviation = model.addMVar(len(deviation_keys), lb=0, name=[f"dev_{name}" for name in deviation_names])
+    obj_expr = missing_value
+    if deviation_keys:
+        deviation_current = np.array(deviation_current, dtype=float)
+        future_value = future[[future_position[key] for key in deviation_keys]] / total_flights
+        model.addConstr(deviation >= future_value - deviation_current,
+                        name=[f"dev_pos_{name}" for name in deviation_names])
+        model.addConstr(deviation >= deviation_current - future_value,
+                        name=[f"dev_neg_{name}" for name in deviation_names])
+        obj_expr = deviation.sum() * 100 + missing_value
+
+    # 设置多目标：波形差异权重10000，分布偏离度权重100
+    model.setObjective(airline_wave_deviation * 10000 + obj_expr, GRB.MINIMIZE)
+
+    return model, x
@@ -0,0 +1,102 @@
+import numpy as np
+import scipy.sparse as sp
+
+# 机型到目标函数中机型类别的映射：A-D为窄体机，E、F为宽体机
+ACFT_CATEGORY = {'A': 'C', 'B': 'C', 'C': 'C', 'D': 'C', 'E': 'E', 'F': 'E'}
+
+
+def build_group_index(candidates, by, mask=None):
+    """
+    按指定列对候选变量分组，返回各分组对应的候选变量行号
+
+    Args:
+        candidates: 候选变量表，每行对应一个决策变量
+        by: 分组列名或列名列表
+        mask: 可选的布尔数组，仅对满足条件的行分组
+
+    Returns:
+        dict: {分组键: 候选变量行号数组}，分组键中含空值的行会被忽略
+    """
+    if mask is None:
+        positions = np.arange(len(candidates))
+        subset = candidates
+    else:
+        positions = np.flatnonzero(np.asarray(mask, dtype=bool))
+        subset = candidates.iloc[positions]
+
+    if subset.empty:
+        return {}
+
+    return {key: positions[rows] for key, rows in subset.groupby(by, sort=False).indices.items()}
+
+
+def build_arrival_index(candidates):
+    """
+    为进港分配模型的候选变量 x[i, a, h] 构建稀疏索引
+
+    Args:
+        candidates: 候选变量表，需包含 ID、航司、航向、小时、宽体、机型类别、离港市场 列
+
+    Returns:
+        dict: 各约束族使用的分组索引，值为 {分组键: 候选变量行号数组}
+    """
+    wide = candidates['宽体'].to_numpy(dtype=bool)
+    return {
+        'flight': build_group_index(candidates, 'ID'),
+        'airline': build_group_index(candidates, '航司'),
+        'heading': build_group_index(candidates, '航向'),
+        'airline_heading': build_group_index(candidates, ['航司', '航向']),
+        'airline_hour': build_group_index(candidates, ['航司', '小时']),
+        'airline_dep_market': build_group_index(candidates, ['航司', '离港市场']),
+        'airline_wide': build_group_index(candidates, '航司', mask=wide),
+        'heading_wide': build_group_index(candidates, '航向', mask=wide),
+        'distribution': build_group_index(candidates, ['航司', '航向', '机型类别', '小时']),
+    }
+
+
+def build_departure_index(heading_candidates, airline_candidates):
+    """
+    为离港分配模型的候选变量构建稀疏索引
+
+    航向变量包括已分配航司航班的 y[i, h] 和未分配航司航班的 w[i, h, a]，两者统一按
+    (航司, 航向, 小时, 机型类别) 分组；航司变量 z[i, a] 单独分组。
+
+    Args:
+        heading_candidates: 航向变量表，需包含 ID、航司、航向、小时、宽体、机型类别 列
+        airline_candidates: 航司变量表，需包含 ID、航司、宽体 列
+
+    Returns:
+        dict: 各约束族使用的分组索引，值为 {分组键: 候选变量行号数组}
+    """
+    wide = heading_candidates['宽体'].to_numpy(dtype=bool)
+    z_wide = airline_candidates['宽体'].to_numpy(dtype=bool)
+    return {
+        'heading': build_group_index(heading_candidates, '航向'),
+        'airline_heading': build_group_index(heading_candidates, ['航司', '航向']),
+        'airline_hour': build_group_index(heading_candidates, ['航司', '小时']),
+        'heading_wide': build_group_index(heading_candidates, '航向', mask=wide),
+        'distribution': build_group_index(heading_candidates, ['航司', '航向', '机型类别', '小时']),
+        'z_airline': build_group_index(airline_candidates, '航司'),
+        'z_airline_wide': build_group_index(airline_candidates, '航司', mask=z_wide),
+    }
+
+
+def build_incidence_matrix(index, keys, n_candidates):
+    """
+    将分组索引转换为稀疏关联矩阵，供矩阵API批量添加约束
+
+    Args:
+        index: 分组索引 {分组键: 候选变量行号数组}
+        keys: 矩阵各行对应的分组键列表，不在索引中的分组键对应空行
+        n_candidates: 候选变量数量，即矩阵列数
+
+    Returns:
+        scipy.sparse.csr_matrix: 形状为 (len(keys), n_candidates) 的0-1矩阵，
+        第 r 行在分组 keys[r] 包含的候选变量列上为1
+    """
+    groups = [index.get(key, np.empty(0, dtype=np.int64)) for key in keys]
+    lengths = np.array([len(group) for group in groups], dtype=np.int64)
+    rows = np.repeat(np.arange(len(keys)), lengths)
+    cols = np.concatenate(groups).astype(np.int64) if len(groups) > 0 else np.empty(0, dtype=np.int64)
+    data = np.ones(len(cols))
+    return sp.coo_matrix((data, (rows, cols)), shape=(len(keys), n_candidates)).tocsr()
@@ -32,4 +32,20 @@ DOM_ARR_WIDE_BIAS = 0
 INT_ARR_WIDE_BIAS = 0
 
 DOM_DEP_WIDE_BIAS = 1
-INT_DEP_WIDE_BIAS = 0
\ No newline at end of file
+INT_DEP_WIDE_BIAS = 0
+
+# arrival model builder: 'loop' or 'matrix'
+ARR_MODEL_BUILDER = 'loop'
+
+# warm start: reuse the previous run's assignment as MIP start
+WARM_START = False
+WARM_START_DIR = "warm_start"
+
+# solve DOM and INT departure models in parallel processes
+PARALLEL_DEPARTURES = False
+
+# binary cache for Excel inputs (None disables the cache)
+EXCEL_CACHE_DIR = ".excel_cache"
+
+# stage result cache keyed by input hash (None disables the cache)
+STAGE_CACHE_DIR = ".stage_cache"
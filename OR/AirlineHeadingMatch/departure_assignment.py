@@ -1,17 +1,22 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import gurobipy as gp
+import numpy as np
 import pandas as pd
 from gurobipy import GRB
 
 from OR.AirlineHeadingMatch.utils import get_main_headings, get_hour_from_time, diagnose_infeasibility
-from config import DOM_DEP_GAP, INT_DEP_GAP, DOM_DEP_WAVE_BIAS, INT_DEP_WAVE_BIAS, DOM_DEP_WIDE_BIAS, INT_DEP_WIDE_BIAS
-from excel_to_dataset import DOM_AIRLINES, INT_AIRLINES, HEADINGS_DEP, AIRLINES_WIDE, ABSOLUTE_LONG_ROUTING, \
-    MAIN_HEADING_EXCEPTION_AIRLINES, WAVE_EXCEPTION_AIRLINES, DEP_DOM_WIDE_EXCEPTION_ROUTING, \
-    DEP_INT_WIDE_EXCEPTION_ROUTING, DEP_INT_WIDE_UP_ROUTING, DEP_DOM_WIDE_UP_ROUTING
+from assignment_index import ACFT_CATEGORY, build_departure_index
+from config import DOM_DEP_GAP, INT_DEP_GAP, DOM_DEP_WAVE_BIAS, INT_DEP_WAVE_BIAS, DOM_DEP_WIDE_BIAS, INT_DEP_WIDE_BIAS, \
+    WARM_START, WARM_START_DIR
+from excel_to_dataset import load_template
 from exceptions import get_valid_airline_heading_pairs
+from warm_start import load_solution, save_solution, start_values, set_start
 
 
 def assign_departure_flights(arrival_assignments, departure_flights, current_status, market_type, hourly_dom_dep_stats,
-                             hourly_int_dep_stats):
+                             hourly_int_dep_stats, warm_start=WARM_START, env=None, threads=None, template=None):
     """
     为离港航班分配航司和航向
 
@@ -22,11 +27,16 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
         market_type: 'DOM' 或 'INT'
         hourly_dom_dep_stats: 国内出发航班小时统计数据
         hourly_int_dep_stats: 国际出发航班小时统计数据
+        warm_start: 是否以上次运行保存的分配结果作为初始解，并在求解成功后保存本次结果
+        env: Gurobi环境，为 None 时使用默认环境
+        threads: Gurobi求解线程数，为 None 时由Gurobi自动决定
+        template: 输入模板配置，见 load_template，为 None 时读取默认模板
 
     Returns:
         带有航司和航向分配的离港航班数据
     """
     print(f"开始分配{market_type}离港航班...")
+    template = template if template is not None else load_template()
     main_headings = get_main_headings(current_status)
 
     # 选择对应的小时统计数据
@@ -56,13 +66,13 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
 
     # 获取所有可能的航司和航向
     if market_type == 'DOM':
-        airlines_data = DOM_AIRLINES
-        headings_data = HEADINGS_DEP
-        wide_up_routings = DEP_DOM_WIDE_UP_ROUTING
+        airlines_data = template.DOM_AIRLINES
+        headings_data = template.HEADINGS_DEP
+        wide_up_routings = template.DEP_DOM_WIDE_UP_ROUTING
     else:
-        airlines_data = INT_AIRLINES
-        headings_data = HEADINGS_DEP
-        wide_up_routings = DEP_INT_WIDE_UP_ROUTING
+        airlines_data = template.INT_AIRLINES
+        headings_data = template.HEADINGS_DEP
+        wide_up_routings = template.DEP_INT_WIDE_UP_ROUTING
 
     all_airlines = []
     for base_type in airlines_data:
@@ -81,184 +91,159 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
 
     # 为每个离港航班分配航司（与相同ID的进港航班相同）
     # 修改：添加特例处理，检查配对的进港航班日期
-    for i, flight in day2_departures.iterrows():
-        flight_id = flight['ID']
-        # 查找相同ID的进港航班
-        matching_arrivals = arrival_assignments[arrival_assignments['ID'] == flight_id]
-
-        if not matching_arrivals.empty:
-            # 如果进港航班日期为2，则遵循"离港航司=进港航司"的规则
-            # 如果进港航班日期为1，则不需要遵循该规则，航司将在后续步骤中分配
-            result_df.loc[i, '航司'] = matching_arrivals.iloc[0]['航司']
-
-    # 创建Gurobi模型来分配航向和未分配航司的航班
-    model = gp.Model("Departure_Assignment")
-
-    # 创建决策变量
-    # y[i, h] = 1 表示航班i分配给航向h
-    y = {}
-    # z[i, a] = 1 表示航班i分配给航司a（仅对未分配航司的航班）
-    z = {}
-
-    for i, flight in day2_departures.iterrows():
-        flight_id = flight['ID']
-        flight_hour = flight['小时']
-        flight_acft = flight['机型']
-        flight_airline = result_df.loc[i, '航司']
-        is_wide_body = flight_acft in ['E', 'F']
-
-        # 如果已经分配了航司
-        if flight_airline:
-            airline_base_type = next((base_type for airline, base_type in all_airlines if airline == flight_airline),
-                                     None)
-
-            for heading, heading_type in all_headings:
-                # 检查是否满足约束条件
-                # 1. 绝对远程航向只分配给主基地航司或东航南航海航集团
-                if market_type == 'INT' and heading_type == '绝对远程' and airline_base_type == '非主基地' and flight_airline not in ABSOLUTE_LONG_ROUTING:
+    # 如果进港航班日期为2，则遵循"离港航司=进港航司"的规则
+    # 如果进港航班日期为1，则不需要遵循该规则，航司将在后续步骤中分配
+    arrival_airline = arrival_assignments.drop_duplicates('ID').set_index('ID')['航司']
+    matched = result_df['ID'].isin(arrival_airline.index)
+    result_df.loc[matched, '航司'] = result_df.loc[matched, 'ID'].map(arrival_airline)
+    is_assigned = result_df['航司'].map(bool).to_numpy()
+
+    # 各航司可分配的航向只与航司和是否为宽体机有关，按 (航司, 宽体) 缓存
+    base_types = dict(all_airlines)
+    allowed_heading_cache = {}
+
+    def allowed_headings(airline, is_wide_body):
+        cache_key = (airline, is_wide_body)
+        if cache_key in allowed_heading_cache:
+            return allowed_heading_cache[cache_key]
+
+        base_type = base_types.get(airline)
+        headings = []
+        for heading, heading_type in all_headings:
+            # 检查是否满足约束条件
+            # 1. 绝对远程航向只分配给主基地航司或东航南航海航集团
+            if market_type == 'INT' and heading_type == '绝对远程' and base_type == '非主基地' and \
+                    airline not in template.ABSOLUTE_LONG_ROUTING:
+                continue
+
+            # 2. 绝对远程航向分配宽体机
+            if market_type == 'INT' and heading_type == '绝对远程' and not is_wide_body:
+                continue
+
+            # 3. 特定航向不能有宽体机
+            if is_wide_body:
+                if market_type == 'DOM' and heading in template.DEP_DOM_WIDE_EXCEPTION_ROUTING:
+                    continue
+                if market_type == 'INT' and heading in template.DEP_INT_WIDE_EXCEPTION_ROUTING:
                     continue
 
-                # 2. 绝对远程航向分配宽体机
-                if market_type == 'INT' and heading_type == '绝对远程' and flight_acft not in ['E', 'F']:
+            # 4. 新增约束：只有当航司在现状中存在该航向时，才能分配
+            # 特例：国际离港的SAGPI航向可以分配给所有航司
+            if airline != '其它' and (airline, heading) not in valid_airline_heading_pairs:
+                if not (market_type == 'INT' and heading == 'SAGPI'):
                     continue
 
-                # 3. 特定航向不能有宽体机
-                if is_wide_body:
-                    if market_type == 'DOM' and heading in DEP_DOM_WIDE_EXCEPTION_ROUTING:
-                        continue
-                    if market_type == 'INT' and heading in DEP_INT_WIDE_EXCEPTION_ROUTING:
-                        continue
+            headings.append(heading)
 
-                # 4. 新增约束：只有当航司在现状中存在该航向时，才能分配
-                # 特例：国际离港的SAGPI航向可以分配给所有航司
-                if flight_airline != '其它' and (flight_airline, heading) not in valid_airline_heading_pairs:
-                    if not (market_type == 'INT' and heading == 'SAGPI'):
-                        continue
+        allowed_heading_cache[cache_key] = headings
+        return headings
+
+    # 创建Gurobi模型来分配航向和未分配航司的航班
+    model = gp.Model("Departure_Assignment", env=env)
+
+    # 创建决策变量，单次遍历航班，同时记录每个变量所属的航司、航向、小时和机型
+    # y[k] = 1 表示航向变量表第k行的航班i分配给航向h：
+    #   已分配航司的航班对应 y[i, h]，未分配航司的航班对应联合变量 w[i, a, h]
+    y = []
+    heading_records = []
+    # z[k] = 1 表示航司变量表第k行的航班i分配给航司a（仅对未分配航司的航班）
+    z = []
+    airline_records = []
+
+    for flight_id, flight_hour, flight_acft, flight_airline, assigned in zip(
+            day2_departures['ID'], day2_departures['小时'], day2_departures['机型'], result_df['航司'], is_assigned):
+        is_wide_body = flight_acft in ['E', 'F']
+        acft_cat = ACFT_CATEGORY.get(flight_acft)
 
-                y[flight_id, heading] = model.addVar(vtype=GRB.BINARY, name=f"y_{flight_id}_{heading}")
+        # 如果已经分配了航司
+        if assigned:
+            flight_vars = []
+            for heading in allowed_headings(flight_airline, is_wide_body):
+                var = model.addVar(vtype=GRB.BINARY, name=f"y_{flight_id}_{heading}")
+                y.append(var)
+                heading_records.append((flight_id, flight_airline, heading, flight_hour, is_wide_body, acft_cat))
+                flight_vars.append(var)
+
+            # 每个航班只能分配给一个航向
+            model.addConstr(gp.quicksum(flight_vars) == 1, f"one_heading_{flight_id}")
         # 如果未分配航司（进港航班日期为1的情况）
         else:
             # 为航班分配航司
-            for airline, base_type in all_airlines:
-                z[flight_id, airline] = model.addVar(vtype=GRB.BINARY, name=f"z_{flight_id}_{airline}")
+            flight_z = []
+            for airline, _ in all_airlines:
+                var = model.addVar(vtype=GRB.BINARY, name=f"z_{flight_id}_{airline}")
+                z.append(var)
+                airline_records.append((flight_id, airline, is_wide_body))
+                flight_z.append(var)
 
             # 每个航班只能分配给一个航司
-            model.addConstr(
-                gp.quicksum(z[flight_id, airline]
-                            for airline, _ in all_airlines
-                            if (flight_id, airline) in z) == 1,
-                f"one_airline_{flight_id}"
-            )
+            model.addConstr(gp.quicksum(flight_z) == 1, f"one_airline_{flight_id}")
 
             # 为航班分配航向
-            for airline, base_type in all_airlines:
-                for heading, heading_type in all_headings:
-                    # 检查是否满足约束条件
-                    # 1. 绝对远程航向只分配给主基地航司或东航南航海航集团
-                    if market_type == 'INT' and heading_type == '绝对远程' and base_type == '非主基地' and airline not in ABSOLUTE_LONG_ROUTING:
-                        continue
-
-                    # 2. 绝对远程航向分配宽体机
-                    if market_type == 'INT' and heading_type == '绝对远程' and flight_acft not in ['E', 'F']:
-                        continue
-                    # 3. 特定航向不能有宽体机
-                    if is_wide_body:
-                        if market_type == 'DOM' and heading in DEP_DOM_WIDE_EXCEPTION_ROUTING:
-                            continue
-                        if market_type == 'INT' and heading in DEP_INT_WIDE_EXCEPTION_ROUTING:
-                            continue
-
-                    # 4. 新增约束：只有当航司在现状中存在该航向时，才能分配
-                    # 特例：国际离港的SAGPI航向可以分配给所有航司
-                    if airline != '其它' and (airline, heading) not in valid_airline_heading_pairs:
-                        if not (market_type == 'INT' and heading == 'SAGPI'):
-                            continue
-
-                    # 创建联合变量 w[i, a, h] = z[i, a] * y[i, h]
-                    # 由于无法直接表示非线性约束，我们使用一个新变量和线性约束来表示
-                    var_name = f"w_{flight_id}_{airline}_{heading}"
-                    w = model.addVar(vtype=GRB.BINARY, name=var_name)
-
-                    # 添加约束确保 w[i, a, h] = 1 当且仅当 z[i, a] = 1 且 y[i, h] = 1
-                    # 这需要添加到模型中
-
-                    # 为简化处理，我们直接使用 w 变量代替 y 变量
-                    y[flight_id, heading, airline] = w
-
-    # 每个航班只能分配给一个航向
-    for i, flight in day2_departures.iterrows():
-        flight_id = flight['ID']
-        flight_airline = result_df.loc[i, '航司']
-
-        if flight_airline:  # 已分配航司
-            model.addConstr(
-                gp.quicksum(y[flight_id, heading]
-                            for heading, _ in all_headings
-                            if (flight_id, heading) in y) == 1,
-                f"one_heading_{flight_id}"
-            )
-        else:  # 未分配航司
-            for airline, _ in all_airlines:
-                if (flight_id, airline) in z:
-                    model.addConstr(
-                        gp.quicksum(y[flight_id, heading, airline]
-                                    for heading, _ in all_headings
-                                    if (flight_id, heading, airline) in y) == z[flight_id, airline],
-                        f"one_heading_{flight_id}_{airline}"
-                    )
+            for (airline, _), z_var in zip(all_airlines, flight_z):
+                # 创建联合变量 w[i, a, h] = z[i, a] * y[i, h]
+                # 为简化处理，我们直接使用 w 变量代替 y 变量
+                flight_vars = []
+                for heading in allowed_headings(airline, is_wide_body):
+                    var = model.addVar(vtype=GRB.BINARY, name=f"w_{flight_id}_{airline}_{heading}")
+                    y.append(var)
+                    heading_records.append((flight_id, airline, heading, flight_hour, is_wide_body, acft_cat))
+                    flight_vars.append(var)
+
+                # 航班分配给该航司时，恰好分配一个航向
+                model.addConstr(gp.quicksum(flight_vars) == z_var, f"one_heading_{flight_id}_{airline}")
+
+    heading_candidates = pd.DataFrame(heading_records, columns=['ID', '航司', '航向', '小时', '宽体', '机型类别'])
+    airline_candidates = pd.DataFrame(airline_records, columns=['ID', '航司', '宽体'])
+    index = build_departure_index(heading_candidates, airline_candidates)
+
+    def y_sum(group, key):
+        return gp.quicksum(y[k] for k in index[group].get(key, ()))
+
+    def z_sum(group, key):
+        return gp.quicksum(z[k] for k in index[group].get(key, ()))
+
+    # 已分配航司的航班数量及其中的宽体机数量
+    assigned_counts = result_df['航司'].value_counts()
+    assigned_wide_counts = result_df.loc[result_df['机型'].isin(['E', 'F']), '航司'].value_counts()
 
     # 航司配额约束（对于未分配航司的航班）
     for airline, base_type in all_airlines:
         if market_type == 'DOM':
-            quota = DOM_AIRLINES[base_type][airline]['DEP']
+            quota = template.DOM_AIRLINES[base_type][airline]['DEP']
         else:
-            quota = INT_AIRLINES[base_type][airline]['DEP']
+            quota = template.INT_AIRLINES[base_type][airline]['DEP']
 
         # 计算已分配给该航司的航班数量
-        assigned_count = sum(1 for i, flight in day2_departures.iterrows()
-                             if result_df.loc[i, '航司'] == airline)
+        assigned_count = assigned_counts.get(airline, 0)
 
         # 剩余配额
         remaining_quota = quota - assigned_count
 
         # 如果剩余配额大于0，添加约束
         if remaining_quota > 0:
-            model.addConstr(
-                gp.quicksum(z[flight_id, airline]
-                            for i, flight in day2_departures.iterrows()
-                            if (flight_id := flight['ID'], airline) in z) == remaining_quota,
-                f"airline_quota_{airline}"
-            )
+            model.addConstr(z_sum('z_airline', airline) == remaining_quota, f"airline_quota_{airline}")
         elif remaining_quota < 0:
             print(f"警告：{airline}的离港航班配额已超出，请检查数据")
 
     # 航向配额约束
     for heading, heading_type in all_headings:
         if market_type == 'DOM':
-            quota = HEADINGS_DEP[heading]['DOM']
+            quota = template.HEADINGS_DEP[heading]['DOM']
             bias = 0  # 使用DOM的偏差值
         else:
-            quota = HEADINGS_DEP[heading]['INT']
+            quota = template.HEADINGS_DEP[heading]['INT']
             bias = 0  # 使用INT的偏差值
 
-        # 对于已分配航司的航班
-        assigned_expr = gp.quicksum(y[flight_id, heading]
-                                    for i, flight in day2_departures.iterrows()
-                                    if result_df.loc[i, '航司'] and (flight_id := flight['ID'], heading) in y)
-
-        # 对于未分配航司的航班
-        unassigned_expr = gp.quicksum(y[flight_id, heading, airline]
-                                      for i, flight in day2_departures.iterrows()
-                                      if not result_df.loc[i, '航司']
-                                      for airline, _ in all_airlines
-                                      if (flight_id := flight['ID'], heading, airline) in y)
+        # 已分配航司和未分配航司的航班统一计数
+        heading_expr = y_sum('heading', heading)
 
-        model.addConstr(assigned_expr + unassigned_expr >= quota - bias, f"heading_quota_min_{heading}")
-        model.addConstr(assigned_expr + unassigned_expr <= quota + bias, f"heading_quota_max_{heading}")
+        model.addConstr(heading_expr >= quota - bias, f"heading_quota_min_{heading}")
+        model.addConstr(heading_expr <= quota + bias, f"heading_quota_max_{heading}")
 
     # 主航向比例约束：确保各航司的主航向比例不低于现状
     for airline, _ in all_airlines:
-        if airline in MAIN_HEADING_EXCEPTION_AIRLINES:
+        if airline in template.MAIN_HEADING_EXCEPTION_AIRLINES:
             continue
 
         # if market_type == 'INT' and airline =='海航集团':
@@ -269,34 +254,19 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
             main_heading, current_ratio = main_headings[key]
 
             # 计算已分配该航司的航班数量
-            assigned_flights = [i for i, flight in day2_departures.iterrows()
-                                if result_df.loc[i, '航司'] == airline]
+            total_assigned_expr = assigned_counts.get(airline, 0)
 
             # 如果有航班分配给该航司
-            if assigned_flights:
-                # 计算已分配该航司的主航向航班数量表达式
-                assigned_main_heading_expr = gp.quicksum(y[flight_id, main_heading]
-                                                         for i in assigned_flights
-                                                         if
-                                                         (flight_id := day2_departures.loc[i, 'ID'], main_heading) in y)
-
-                # 计算未分配航司的航班中，分配给该航司的主航向航班数量表达式
-                unassigned_main_heading_expr = gp.quicksum(y[flight_id, main_heading, airline]
-                                                           for i, flight in day2_departures.iterrows()
-                                                           if not result_df.loc[i, '航司']
-                                                           and (flight_id := flight['ID'], main_heading, airline) in y)
+            if total_assigned_expr > 0:
+                # 计算该航司的主航向航班数量表达式（含未分配航司航班中分配给该航司的部分）
+                main_heading_expr = y_sum('airline_heading', (airline, main_heading))
 
                 # 计算该航司的总航班数表达式
-                total_assigned_expr = len(assigned_flights)
-                total_unassigned_expr = gp.quicksum(z[flight_id, airline]
-                                                    for i, flight in day2_departures.iterrows()
-                                                    if not result_df.loc[i, '航司']
-                                                    and (flight_id := flight['ID'], airline) in z)
+                total_unassigned_expr = z_sum('z_airline', airline)
 
                 # 添加比例约束
                 model.addConstr(
-                    (assigned_main_heading_expr + unassigned_main_heading_expr) >=
-                    current_ratio * (total_assigned_expr + total_unassigned_expr),
+                    main_heading_expr >= current_ratio * (total_assigned_expr + total_unassigned_expr),
                     f"main_heading_ratio_{airline}_{market_type}_Departure"
                 )
 
@@ -304,58 +274,28 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
                 for heading, _ in all_headings:
                     if heading != main_heading:
                         # 计算该航向的航班数量表达式
-                        assigned_heading_expr = gp.quicksum(y[flight_id, heading]
-                                                            for i in assigned_flights
-                                                            if
-                                                            (flight_id := day2_departures.loc[i, 'ID'], heading) in y)
-
-                        unassigned_heading_expr = gp.quicksum(y[flight_id, heading, airline]
-                                                              for i, flight in day2_departures.iterrows()
-                                                              if not result_df.loc[i, '航司']
-                                                              and (flight_id := flight['ID'], heading, airline) in y)
+                        heading_expr = y_sum('airline_heading', (airline, heading))
 
                         model.addConstr(
-                            (assigned_main_heading_expr + unassigned_main_heading_expr) >=
-                            (assigned_heading_expr + unassigned_heading_expr),
+                            main_heading_expr >= heading_expr,
                             f"main_heading_dominance_{airline}_{market_type}_{heading}_Departure"
                         )
 
     # 新增约束：确保各航司集团的未来小时波形大于现状波形
     # 按航司集团和小时统计现状航班数量
-    airline_hour_counts = current_departures.groupby(['AirlineGroup', '小时']).size().reset_index(name='count')
+    airline_hour_counts = current_departures.groupby(['AirlineGroup', '小时']).size().to_dict()
 
     # 为每个航司和每个小时添加约束
     for airline, _ in all_airlines:
-        if airline in WAVE_EXCEPTION_AIRLINES:
+        if airline in template.WAVE_EXCEPTION_AIRLINES:
             continue
 
         for hour in range(24):
             # 获取现状中该航司该小时的航班数量
-            current_count = airline_hour_counts[
-                (airline_hour_counts['AirlineGroup'] == airline) &
-                (airline_hour_counts['小时'] == hour)
-                ]['count'].sum() if not airline_hour_counts[
-                (airline_hour_counts['AirlineGroup'] == airline) &
-                (airline_hour_counts['小时'] == hour)
-                ].empty else 0
-
-            # 计算未来分布中该航司该小时的航班数量 - 已分配航司的航班
-            assigned_count_expr = gp.quicksum(
-                y[flight_id, heading]
-                for i, flight in day2_departures.iterrows()
-                if flight['小时'] == hour and result_df.loc[i, '航司'] == airline
-                for heading, _ in all_headings
-                if (flight_id := flight['ID'], heading) in y
-            )
-
-            # 计算未来分布中该航司该小时的航班数量 - 未分配航司的航班
-            unassigned_count_expr = gp.quicksum(
-                y[flight_id, heading, airline]
-                for i, flight in day2_departures.iterrows()
-                if flight['小时'] == hour and not result_df.loc[i, '航司']
-                for heading, _ in all_headings
-                if (flight_id := flight['ID'], heading, airline) in y
-            )
+            current_count = airline_hour_counts.get((airline, hour), 0)
+
+            # 计算未来分布中该航司该小时的航班数量（已分配和未分配航司的航班）
+            future_count_expr = y_sum('airline_hour', (airline, hour))
 
             # 添加约束：未来分布不低于现状
             if current_count > 0:
@@ -365,28 +305,20 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
                 else:
                     bias = INT_DEP_WAVE_BIAS
                 model.addConstr(
-                    assigned_count_expr + unassigned_count_expr >= current_count - bias,
+                    future_count_expr >= current_count - bias,
                     f"hourly_wave_{airline}_{hour}_{market_type}_Departure"
                 )
 
     # 添加宽体机配额约束
     for airline, _ in all_airlines:
         # 获取该航司在该市场类型的宽体机配额
-        wide_body_quota = AIRLINES_WIDE.get(airline, {}).get(market_type, 0)
+        wide_body_quota = template.AIRLINES_WIDE.get(airline, {}).get(market_type, 0)
 
         # 计算已分配给该航司的宽体机航班数量
-        assigned_wide_body_count = sum(
-            1 for i, flight in day2_departures.iterrows()
-            if result_df.loc[i, '航司'] == airline and flight['机型'] in ['E', 'F']
-        )
+        assigned_wide_body_count = assigned_wide_counts.get(airline, 0)
 
         # 计算未分配航司的宽体机航班中，分配给该航司的数量表达式
-        unassigned_wide_body_expr = gp.quicksum(
-            z[flight_id, airline]
-            for i, flight in day2_departures.iterrows()
-            if not result_df.loc[i, '航司'] and flight['机型'] in ['E', 'F']
-            and (flight_id := flight['ID'], airline) in z
-        )
+        unassigned_wide_body_expr = z_sum('z_airline_wide', airline)
 
         # 添加约束：宽体机总数量必须等于配额
         # 宽体偏移
@@ -426,44 +358,11 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
         # 为每个需要提高宽体机比例的航向添加约束
         for heading in wide_up_routings:
             if heading in current_wide_ratio:
-                # 计算未来该航向的总航班数 - 已分配航司的航班
-                assigned_total_expr = gp.quicksum(
-                    y[flight_id, heading]
-                    for i, flight in day2_departures.iterrows()
-                    if result_df.loc[i, '航司'] and (flight_id := flight['ID'], heading) in y
-                )
-
-                # 计算未来该航向的宽体机航班数 - 已分配航司的航班
-                assigned_wide_expr = gp.quicksum(
-                    y[flight_id, heading]
-                    for i, flight in day2_departures.iterrows()
-                    if result_df.loc[i, '航司'] and (flight_id := flight['ID'], heading) in y
-                    and flight['机型'] in ['E', 'F']
-                )
-
-                # 计算未来该航向的总航班数 - 未分配航司的航班
-                unassigned_total_expr = gp.quicksum(
-                    y[flight_id, heading, airline]
-                    for i, flight in day2_departures.iterrows()
-                    if not result_df.loc[i, '航司']
-                    for airline, _ in all_airlines
-                    if (flight_id := flight['ID'], heading, airline) in y
-                )
-
-                # 计算未来该航向的宽体机航班数 - 未分配航司的航班
-                unassigned_wide_expr = gp.quicksum(
-                    y[flight_id, heading, airline]
-                    for i, flight in day2_departures.iterrows()
-                    if not result_df.loc[i, '航司']
-                    for airline, _ in all_airlines
-                    if (flight_id := flight['ID'], heading, airline) in y
-                    and flight['机型'] in ['E', 'F']
-                )
+                # 计算未来该航向的总航班数及宽体机航班数（已分配和未分配航司的航班）
+                total_expr = y_sum('heading', heading)
+                wide_expr = y_sum('heading_wide', heading)
 
                 # 添加约束：未来宽体机比例 > 现状宽体机比例
-                total_expr = assigned_total_expr + unassigned_total_expr
-                wide_expr = assigned_wide_expr + unassigned_wide_expr
-
                 if total_expr.size() > 0:  # 确保有航班分配给该航向
                     model.addConstr(
                         wide_expr - 0.0001 >= current_wide_ratio[heading] * total_expr,
@@ -481,30 +380,10 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
             continue
         for hour in range(24):
             # 现状
-            current_count = airline_hour_counts[
-                (airline_hour_counts['AirlineGroup'] == airline) &
-                (airline_hour_counts['小时'] == hour)
-                ]['count'].sum() if not airline_hour_counts[
-                (airline_hour_counts['AirlineGroup'] == airline) &
-                (airline_hour_counts['小时'] == hour)
-                ].empty else 0
+            current_count = airline_hour_counts.get((airline, hour), 0)
 
             # 未来
-            assigned_count_expr = gp.quicksum(
-                y[flight_id, heading]
-                for i, flight in day2_departures.iterrows()
-                if flight['小时'] == hour and result_df.loc[i, '航司'] == airline
-                for heading, _ in all_headings
-                if (flight_id := flight['ID'], heading) in y
-            )
-            unassigned_count_expr = gp.quicksum(
-                y[flight_id, heading, airline]
-                for i, flight in day2_departures.iterrows()
-                if flight['小时'] == hour and not result_df.loc[i, '航司']
-                for heading, _ in all_headings
-                if (flight_id := flight['ID'], heading, airline) in y
-            )
-            future_count_expr = assigned_count_expr + unassigned_count_expr
+            future_count_expr = y_sum('airline_hour', (airline, hour))
 
             # 绝对偏差
             dev_var = model.addVar(lb=0, name=f"wave_dev_{airline}_{hour}")
@@ -533,43 +412,13 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
     # 创建变量来表示未来分布
     future_distribution = {}
     for hour in range(24):
-        hour_flights = day2_departures[day2_departures['小时'] == hour]
-
         for airline, _ in all_airlines:
             for heading, _ in all_headings:
                 for acft_cat in ['C', 'E']:  # 简化为窄体机和宽体机两类
                     key = (airline, heading, acft_cat, hour)
 
-                    # 计算该组合的航班数量表达式
-                    count_expr = gp.LinExpr()
-
-                    # 已分配航司的航班
-                    for i, flight in hour_flights.iterrows():
-                        flight_id = flight['ID']
-                        flight_airline = result_df.loc[i, '航司']
-                        flight_acft = flight['机型']
-
-                        # 检查机型是否匹配
-                        is_matching_acft = (acft_cat == 'C' and flight_acft in ['A', 'B', 'C', 'D']) or \
-                                           (acft_cat == 'E' and flight_acft in ['E', 'F'])
-
-                        if is_matching_acft and flight_airline == airline and (flight_id, heading) in y:
-                            count_expr += y[flight_id, heading]
-
-                    # 未分配航司的航班
-                    for i, flight in hour_flights.iterrows():
-                        flight_id = flight['ID']
-                        flight_airline = result_df.loc[i, '航司']
-                        flight_acft = flight['机型']
-
-                        # 检查机型是否匹配
-                        is_matching_acft = (acft_cat == 'C' and flight_acft in ['A', 'B', 'C', 'D']) or \
-                                           (acft_cat == 'E' and flight_acft in ['E', 'F'])
-
-                        if is_matching_acft and not flight_airline and (flight_id, airline) in z:
-                            for heading_item, _ in all_headings:
-                                if (flight_id, heading_item, airline) in y and heading_item == heading:
-                                    count_expr += y[flight_id, heading_item, airline]
+                    # 计算该组合的航班数量表达式（已分配航司的航班及未分配航司航班中分配给该航司的部分）
+                    count_expr = y_sum('distribution', key)
 
                     # 如果有航班可能被分配到这个组合
                     if count_expr.size() > 0:
@@ -581,50 +430,6 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
                         model.addConstr(future_distribution[key] == count_expr,
                                         f"future_distr_{airline}_{heading}_{acft_cat}_{hour}")
 
-                # 对于机型分布
-                for acft_cat in ['C', 'E']:  # 简化为窄体机和宽体机两类
-                    # 计算该组合的航班数量表达式
-                    acft_count_expr = gp.LinExpr()
-
-                    # 已分配航司的航班
-                    for i, flight in hour_flights.iterrows():
-                        flight_id = flight['ID']
-                        flight_airline = result_df.loc[i, '航司']
-                        flight_acft = flight['机型']
-
-                        # 检查机型是否匹配
-                        is_matching_acft = (acft_cat == 'C' and flight_acft in ['A', 'B', 'C', 'D']) or \
-                                           (acft_cat == 'E' and flight_acft in ['E', 'F'])
-
-                        if is_matching_acft and flight_airline == airline and (flight_id, heading) in y:
-                            acft_count_expr += y[flight_id, heading]
-
-                    # 未分配航司的航班
-                    for i, flight in hour_flights.iterrows():
-                        flight_id = flight['ID']
-                        flight_airline = result_df.loc[i, '航司']
-                        flight_acft = flight['机型']
-
-                        # 检查机型是否匹配
-                        is_matching_acft = (acft_cat == 'C' and flight_acft in ['A', 'B', 'C', 'D']) or \
-                                           (acft_cat == 'E' and flight_acft in ['E', 'F'])
-
-                        if is_matching_acft and not flight_airline and (flight_id, airline) in z:
-                            for heading_item, _ in all_headings:
-                                if (flight_id, heading_item, airline) in y and heading_item == heading:
-                                    acft_count_expr += y[flight_id, heading_item, airline]
-
-                    # 如果有航班可能被分配到这个组合
-                    if acft_count_expr.size() > 0:
-                        # 创建变量表示该组合的航班数量
-                        key = (airline, heading, acft_cat, hour)
-                        var_name = f"future_{airline}_{heading}_{acft_cat}_{hour}"
-                        future_distribution[key] = model.addVar(name=var_name, lb=0, vtype=GRB.INTEGER)
-
-                        # 添加约束，确保future_distribution变量等于acft_count_expr
-                        model.addConstr(future_distribution[key] == acft_count_expr,
-                                        f"future_distr_{airline}_{heading}_{acft_cat}_{hour}")
-
     # 计算总航班数
     total_flights = day2_departures.shape[0]
 
@@ -658,6 +463,14 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
         model.Params.MIPGap = DOM_DEP_GAP  # 设置Gap（相对间隙）
     else:
         model.Params.MIPGap = INT_DEP_GAP
+    if threads:
+        model.Params.Threads = threads
+
+    # 以上次运行的分配结果作为初始解
+    if warm_start:
+        previous = load_solution(WARM_START_DIR, f"departure_{market_type}")
+        set_start(model, y, start_values(heading_candidates, previous, ['ID', '航司', '航向']))
+        set_start(model, z, start_values(airline_candidates, previous, ['ID', '航司']))
 
     # 求解模型
     model.optimize()
@@ -669,24 +482,14 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
         print("-----------------------------------------------------------------------")
 
         # 将结果添加到航班数据中
-        for i, flight in day2_departures.iterrows():
-            flight_id = flight['ID']
-            flight_airline = result_df.loc[i, '航司']
-
-            # 对于已分配航司的航班，只需分配航向
-            if flight_airline:
-                for heading, _ in all_headings:
-                    if (flight_id, heading) in y and y[flight_id, heading].X > 0.5:
-                        result_df.loc[i, '航向'] = heading
-            # 对于未分配航司的航班，需要分配航司和航向
-            else:
-                for airline, _ in all_airlines:
-                    if (flight_id, airline) in z and z[flight_id, airline].X > 0.5:
-                        result_df.loc[i, '航司'] = airline
+        # 对于已分配航司的航班，只需分配航向；对于未分配航司的航班，需要分配航司和航向
+        chosen_headings = heading_candidates[np.array(model.getAttr('X', y)) > 0.5].set_index('ID')['航向']
+        chosen_airlines = airline_candidates[np.array(model.getAttr('X', z)) > 0.5].set_index('ID')['航司']
+        result_df['航向'] = result_df['ID'].map(chosen_headings).fillna("")
+        result_df.loc[~is_assigned, '航司'] = result_df.loc[~is_assigned, 'ID'].map(chosen_airlines).fillna("")
 
-                        for heading, _ in all_headings:
-                            if (flight_id, heading, airline) in y and y[flight_id, heading, airline].X > 0.5:
-                                result_df.loc[i, '航向'] = heading
+        if warm_start:
+            save_solution(WARM_START_DIR, f"departure_{market_type}", result_df)
 
         return result_df
     else:
@@ -695,3 +498,47 @@ def assign_departure_flights(arrival_assignments, departure_flights, current_sta
         print(f"{market_type}离港航班分配失败！模型不可行。")
         print("-----------------------------------------------------------------------")
         return None
+
+
+def assign_departure_flights_in_env(arrival_assignments, departure_flights, current_status, market_type,
+                                    hourly_dom_dep_stats, hourly_int_dep_stats, threads, template=None):
+    """
+    在独立的Gurobi环境中为离港航班分配航司和航向，供进程池调用
+
+    参数含义见 assign_departure_flights
+    """
+    with gp.Env() as env:
+        return assign_departure_flights(arrival_assignments, departure_flights, current_status, market_type,
+                                        hourly_dom_dep_stats, hourly_int_dep_stats, env=env, threads=threads,
+                                        template=template)
+
+
+def assign_departure_flights_parallel(arrival_assignments, departure_flights, current_status, hourly_dom_dep_stats,
+                                      hourly_int_dep_stats, market_types=('DOM', 'INT'), template=None):
+    """
+    并行为国内和国际离港航班分配航司和航向
+
+    各市场的离港分配只依赖进港分配结果，互相独立。每个市场在单独的进程中求解，
+    使用各自的Gurobi环境，机器的CPU核数在各进程间平均分配作为求解线程数。
+
+    Args:
+        arrival_assignments: 已分配的进港航班
+        departure_flights: 需要分配的离港航班
+        current_status: 现状数据
+        hourly_dom_dep_stats: 国内出发航班小时统计数据
+        hourly_int_dep_stats: 国际出发航班小时统计数据
+        market_types: 需要分配的市场
+        template: 输入模板配置，见 load_template，为 None 时读取默认模板
+
+    Returns:
+        list: 与 market_types 顺序对应的离港航班分配结果
+    """
+    # 在主进程中读取模板后传给各进程，避免每个进程重复读取
+    template = template if template is not None else load_template()
+    threads = max(1, (os.cpu_count() or 1) // len(market_types))
+    with ProcessPoolExecutor(max_workers=len(market_types)) as executor:
+        futures = [executor.submit(assign_departure_flights_in_env, arrival_assignments, departure_flights,
+                                   current_status, market_type, hourly_dom_dep_stats, hourly_int_dep_stats, threads,
+                                   template)
+                   for market_type in market_types]
+        return [future.result() for future in futures]
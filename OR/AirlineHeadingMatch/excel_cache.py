@@ -0,0 +1,160 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from config import EXCEL_CACHE_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+# 缓存格式版本，缓存写法变化时修改此值使旧缓存失效
+CACHE_VERSION = 1
+
+
+def cache_prefix(path, sheet_name):
+    """返回某个文件某个sheet的缓存文件名前缀，只与文件路径和sheet名有关"""
+    source = f"{os.path.abspath(path)}|{sheet_name}"
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+
+
+def cache_stem(path, sheet_name):
+    """
+    返回缓存文件名（不含扩展名），由文件路径、sheet名、修改时间和文件大小确定
+
+    Excel文件被修改后修改时间或大小变化，缓存文件名随之变化，旧缓存自动失效。
+    """
+    stat = os.stat(path)
+    version = f"{stat.st_mtime_ns}|{stat.st_size}|{CACHE_VERSION}"
+    return f"{cache_prefix(path, sheet_name)}_{hashlib.sha1(version.encode('utf-8')).hexdigest()[:16]}"
+
+
+def encode_columns(columns):
+    """将列名编码为JSON，保留整数列名（如小时统计表的0-23列），无法编码时返回 None"""
+    labels = []
+    for column in columns:
+        if isinstance(column, str):
+            labels.append(['str', column])
+        elif isinstance(column, int):
+            labels.append(['int', column])
+        else:
+            return None
+    return json.dumps(labels, ensure_ascii=False)
+
+
+def decode_columns(encoded):
+    """将 encode_columns 编码的列名还原"""
+    return [int(value) if kind == 'int' else value for kind, value in json.loads(encoded)]
+
+
+def write_feather(df, path):
+    """
+    将DataFrame写为不压缩的Feather文件，以便读取时内存映射
+
+    Returns:
+        bool: 是否写入成功，pyarrow不可用或数据无法转换为Arrow格式时返回 False
+    """
+    if feather is None:
+        return False
+    encoded = encode_columns(df.columns)
+    if encoded is None:
+        return False
+    try:
+        frame = df.copy()
+        frame.columns = [f"c{n}" for n in range(len(df.columns))]
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'excel_cache_columns'] = encoded.encode('utf-8')
+        feather.write_feather(table.replace_schema_metadata(metadata), path, compression='uncompressed')
+        return True
+    except (pa.ArrowException, TypeError, ValueError):
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+
+
+def read_feather(path):
+    """以内存映射方式读取 write_feather 写入的Feather文件"""
+    table = feather.read_table(path, memory_map=True)
+    df = table.to_pandas()
+    df.columns = decode_columns(table.schema.metadata[b'excel_cache_columns'].decode('utf-8'))
+    return df
+
+
+def read_excel_cached(path, sheet_name=0, cache_dir=EXCEL_CACHE_DIR):
+    """
+    读取Excel文件的一个sheet，首次读取后缓存为二进制文件，之后直接读取缓存
+
+    缓存优先使用Feather格式并以内存映射方式读取；pyarrow不可用或数据无法转换为Arrow格式时
+    使用pickle格式。
+
+    Args:
+        path: Excel文件路径
+        sheet_name: sheet名称或序号
+        cache_dir: 缓存目录，为 None 时不使用缓存
+
+    Returns:
+        DataFrame: 与 pd.read_excel(path, sheet_name=sheet_name) 相同的数据
+    """
+    if cache_dir is None:
+        return pd.read_excel(path, sheet_name=sheet_name)
+
+    stem = os.path.join(cache_dir, cache_stem(path, sheet_name))
+    if os.path.exists(stem + '.feather') and feather is not None:
+        return read_feather(stem + '.feather')
+    if os.path.exists(stem + '.pkl'):
+        return pd.read_pickle(stem + '.pkl')
+
+    df = pd.read_excel(path, sheet_name=sheet_name)
+
+    # 删除该sheet的旧缓存，再写入新缓存
+    os.makedirs(cache_dir, exist_ok=True)
+    for old_file in glob.glob(os.path.join(cache_dir, cache_prefix(path, sheet_name) + '_*')):
+        os.remove(old_file)
+    if not write_feather(df, stem + '.feather'):
+        df.to_pickle(stem + '.pkl')
+    return df
+
+
+def clear_cache(cache_dir=EXCEL_CACHE_DIR, path=None):
+    """
+    清除Excel缓存
+
+    Args:
+        cache_dir: 缓存目录
+        path: 只清除该Excel文件的缓存，为 None 时清除全部缓存
+
+    Returns:
+        int: 删除的缓存文件数量
+    """
+    if cache_dir is None or not os.path.isdir(cache_dir):
+        return 0
+    files = glob.glob(os.path.join(cache_dir, '*.feather')) + glob.glob(os.path.join(cache_dir, '*.pkl'))
+    if path is not None:
+        # 缓存文件名前缀由文件路径和sheet名确定，按该文件的所有sheet名（及默认的第0个sheet）匹配
+        prefixes = {cache_prefix(path, sheet_name) for sheet_name in pd.ExcelFile(path).sheet_names + [0]}
+        files = [file for file in files if os.path.basename(file).split('_')[0] in prefixes]
+    for file in files:
+        os.remove(file)
+    return len(files)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="管理Excel输入文件的二进制缓存")
+    parser.add_argument('--clear', action='store_true', help="清除缓存")
+    parser.add_argument('--file', default=None, help="只清除该Excel文件的缓存")
+    parser.add_argument('--cache-dir', default=EXCEL_CACHE_DIR, help="缓存目录")
+    args = parser.parse_args()
+
+    if args.clear:
+        count = clear_cache(args.cache_dir, args.file)
+        print(f"已删除 {count} 个缓存文件")
+    else:
+        parser.print_help()
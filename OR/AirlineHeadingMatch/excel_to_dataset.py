@@ -1,10 +1,36 @@
+import hashlib
+import os
+from collections import namedtuple
+
 import pandas as pd
 from config import TEMPLATE_FILE
 
-def read_excel_template():
-    # 读取Excel文件
-    file_path = TEMPLATE_FILE
-    # file_path = '输入模板.xlsx'
+# 输入模板中读取的各项数据，顺序与 read_excel_template 的返回值一致
+TEMPLATE_FIELDS = ['row_indices', 'data', 'DOM_AIRLINES', 'INT_AIRLINES', 'HEADINGS_ARR', 'HEADINGS_DEP',
+                   'AIRLINES_WIDE', 'ABSOLUTE_LONG_ROUTING', 'ARR_DOM_WIDE_EXCEPTION_ROUTING',
+                   'ARR_INT_WIDE_EXCEPTION_ROUTING', 'DEP_DOM_WIDE_EXCEPTION_ROUTING', 'DEP_INT_WIDE_EXCEPTION_ROUTING',
+                   'ARR_DOM_WIDE_UP_ROUTING', 'ARR_INT_WIDE_UP_ROUTING', 'DEP_DOM_WIDE_UP_ROUTING',
+                   'DEP_INT_WIDE_UP_ROUTING', 'MAIN_HEADING_EXCEPTION_AIRLINES', 'WAVE_EXCEPTION_AIRLINES']
+
+TemplateConfig = namedtuple('TemplateConfig', TEMPLATE_FIELDS)
+
+# 已加载的模板，键为 (文件绝对路径, 文件哈希)
+loaded_templates = {}
+
+# 已计算的文件哈希，键为文件绝对路径，值为 ((修改时间, 文件大小), 哈希)
+file_digests = {}
+
+
+def read_excel_template(file_path=TEMPLATE_FILE):
+    """
+    读取输入模板Excel文件
+
+    Args:
+        file_path: 输入模板文件路径
+
+    Returns:
+        按 TEMPLATE_FIELDS 顺序的各项数据，读取失败时返回 None
+    """
 
     def read_domestic_airlines(df):
         # 从第4行开始读取数据
@@ -362,10 +388,72 @@ def read_excel_template():
                 wave_exception_airlines)
     except Exception as e:
         print(f"读取Excel文件时发生错误: {str(e)}")
-        return None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None
+        return None
+
+
+def file_hash(file_path):
+    """计算文件内容的SHA1哈希"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_digest(file_path):
+    """返回文件内容的哈希，文件的修改时间和大小与上次相同时直接返回上次的结果，不再读取整个文件"""
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = file_digests.get(path)
+    if cached is None or cached[0] != signature:
+        cached = file_digests[path] = (signature, file_hash(path))
+    return cached[1]
+
+
+def load_template(file_path=TEMPLATE_FILE, use_sidecar=True):
+    """
+    加载输入模板，首次访问时才读取Excel文件
+
+    同一进程中按 (文件路径, 文件哈希) 缓存，不同模板文件可以同时加载，文件的修改时间和大小未变化时不重新计算哈希；
+    读取结果同时保存到模板文件旁的 `<模板文件>.cache.pkl`，模板内容不变时下次运行直接读取该文件。
+
+    Args:
+        file_path: 输入模板文件路径
+        use_sidecar: 是否使用模板文件旁的pickle缓存
+
+    Returns:
+        TemplateConfig: 按字段名访问的模板数据，如 template.DOM_AIRLINES
+    """
+    digest = file_digest(file_path)
+    key = (os.path.abspath(file_path), digest)
+    if key in loaded_templates:
+        return loaded_templates[key]
+
+    sidecar = f"{file_path}.cache.pkl"
+    template = None
+    if use_sidecar and os.path.exists(sidecar):
+        try:
+            cached = pd.read_pickle(sidecar)
+            if cached.get('hash') == digest:
+                template = TemplateConfig(*cached['template'])
+        except Exception as e:
+            print(f"读取模板缓存 {sidecar} 失败: {e}")
+
+    if template is None:
+        result = read_excel_template(file_path)
+        if result is None:
+            raise ValueError(f"读取输入模板 {file_path} 失败")
+        template = TemplateConfig(*result)
+        if use_sidecar:
+            pd.to_pickle({'hash': digest, 'template': tuple(template)}, sidecar)
+
+    loaded_templates[key] = template
+    return template
 
 
-(row_indices, data, DOM_AIRLINES, INT_AIRLINES, HEADINGS_ARR, HEADINGS_DEP, AIRLINES_WIDE, ABSOLUTE_LONG_ROUTING,
- ARR_DOM_WIDE_EXCEPTION_ROUTING, ARR_INT_WIDE_EXCEPTION_ROUTING, DEP_DOM_WIDE_EXCEPTION_ROUTING,
- DEP_INT_WIDE_EXCEPTION_ROUTING, ARR_DOM_WIDE_UP_ROUTING, ARR_INT_WIDE_UP_ROUTING, DEP_DOM_WIDE_UP_ROUTING,
- DEP_INT_WIDE_UP_ROUTING, MAIN_HEADING_EXCEPTION_AIRLINES, WAVE_EXCEPTION_AIRLINES) = read_excel_template()
+def __getattr__(name):
+    """兼容按模块属性访问模板数据的旧代码（如 excel_to_dataset.DOM_AIRLINES），访问时才加载默认模板"""
+    if name in TEMPLATE_FIELDS:
+        return getattr(load_template(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,9 @@
 import pandas as pd
 
-from excel_to_dataset import HEADINGS_DEP,HEADINGS_ARR
+from excel_to_dataset import load_template
 
 from config import CURRENT_STATUS_FILE, PAIRING_FILE, ARR_HOURLY_STATS_FILE, DEP_HOURLY_STATS_FILE
+from excel_cache import read_excel_cached
 
 
 def diagnose_infeasibility(model):
@@ -35,22 +36,22 @@ def diagnose_infeasibility(model):
 
 
 def load_data():
-    """加载所有需要的数据"""
+    """加载所有需要的数据，各sheet首次读取后缓存为二进制文件，见 excel_cache.py"""
     # 加载现状数据
-    current_status = pd.read_excel(CURRENT_STATUS_FILE)
+    current_status = read_excel_cached(CURRENT_STATUS_FILE)
     current_status = current_status[(current_status['Date'] == 2) & (current_status['flight type'] == 'PAX')]
 
     # 加载配对数据
-    arrival_flights = pd.read_excel(PAIRING_FILE, sheet_name="到达航班")
-    departure_flights = pd.read_excel(PAIRING_FILE, sheet_name="出发航班")
+    arrival_flights = read_excel_cached(PAIRING_FILE, sheet_name="到达航班")
+    departure_flights = read_excel_cached(PAIRING_FILE, sheet_name="出发航班")
 
     # 加载机场到达航班统计表
-    hourly_dom_stats = pd.read_excel(ARR_HOURLY_STATS_FILE, sheet_name="国内航班")
-    hourly_int_stats = pd.read_excel(ARR_HOURLY_STATS_FILE, sheet_name="国际航班")
+    hourly_dom_stats = read_excel_cached(ARR_HOURLY_STATS_FILE, sheet_name="国内航班")
+    hourly_int_stats = read_excel_cached(ARR_HOURLY_STATS_FILE, sheet_name="国际航班")
 
     # 加载出发航班统计表
-    hourly_dom_dep_stats = pd.read_excel(DEP_HOURLY_STATS_FILE, sheet_name="国内航班")
-    hourly_int_dep_stats = pd.read_excel(DEP_HOURLY_STATS_FILE, sheet_name="国际航班")
+    hourly_dom_dep_stats = read_excel_cached(DEP_HOURLY_STATS_FILE, sheet_name="国内航班")
+    hourly_int_dep_stats = read_excel_cached(DEP_HOURLY_STATS_FILE, sheet_name="国际航班")
 
     return current_status, arrival_flights, departure_flights, hourly_dom_stats, hourly_int_stats, hourly_dom_dep_stats, hourly_int_dep_stats
 
@@ -145,18 +146,20 @@ def get_main_headings(current_status):
     return main_headings
 
 
-def complete_day3_assignments(day2_arr_assignments, departure_flights):
+def complete_day3_assignments(day2_arr_assignments, departure_flights, template=None):
     """
     用日期为2的进港航班信息，补齐日期为3的离港航班信息
 
     Args:
         day2_arr_assignments: 日期为2的进港航班分配结果
         departure_flights: 所有离港航班
+        template: 输入模板配置，见 load_template，为 None 时读取默认模板
 
     Returns:
         补齐后的日期为3的离港航班分配结果
     """
     print("开始补齐日期为3的离港航班分配...")
+    template = template if template is not None else load_template()
 
     # 筛选出日期为3的离港航班
     day3_departures = departure_flights[departure_flights['日期'] == 3].copy()
@@ -177,9 +180,9 @@ def complete_day3_assignments(day2_arr_assignments, departure_flights):
         # 为航向随机分配一个与市场类型匹配的值
         market_type = flight['市场']
         if market_type == 'DOM':
-            headings = list(HEADINGS_DEP.keys())
+            headings = list(template.HEADINGS_DEP.keys())
         else:
-            headings = list(HEADINGS_DEP.keys())
+            headings = list(template.HEADINGS_DEP.keys())
 
         # 简单地随机分配一个航向
         import random
@@ -188,7 +191,7 @@ def complete_day3_assignments(day2_arr_assignments, departure_flights):
     return day3_departures
 
 
-def complete_day1_assignments(day3_dep_assignments, arrival_flights, departure_flights):
+def complete_day1_assignments(day3_dep_assignments, arrival_flights, departure_flights, template=None):
     """
     用（DAY2进港-DAY3离港）航班信息，补齐（DAY1进港-DAY2离港航班信息）
 
@@ -196,11 +199,13 @@ def complete_day1_assignments(day3_dep_assignments, arrival_flights, departure_f
         day3_dep_assignments: 日期为3的离港航班分配结果
         arrival_flights: 所有进港航班
         departure_flights: 所有离港航班
+        template: 输入模板配置，见 load_template，为 None 时读取默认模板
 
     Returns:
         补齐后的日期为1的进港航班分配结果
     """
     print("开始补齐日期为1的进港航班分配...")
+    template = template if template is not None else load_template()
 
     # 筛选出日期为1的进港航班
     day1_arrivals = arrival_flights[arrival_flights['日期'] == 1].copy()
@@ -227,9 +232,9 @@ def complete_day1_assignments(day3_dep_assignments, arrival_flights, departure_f
             # 为航向随机分配一个与市场类型匹配的值
             market_type = flight['市场']
             if market_type == 'DOM':
-                headings = list(HEADINGS_ARR.keys())
+                headings = list(template.HEADINGS_ARR.keys())
             else:
-                headings = list(HEADINGS_ARR.keys())
+                headings = list(template.HEADINGS_ARR.keys())
 
             # 简单地随机分配一个航向
             import random
@@ -0,0 +1,92 @@
+import os
+
+import gurobipy as gp
+import numpy as np
+import pandas as pd
+from gurobipy import GRB
+
+# 保存的分配结果列，按航班ID记录航司和航向
+SOLUTION_COLUMNS = ['ID', '航司', '航向']
+
+
+def solution_path(directory, name):
+    """返回某个模型分配结果的文件路径"""
+    return os.path.join(directory, f"{name}.pkl")
+
+
+def load_solution(directory, name):
+    """
+    读取某个模型之前保存的分配结果
+
+    Args:
+        directory: 结果文件目录
+        name: 模型名称，如 'arrival_DOM'
+
+    Returns:
+        DataFrame: 列为 SOLUTION_COLUMNS 的分配结果，文件不存在或无法读取时返回 None
+    """
+    path = solution_path(directory, name)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception as e:
+        print(f"读取初始解文件 {path} 失败: {e}")
+        return None
+
+
+def save_solution(directory, name, result_df):
+    """
+    保存某个模型的分配结果，供下次运行作为初始解
+
+    每个模型单独保存为一个文件，并行求解的各模型互不影响。
+
+    Args:
+        directory: 结果文件目录
+        name: 模型名称，如 'arrival_DOM'
+        result_df: 带有航司和航向分配的航班数据
+    """
+    os.makedirs(directory, exist_ok=True)
+    solution = result_df[SOLUTION_COLUMNS]
+    solution = solution[(solution['航司'] != "") | (solution['航向'] != "")].reset_index(drop=True)
+    solution.to_pickle(solution_path(directory, name))
+
+
+def start_values(candidates, previous, columns):
+    """
+    根据之前的分配结果计算候选变量的初始值
+
+    Args:
+        candidates: 候选变量表，每行对应一个决策变量
+        previous: 之前的分配结果，见 save_solution
+        columns: 用于匹配的列，如 ['ID', '航司', '航向']
+
+    Returns:
+        np.ndarray: 与候选变量表逐行对应的初始值，匹配之前结果的为1，之前结果中有该航班但不匹配的为0，
+        之前结果中没有该航班的为 GRB.UNDEFINED
+    """
+    values = np.full(len(candidates), GRB.UNDEFINED)
+    if candidates.empty or previous is None or previous.empty:
+        return values
+
+    known = candidates['ID'].isin(previous['ID']).to_numpy()
+    chosen = pd.MultiIndex.from_frame(candidates[columns]).isin(
+        pd.MultiIndex.from_frame(previous[columns].drop_duplicates()))
+    values[known] = 0
+    values[chosen] = 1
+    return values
+
+
+def set_start(model, variables, values):
+    """
+    设置决策变量的MIP初始值
+
+    Args:
+        model: Gurobi模型
+        variables: 决策变量列表或MVar
+        values: 与决策变量逐个对应的初始值
+    """
+    if isinstance(variables, gp.MVar):
+        variables.Start = values
+    elif len(variables) > 0:
+        model.setAttr('Start', variables, values.tolist())
@@ -1,11 +1,17 @@
-from collections import defaultdict
-
 import numpy as np
 import pandas as pd
-from gurobipy import Model, GRB, quicksum
+from gurobipy import Model, GRB, LinExpr, quicksum
+
+from pairing_candidates import AIRCRAFT_TYPES
+from pairing_model import group_rows
+from pre_task2 import find_peak_windows
+from utils import load_schedule_parameters
+from utils2 import build_peak_configs
 
-from utils import quotas, min_times
-from utils2 import peak_configs
+# 是否先用贪心算法配对，结果满足机型配额和高峰约束时不再求解MIP，见 greedy_overnight_pairs
+GREEDY = True
+# 每个跨夜配对的收益为 PAIR_WEIGHT - 过站时间；过站时间最长可达 2*1440 分钟，收益不为正的配对不会被选中
+PAIR_WEIGHT = 2000
 
 
 # 预处理函数：将时间字符串转换为分钟数
@@ -14,148 +20,310 @@ def time_to_minutes(t_str):
     return h * 60 + m  # 机型和市场配额约束（日期均为2）
 
 
-# 读取Excel文件中的到达和出发航班数据
-arr_df = pd.read_excel('output_flight_pairing.xlsx', sheet_name='到达航班')
-dep_df = pd.read_excel('output_flight_pairing.xlsx', sheet_name='出发航班')
-
-# 筛选待配对的到达航班（ID为空且日期为2）
-unpaired_arr = arr_df[(arr_df['ID'].isna()) & (arr_df['日期'] == 2)]
-
-# 生成日期3的离港航班（复制日期2的离港航班）
-date3_dep_df = dep_df[dep_df['日期'] == 2].copy()
-date3_dep_df['日期'] = 3
-date3_dep_df['ID'] = np.nan
-date3_dep_df['机型'] = np.nan
-
-# 合并离港航班数据
-combined_dep_df = pd.concat([dep_df, date3_dep_df], ignore_index=True)
-
-
 # 解析航班数据
 def parse_flights(df, direction):
     return [
         {
             'index': idx,
-            'time': time_to_minutes(row['时间']),
-            'market': row['市场'],
-            'date': row['日期'],
+            'time': time_to_minutes(time),
+            'market': market,
+            'date': date,
             'direction': direction
         }
-        for idx, row in df.iterrows()
+        for idx, time, market, date in zip(df.index, df['时间'].tolist(), df['市场'].tolist(), df['日期'].tolist())
     ]
 
 
-arr_flights = parse_flights(unpaired_arr, 'ARR')
-dep_flights = parse_flights(combined_dep_df, 'DEP')
-
-# 初始化模型
-model = Model('Extended_Flight_Pairing')
-
-# 生成变量：允许日期2到达与日期3出发配对
-variables = {}
-delta_dict = {}  # 新增：存储每个变量的过站时间
-M = 2000  # 足够大的常数，需大于最大可能delta（24*60=1440）
-
-for i, arr in enumerate(arr_flights):
-    for j, dep in enumerate(dep_flights):
-        if arr['date'] == 2 and dep['date'] == 3:
-            delta = (24 * 60 - arr['time']) + dep['time']
-
-            arr_market = arr['market']
-            dep_market = dep['market']
-            if arr_market == dep_market:
-                for k in ['C', 'E', 'F']:
-                    arr_quota = quotas.get((arr_market, k), {'ARR': 0})['ARR']
-                    min_time = min_times.get((arr_market, k), 0)
-
-                    if delta >= min_time and arr_quota > 0:
-                        var = model.addVar(vtype=GRB.BINARY, name=f'x_{i}_{j}_{k}')
-                        variables[(i, j, k)] = var
-                        delta_dict[(i, j, k)] = delta  # 记录过站时间
-
-# 目标函数：最大化 (M - delta) 的总和
-valid_pairs = [(key, var) for key, var in variables.items() if key in delta_dict]
-model.setObjective(
-    quicksum((M - delta_dict[key]) * var for key, var in valid_pairs),
-    GRB.MAXIMIZE
-)
-# 约束1：每个到达航班最多配对一次
-arr_used = defaultdict(list)
-for (i, j, k), var in variables.items():
-    arr_used[i].append(var)
-for i in arr_used:
-    model.addConstr(quicksum(arr_used[i]) <= 1, name=f'ext_arr_{i}')
-
-# 约束2：每个出发航班最多配对一次
-dep_used = defaultdict(list)
-for (i, j, k), var in variables.items():
-    dep_used[j].append(var)
-for j in dep_used:
-    model.addConstr(quicksum(dep_used[j]) <= 1, name=f'ext_dep_{j}')
-
-# 约束3：日期2的机型配额限制（仅约束到达航班）
-for (market, k), quota in quotas.items():
-    arr_total = [
-        var for (i, j, key_k), var in variables.items()
-        if key_k == k and arr_flights[i]['market'] == market
-    ]
-    tmp_arr = arr_df[(arr_df['市场'] == market) & (arr_df['机型'] == k) & (arr_df['日期'] == 2)]
-    if arr_total:
-        model.addConstr(quicksum(arr_total) + len(tmp_arr) <= quota['ARR'], f'ext_arr_quota_{market}_{k}')
-
-# 约束4：日期2的高峰小时约束
-for config in peak_configs:
-    # 时间转换
-    start_h, start_m = map(int, config['start_time'].split(':'))
-    end_h, end_m = map(int, config['end_time'].split(':'))
-    start_min = start_h * 60 + start_m
-    end_min = end_h * 60 + end_m
-    target_arr = arr_df[(arr_df['ID'].notna()) & (arr_df['日期'] == 2)]
-    target_arr['分钟'] = target_arr['时间'].apply(time_to_minutes)
-    target_arr = target_arr[(target_arr['分钟'] >= start_min) & (target_arr['分钟'] <= end_min)]
-    target_arr = target_arr[target_arr['市场'] == config['market']]
-    # 筛选到达航班
-    selected = [
-        i for i, arr in enumerate(arr_flights)
-        if arr['market'] == config['market']
-           and start_min <= arr['time'] <= end_min
-    ]
+def overnight_limits(arr_df, arr_flights, params, peak_configs):
+    """
+    整理跨夜配对的机型配额和高峰小时约束
+
+    Args:
+        arr_df: 到达航班表，已配对航班的机型计入已用配额
+        arr_flights: 待配对的到达航班，见 parse_flights
+        params: 时刻表输入参数
+        peak_configs: 高峰小时机型比例约束配置
+
+    Returns:
+        list: [(约束名称, 机型, 受约束的到达航班序号集合, 跨夜配对数上限)]
+    """
+    limits = []
+
+    # 约束3：日期2的机型配额限制（仅约束到达航班）
+    for (market, k), quota in params.quotas.items():
+        selected = {i for i, arr in enumerate(arr_flights) if arr['market'] == market}
+        tmp_arr = arr_df[(arr_df['市场'] == market) & (arr_df['机型'] == k) & (arr_df['日期'] == 2)]
+        limits.append((f'ext_arr_quota_{market}_{k}', k, selected, quota['ARR'] - len(tmp_arr)))
+
+    # 约束4：日期2的高峰小时约束
+    for config in peak_configs:
+        # 时间转换
+        start_h, start_m = map(int, config['start_time'].split(':'))
+        end_h, end_m = map(int, config['end_time'].split(':'))
+        start_min = start_h * 60 + start_m
+        end_min = end_h * 60 + end_m
+        target_arr = arr_df[(arr_df['ID'].notna()) & (arr_df['日期'] == 2)]
+        target_minutes = target_arr['时间'].apply(time_to_minutes)
+        target_arr = target_arr[(target_minutes >= start_min) & (target_minutes <= end_min)]
+        target_arr = target_arr[target_arr['市场'] == config['market']]
+        # 筛选到达航班
+        selected = {
+            i for i, arr in enumerate(arr_flights)
+            if arr['market'] == config['market']
+               and start_min <= arr['time'] <= end_min
+        }
 
-    # 收集变量
-    k_vars = defaultdict(list)
-    for (i, j, k), var in variables.items():
-        if i in selected:
-            k_vars[k].append(var)
-
-    # 添加约束
-    ratios = config['ratios']
-    total = config['total']
-    for k in ['C', 'E', 'F']:
-        if k in ratios and k_vars.get(k):
-            required = round(total * ratios[k]) - len(target_arr[target_arr['机型'] == k])
-            model.addConstr(quicksum(k_vars[k]) <= required + 1, f"ext_peak_{config['name']}_{k}")
-
-# 求解模型
-model.optimize()
-
-# 检查模型是否无解，如果无解则进行IIS分析
-if model.status == 3:
-    print("模型无解，正在分析导致无解的约束条件...")
-    # 计算IIS（Irreducible Inconsistent Subsystem）
-    model.computeIIS()
-    print("\n以下约束条件导致模型无解:")
-    for c in model.getConstrs():
-        if c.IISConstr:
-            print(f"约束名称: {c.ConstrName}")
-            print(f"约束表达式: {c.Sense} {c.RHS}")
-            print("-" * 50)
-
-
-# 处理配对结果
-pair_id = max(arr_df['ID'].max(), dep_df['ID'].max()) + 1
-pair_num = 0
-for (i, j, k), var in variables.items():
-    if var.X > 0.5:
+        ratios = config['ratios']
+        total = config['total']
+        for k in AIRCRAFT_TYPES:
+            if k in ratios:
+                required = round(total * ratios[k]) - len(target_arr[target_arr['机型'] == k])
+                limits.append((f"ext_peak_{config['name']}_{k}", k, selected, required + 1))
+    return limits
+
+
+def greedy_overnight_pairs(arr_flights, dep_flights, params, limits):
+    """
+    用贪心算法为日期2到达与日期3出发的航班配对，不求解MIP
+
+    同一市场内，到达航班（到达时间 a）与日期3出发航班（出发时间 d）的配对收益为 PAIR_WEIGHT - (1440 - a + d)，
+    可配对的条件为 d 不早于 a - 1440 + 最小过站时间。到达越晚的航班收益越高、可配对的出发航班越少
+    （可配对集合按到达时间嵌套），因此按到达时间从晚到早处理：不早于下界的出发航班从晚到早依次入栈，
+    栈顶即最早的可用出发航班，收益为正时与之配对。不考虑机型配额和高峰约束时，结果即为MIP的最优解。
+    机型按配对的到达航班顺序逐个选取，取剩余额度（机型配额和高峰约束中的最小值）最大的机型。
+
+    Args:
+        arr_flights: 待配对的到达航班，见 parse_flights
+        dep_flights: 出发航班（含日期3），见 parse_flights
+        params: 时刻表输入参数
+        limits: 机型配额和高峰小时约束，见 overnight_limits
+
+    Returns:
+        list: 按到达航班序号排序的 [(到达航班序号, 出发航班序号, 机型)]；违反约束时返回 None
+    """
+    pairs = []
+    for market in sorted({arr['market'] for arr in arr_flights}):
+        # 与 overnight_candidates 相同，跳过没有到达配额或最小过站时间为空的机型
+        min_times = [params.min_times.get((market, k), 0) for k in AIRCRAFT_TYPES
+                     if params.quotas.get((market, k), {'ARR': 0})['ARR'] > 0]
+        min_times = [min_time for min_time in min_times if not pd.isna(min_time)]
+        if not min_times:
+            continue
+        min_time = min(min_times)
+
+        arr_ids = np.array([i for i, arr in enumerate(arr_flights) if arr['market'] == market])
+        dep_ids = np.array([j for j, dep in enumerate(dep_flights) if dep['market'] == market and dep['date'] == 3],
+                           dtype=int)
+        arr_minutes = np.array([arr_flights[i]['time'] for i in arr_ids], dtype=int)
+        dep_minutes = np.array([dep_flights[j]['time'] for j in dep_ids], dtype=int)
+        order = np.argsort(-arr_minutes, kind='stable')
+        arr_ids, arr_minutes = arr_ids[order], arr_minutes[order]
+        order = np.argsort(dep_minutes, kind='stable')
+        dep_ids, dep_minutes = dep_ids[order], dep_minutes[order]
+
+        # 下界随到达时间递减，出发航班只需入栈一次；栈中的位置从栈底到栈顶出发时间递减
+        p = len(dep_minutes) - 1
+        stack = []
+        matched_arr, matched_dep = [], []
+        for i, minute in zip(arr_ids.tolist(), arr_minutes.tolist()):
+            while p >= 0 and dep_minutes[p] >= minute - 24 * 60 + min_time:
+                stack.append(p)
+                p -= 1
+            if stack and dep_minutes[stack[-1]] < minute + PAIR_WEIGHT - 24 * 60:
+                matched_arr.append(i)
+                matched_dep.append(stack.pop())
+
+        # 目标值只与选中的航班有关，选中的到达和出发航班按时间顺序一一对应，同样满足最小过站时间且配对不交叉
+        pairs += zip(matched_arr[::-1], dep_ids[sorted(matched_dep)].tolist())
+
+    # 选取机型
+    used = [0] * len(limits)
+    result = []
+    for i, j in sorted(pairs):
+        arr, dep = arr_flights[i], dep_flights[j]
+        delta = (24 * 60 - arr['time']) + dep['time']
+        best_k, best_slack = None, None
+        for k in AIRCRAFT_TYPES:
+            min_time = params.min_times.get((arr['market'], k), 0)
+            if not params.quotas.get((arr['market'], k), {'ARR': 0})['ARR'] > 0 or pd.isna(min_time) \
+                    or delta < min_time:
+                continue
+            slack = min((rhs - used[n] for n, (_, key_k, selected, rhs) in enumerate(limits)
+                         if key_k == k and i in selected), default=float('inf'))
+            if best_slack is None or slack > best_slack:
+                best_k, best_slack = k, slack
+        for n, (_, key_k, selected, _) in enumerate(limits):
+            if key_k == best_k and i in selected:
+                used[n] += 1
+        result.append((i, j, best_k))
+
+    violated = [name for n, (name, _, _, rhs) in enumerate(limits) if used[n] > 0 and used[n] > rhs]
+    if violated:
+        print(f"贪心配对违反约束 {', '.join(violated)}，改为求解MIP")
+        return None
+    return result
+
+
+def overnight_candidates(arr_flights, dep_flights, params):
+    """
+    生成日期2到达与日期3出发的候选配对
+
+    同市场、到达配额为正且过站时间不小于最小过站时间的 (到达, 出发, 机型) 组合。每个市场和机型内出发航班按时间排序，
+    每个到达航班用二分查找确定可配对的出发航班区间，候选配对以并行的NumPy数组表示，每个只占十几个字节。
+
+    Args:
+        arr_flights: 待配对的到达航班，见 parse_flights
+        dep_flights: 出发航班（含日期3），见 parse_flights
+        params: 时刻表输入参数
+
+    Returns:
+        (到达航班序号, 出发航班序号, 机型在 AIRCRAFT_TYPES 中的序号, 过站时间)，四个等长数组，按 (到达, 出发, 机型) 排序
+    """
+    arr_minutes = np.array([arr['time'] for arr in arr_flights], dtype=int)
+    dep_minutes = np.array([dep['time'] for dep in dep_flights], dtype=int)
+    arr_markets = np.array([arr['market'] for arr in arr_flights], dtype=object)
+    dep_markets = np.array([dep['market'] for dep in dep_flights], dtype=object)
+    arr_dates = np.array([arr['date'] for arr in arr_flights])
+    dep_dates = np.array([dep['date'] for dep in dep_flights])
+
+    arr_idx = [np.array([], dtype=np.int32)]
+    dep_idx = [np.array([], dtype=np.int32)]
+    types = [np.array([], dtype=np.int8)]
+    for market in sorted(set(arr_markets[arr_dates == 2])):
+        arr_ids = np.nonzero((arr_markets == market) & (arr_dates == 2))[0]
+        dep_ids = np.nonzero((dep_markets == market) & (dep_dates == 3))[0]
+        dep_ids = dep_ids[np.argsort(dep_minutes[dep_ids], kind='stable')]
+        for t, k in enumerate(AIRCRAFT_TYPES):
+            arr_quota = params.quotas.get((market, k), {'ARR': 0})['ARR']
+            min_time = params.min_times.get((market, k), 0)
+            if not arr_quota > 0 or pd.isna(min_time):
+                continue
+
+            # 过站时间 1440 - a + d >= min_time，即 d >= a - 1440 + min_time，可配对的出发航班为排序后的一个后缀
+            starts = np.searchsorted(dep_minutes[dep_ids], arr_minutes[arr_ids] - 24 * 60 + min_time, side='left')
+            counts = len(dep_ids) - starts
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            arr_idx.append(np.repeat(arr_ids, counts).astype(np.int32))
+            dep_idx.append(dep_ids[np.repeat(starts, counts) + offsets].astype(np.int32))
+            types.append(np.full(counts.sum(), t, dtype=np.int8))
+
+    arr_idx, dep_idx, types = np.concatenate(arr_idx), np.concatenate(dep_idx), np.concatenate(types)
+    order = np.lexsort((types, dep_idx, arr_idx))
+    arr_idx, dep_idx, types = arr_idx[order], dep_idx[order], types[order]
+    delta = (24 * 60 - arr_minutes[arr_idx] + dep_minutes[dep_idx]).astype(np.int16)
+    return arr_idx, dep_idx, types, delta
+
+
+def solve_overnight_pairs(arr_flights, dep_flights, params, limits):
+    """
+    用MIP为日期2到达与日期3出发的航班配对，目标为最大化 sum(M - 过站时间)
+
+    变量、目标系数和各约束包含的变量均由 overnight_candidates 的数组批量生成。
+
+    Args:
+        arr_flights: 待配对的到达航班，见 parse_flights
+        dep_flights: 出发航班（含日期3），见 parse_flights
+        params: 时刻表输入参数
+        limits: 机型配额和高峰小时约束，见 overnight_limits
+
+    Returns:
+        list: [(到达航班序号, 出发航班序号, 机型)]
+    """
+    # 初始化模型
+    model = Model('Extended_Flight_Pairing')
+
+    # 生成变量：x[n]表示第n个候选配对，允许日期2到达与日期3出发配对
+    arr_idx, dep_idx, types, delta = overnight_candidates(arr_flights, dep_flights, params)
+    names = [f'x_{i}_{j}_{AIRCRAFT_TYPES[t]}' for i, j, t in zip(arr_idx.tolist(), dep_idx.tolist(), types.tolist())]
+    x = list(model.addVars(len(arr_idx), vtype=GRB.BINARY, name=names).values())
+    M = PAIR_WEIGHT
+
+    def total(rows):
+        return quicksum(x[n] for n in rows)
+
+    # 目标函数：最大化 (M - delta) 的总和
+    model.setObjective(LinExpr((M - delta.astype(float)).tolist(), x), GRB.MAXIMIZE)
+
+    # 约束1：每个到达航班最多配对一次
+    everything = np.ones(len(arr_idx), dtype=bool)
+    for i, rows in group_rows(everything, arr_idx).items():
+        model.addConstr(total(rows) <= 1, name=f'ext_arr_{i}')
+
+    # 约束2：每个出发航班最多配对一次
+    for j, rows in group_rows(everything, dep_idx).items():
+        model.addConstr(total(rows) <= 1, name=f'ext_dep_{j}')
+
+    # 约束3、4：机型配额和高峰小时约束
+    for name, k, selected, rhs in limits:
+        in_limit = np.zeros(len(arr_flights), dtype=bool)
+        in_limit[list(selected)] = True
+        rows = np.nonzero((types == AIRCRAFT_TYPES.index(k)) & in_limit[arr_idx])[0]
+        if len(rows):
+            model.addConstr(total(rows) <= rhs, name)
+
+    # 求解模型
+    model.optimize()
+
+    # 检查模型是否无解，如果无解则进行IIS分析
+    if model.status == 3:
+        print("模型无解，正在分析导致无解的约束条件...")
+        # 计算IIS（Irreducible Inconsistent Subsystem）
+        model.computeIIS()
+        print("\n以下约束条件导致模型无解:")
+        for c in model.getConstrs():
+            if c.IISConstr:
+                print(f"约束名称: {c.ConstrName}")
+                print(f"约束表达式: {c.Sense} {c.RHS}")
+                print("-" * 50)
+
+    chosen = np.array(model.getAttr('X', x)) > 0.5
+    return [(i, j, AIRCRAFT_TYPES[t]) for i, j, t in zip(arr_idx[chosen].tolist(), dep_idx[chosen].tolist(),
+                                                         types[chosen].tolist())]
+
+
+def extend_pairing(arr_df, dep_df, params, peak_configs, greedy=GREEDY):
+    """
+    为日期2未配对的到达航班与日期3的出发航班配对
+
+    日期3的出发航班由日期2的出发航班复制生成，只保留配对成功的航班。
+
+    Args:
+        arr_df: 到达航班表，见 task2.pair_flights
+        dep_df: 出发航班表
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+        peak_configs: 高峰小时机型比例约束配置，见 utils2.build_peak_configs
+        greedy: 是否先用贪心算法配对，违反机型配额或高峰约束时再求解MIP
+
+    Returns:
+        (到达航班表, 出发航班表)，出发航班表包含配对成功的日期3航班
+    """
+    arr_df = arr_df.astype({'ID': object, '机型': object})
+    dep_df = dep_df.astype({'ID': object, '机型': object})
+
+    # 筛选待配对的到达航班（ID为空且日期为2）
+    unpaired_arr = arr_df[(arr_df['ID'].isna()) & (arr_df['日期'] == 2)]
+
+    # 生成日期3的离港航班（复制日期2的离港航班）
+    date3_dep_df = dep_df[dep_df['日期'] == 2].copy()
+    date3_dep_df['日期'] = 3
+    date3_dep_df['ID'] = np.nan
+    date3_dep_df['机型'] = np.nan
+
+    # 合并离港航班数据
+    combined_dep_df = pd.concat([dep_df, date3_dep_df], ignore_index=True)
+
+    arr_flights = parse_flights(unpaired_arr, 'ARR')
+    dep_flights = parse_flights(combined_dep_df, 'DEP')
+    limits = overnight_limits(arr_df, arr_flights, params, peak_configs)
+
+    pairs = greedy_overnight_pairs(arr_flights, dep_flights, params, limits) if greedy else None
+    if pairs is None:
+        pairs = solve_overnight_pairs(arr_flights, dep_flights, params, limits)
+
+    # 处理配对结果
+    pair_id = max(arr_df['ID'].max(), dep_df['ID'].max()) + 1
+    pair_num = 0
+    for i, j, k in pairs:
         # 更新到达航班
         arr_idx = arr_flights[i]['index']
         arr_df.at[arr_idx, 'ID'] = pair_id
@@ -169,17 +337,30 @@ for (i, j, k), var in variables.items():
         pair_id += 1
         pair_num += 1
 
-filtered_dep_df = combined_dep_df[
-    (combined_dep_df['日期'] != 3) |  # 保留所有日期非3的航班
-    (combined_dep_df['ID'].notna())  # 保留日期3且已配对的航班
-    ]
+    filtered_dep_df = combined_dep_df[
+        (combined_dep_df['日期'] != 3) |  # 保留所有日期非3的航班
+        (combined_dep_df['ID'].notna())  # 保留日期3且已配对的航班
+        ]
+
+    print("需配对航班量: ", len(unpaired_arr))
+    print("配对成功航班量: ", pair_num)
+    if len(unpaired_arr) > pair_num:
+        print(f"有 {len(unpaired_arr) - pair_num} 个航班未完成配对，请检查！！！")
+
+    return arr_df, filtered_dep_df
+
+
+if __name__ == "__main__":
+    params = load_schedule_parameters()
+
+    # 读取Excel文件中的到达和出发航班数据
+    arr_df = pd.read_excel('output_flight_pairing.xlsx', sheet_name='到达航班')
+    dep_df = pd.read_excel('output_flight_pairing.xlsx', sheet_name='出发航班')
+    peak_configs = build_peak_configs(find_peak_windows(arr_df, dep_df), params)
 
-# 保存结果
-with pd.ExcelWriter('final_pairing.xlsx') as writer:
-    arr_df.to_excel(writer, sheet_name='到达航班', index=False)
-    filtered_dep_df.to_excel(writer, sheet_name='出发航班', index=False)
+    arr_df, filtered_dep_df = extend_pairing(arr_df, dep_df, params, peak_configs)
 
-print("需配对航班量: ", len(unpaired_arr))
-print("配对成功航班量: ", pair_num)
-if len(unpaired_arr) > pair_num:
-    print(f"有 {len(unpaired_arr) - pair_num} 个航班未完成配对，请检查！！！")
+    # 保存结果
+    with pd.ExcelWriter('final_pairing.xlsx') as writer:
+        arr_df.to_excel(writer, sheet_name='到达航班', index=False)
+        filtered_dep_df.to_excel(writer, sheet_name='出发航班', index=False)
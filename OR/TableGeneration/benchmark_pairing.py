@@ -0,0 +1,67 @@
+import argparse
+import time
+
+import pandas as pd
+
+from after_task2 import extend_pairing
+from fused_pairing import pair_flights_multiday
+from pre_task2 import find_peak_windows
+from task2 import pair_flights
+from utils import INPUT_FILE, load_schedule_parameters
+from utils2 import build_peak_configs
+
+
+def pairing_summary(arr_df, dep_df):
+    """统计配对结果：总配对数、跨夜配对数和日期2未配对的到达航班数"""
+    return {
+        '配对数': int(arr_df['ID'].notna().sum()),
+        '跨夜配对数': int((dep_df['日期'] == 3).sum()),
+        '未配对到达航班数': int((arr_df['ID'].isna() & (arr_df['日期'] == 2)).sum()),
+    }
+
+
+def benchmark_pairing(arr_df, dep_df, params, max_turnaround=None, max_candidates=None):
+    """
+    比较两步配对（task2 + after_task2）与合并模型（fused_pairing）的用时和未配对航班数
+
+    两种方式的约束相同（包括跨夜配对的高峰比例），区别只在于当日配对和跨夜配对是否一起优化。
+
+    Args:
+        arr_df: 到达航班表，见 pre_task2.prepare_flights
+        dep_df: 出发航班表
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+        max_turnaround, max_candidates: 候选配对剪枝参数，见 task2.pair_flights，两种方式相同
+
+    Returns:
+        DataFrame: 每种方式一行，包含用时、配对数、跨夜配对数和未配对到达航班数
+    """
+    peak_configs = build_peak_configs(find_peak_windows(arr_df, dep_df), params)
+    rows = []
+
+    start = time.perf_counter()
+    paired_arr, paired_dep = pair_flights(arr_df, dep_df, params, peak_configs, max_turnaround=max_turnaround,
+                                          max_candidates=max_candidates)
+    result = extend_pairing(paired_arr, paired_dep, params, peak_configs)
+    rows.append({'方式': '两步（task2 + after_task2）', '用时': round(time.perf_counter() - start, 2),
+                 **pairing_summary(*result)})
+
+    start = time.perf_counter()
+    result = pair_flights_multiday(arr_df, dep_df, params, peak_configs, max_turnaround=max_turnaround,
+                                   max_candidates=max_candidates)
+    rows.append({'方式': '合并模型', '用时': round(time.perf_counter() - start, 2), **pairing_summary(*result)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="比较两步配对与合并模型的用时和未配对航班数")
+    parser.add_argument('--input', default=INPUT_FILE, help="时刻表输入文件")
+    parser.add_argument('--flights', default='pre_task2.xlsx', help="pre_task2 输出的航班文件")
+    parser.add_argument('--max-turnaround', type=int, default=None, help="最大过站时间（分钟）")
+    parser.add_argument('--max-candidates', type=int, default=None, help="每个到达航班最多保留的出发航班数")
+    args = parser.parse_args()
+
+    arr_df = pd.read_excel(args.flights, sheet_name='到达航班')
+    dep_df = pd.read_excel(args.flights, sheet_name='出发航班')
+    result = benchmark_pairing(arr_df, dep_df, load_schedule_parameters(args.input), args.max_turnaround,
+                               args.max_candidates)
+    print(result.to_string(index=False))
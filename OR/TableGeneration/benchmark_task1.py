@@ -0,0 +1,75 @@
+import argparse
+import time
+
+import gurobipy as gp
+import pandas as pd
+
+from capacity_check import check_parameters, check_dynamic_sheet
+from task1 import PEAK_MODES, OBJECTIVE, OBJECTIVES, build_model
+from task1_matrix import schedule_to_frame
+from utils import INPUT_FILE, load_schedule_parameters
+
+
+def benchmark_peak_modes(params, modes=PEAK_MODES, objectives=(OBJECTIVE,), time_limit=None, solve=True):
+    """
+    比较 task1 各种"至少一个窗口达到动态小时最大值"建模方式和平滑目标的模型规模和求解时间
+
+    Args:
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+        modes: 需要比较的建模方式，见 task1.PEAK_MODES
+        objectives: 需要比较的平滑目标，见 task1.OBJECTIVES
+        time_limit: 每种方式的求解时间上限（秒），为 None 时不限制
+        solve: 为 False 时只比较模型规模
+
+    Returns:
+        DataFrame: 每种组合一行，包含变量数、二元变量数、约束数、建模时间、求解时间、状态、目标值和违反规则数
+    """
+    rows = []
+    for mode, objective in [(mode, objective) for mode in modes for objective in objectives]:
+        start = time.perf_counter()
+        model, flows = build_model(params, mode, objective)
+        model.update()
+        row = {
+            '方式': mode,
+            '平滑目标': objective,
+            '变量数': model.NumVars,
+            '二元变量数': model.NumBinVars,
+            '约束数': model.NumConstrs,
+            '建模时间': round(time.perf_counter() - start, 2),
+        }
+
+        if not solve:
+            rows.append(row)
+            continue
+        if time_limit is not None:
+            model.Params.TimeLimit = time_limit
+        try:
+            model.optimize()
+        except gp.GurobiError as e:
+            print(f"{mode} 方式、{objective} 目标求解失败: {e}")
+            rows.append(row)
+            continue
+
+        row.update({'求解时间': round(model.Runtime, 2), '状态': model.status})
+        if model.SolCount > 0:
+            values = [[var[t].X for var in flows] for t in range(len(flows[0]))]
+            row['目标值'] = model.ObjVal
+            row['违反规则数'] = len(check_dynamic_sheet(schedule_to_frame(values), params))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="比较task1各种建模方式和平滑目标的模型规模和求解时间")
+    parser.add_argument('--input', default=INPUT_FILE, help="时刻表输入文件")
+    parser.add_argument('--modes', nargs='*', default=list(PEAK_MODES), help="需要比较的建模方式")
+    parser.add_argument('--objectives', nargs='*', default=[OBJECTIVE], help=f"需要比较的平滑目标，可选 {' '.join(OBJECTIVES)}")
+    parser.add_argument('--time-limit', type=float, default=None, help="每种方式的求解时间上限（秒）")
+    args = parser.parse_args()
+
+    params = load_schedule_parameters(args.input)
+    feasible = check_parameters(params).empty
+    if not feasible:
+        print("输入参数使模型无解，只比较模型规模")
+    result = benchmark_peak_modes(params, args.modes, args.objectives, args.time_limit, feasible)
+    print(result.to_string(index=False))
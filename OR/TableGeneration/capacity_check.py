@@ -0,0 +1,194 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from task1_matrix import FLOWS, WINDOW_CATEGORIES, LIMIT_CATEGORIES, model_inputs
+from utils import INPUT_FILE, load_schedule_parameters
+
+# 动态时刻表的时段长度（分钟）及小时、15分钟窗口包含的时段数
+SLOT_MINUTES = 5
+HOUR_SLOTS = 60 // SLOT_MINUTES
+SLOTS_15 = 15 // SLOT_MINUTES
+
+# 违反规则的记录的列
+VIOLATION_COLUMNS = ['规则', '类别', '时段', '值', '限制']
+
+
+def window_sums(values, width, step=1):
+    """
+    用前缀和计算滑动窗口总和
+
+    Args:
+        values: 形状为 (时段数, 列数) 的数组
+        width: 窗口包含的时段数
+        step: 相邻窗口起点的间隔，step == width 时为互不重叠的分块求和
+
+    Returns:
+        ndarray: 第 i 行为时段 [i*step, i*step+width) 的总和
+    """
+    cumulative = np.zeros((len(values) + 1, values.shape[1]))
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    return (cumulative[width:] - cumulative[:-width])[::step]
+
+
+def category_flows(values, categories):
+    """将按 FLOWS 顺序排列的 (时段数, 4) 流量数组映射为各类别的流量，列顺序同 categories"""
+    return values @ np.array(list(categories.values()), dtype=float).T
+
+
+def slot_time(slot):
+    """将时段序号转换为 HH:MM 字符串"""
+    minutes = int(slot) * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def collect(violations, rule, names, actual, limit, mask, slot_step=1):
+    """将 mask 为 True 的位置记录为违反规则，actual、limit、mask 的列与 names 对应"""
+    limit = np.broadcast_to(limit, actual.shape)
+    for row, col in zip(*np.nonzero(mask)):
+        violations.append((rule, names[col], slot_time(row * slot_step), actual[row, col], limit[row, col]))
+
+
+def upper_bound_violations(values, window_max, slot_limits, limits_15, violations):
+    """检查滑动小时、五分钟即时和15分钟上限，这些规则的系数均非负，流量越大越容易违反"""
+    windows = window_sums(category_flows(values, WINDOW_CATEGORIES), HOUR_SLOTS)
+    window_rhs = np.array([window_max[category] for category in WINDOW_CATEGORIES], dtype=float)
+    collect(violations, 'MAX', list(WINDOW_CATEGORIES), windows, window_rhs, windows > window_rhs)
+
+    limit_flows = category_flows(values, LIMIT_CATEGORIES)
+    slot_rhs = np.array([slot_limits[category] for category in LIMIT_CATEGORIES], dtype=float)
+    collect(violations, 'LIMIT', list(LIMIT_CATEGORIES), limit_flows, slot_rhs, limit_flows > slot_rhs)
+
+    sums_15 = window_sums(limit_flows, SLOTS_15)
+    rhs_15 = np.array([limits_15[category] for category in LIMIT_CATEGORIES], dtype=float)
+    collect(violations, '15min', list(LIMIT_CATEGORIES), sums_15, rhs_15, sums_15 > rhs_15)
+    return windows, window_rhs
+
+
+def check_schedule(values, ref_flows, hourly_flows, window_max, slot_limits, limits_15, max_delta=3):
+    """
+    检查动态时刻表是否满足 task1 的全部规则
+
+    规则与 task1.build_model 的约束相同：整点小时总和等于静态值（H）、各类别滑动小时不超过且至少一个窗口达到
+    最大值（MAX、EQ_MAX）、五分钟即时限制（LIMIT）、不低于现状值（REF）、15分钟上限（15min）、
+    相邻时段变化量（DELTA），以及流量为非负整数（INTEGER）。
+
+    Args:
+        values: 形状为 (288, 4) 的五分钟流量，列顺序同 FLOWS
+        ref_flows, hourly_flows, window_max, slot_limits, limits_15: 见 task1_matrix.build_dynamic_schedule_model
+        max_delta: 相邻时段最大变化量
+
+    Returns:
+        DataFrame: 每条违反规则的记录一行，列为 VIOLATION_COLUMNS，满足全部规则时为空
+    """
+    values = np.asarray(values, dtype=float)
+    violations = []
+
+    rounded = np.round(values)
+    collect(violations, 'INTEGER', FLOWS, values, rounded.clip(min=0), (values != rounded) | (values < 0))
+
+    hourly = window_sums(values, HOUR_SLOTS, HOUR_SLOTS)
+    hourly_flows = np.asarray(hourly_flows, dtype=float)
+    collect(violations, 'H', FLOWS, hourly, hourly_flows, hourly != hourly_flows, HOUR_SLOTS)
+
+    windows, window_rhs = upper_bound_violations(values, window_max, slot_limits, limits_15, violations)
+    peak = windows.max(axis=0)
+    for col in np.nonzero(peak < window_rhs)[0]:
+        violations.append(('EQ_MAX', list(WINDOW_CATEGORIES)[col], None, peak[col], window_rhs[col]))
+
+    ref_flows = np.asarray(ref_flows, dtype=float)
+    collect(violations, 'REF', FLOWS, values, ref_flows, values < ref_flows)
+
+    diffs = np.diff(values, axis=0)
+    collect(violations, 'DELTA', FLOWS, diffs, max_delta, np.abs(diffs) > max_delta)
+
+    return pd.DataFrame(violations, columns=VIOLATION_COLUMNS)
+
+
+def check_inputs(ref_flows, hourly_flows, window_max, slot_limits, limits_15):
+    """
+    在求解前检查输入参数，找出使 task1 模型必然无解的情况
+
+    只检查必要条件，没有违反规则时模型仍可能无解：
+    - 现状值是流量的下界，现状值已超过滑动小时、即时或15分钟上限（MAX、LIMIT、15min）
+    - 某小时的现状值之和超过该小时的静态值（H_REF）
+    - 整点小时也是滑动窗口，静态值超过动态小时最大值（H_MAX），或超过即时限制、15分钟上限的整小时容量（H_LIMIT、H_15min）
+    - 滑动小时最多跨两个整点小时，相邻两小时静态值之和均小于动态小时最大值时没有窗口能达到最大值（H_EQ_MAX）
+
+    Args:
+        ref_flows, hourly_flows, window_max, slot_limits, limits_15: 见 task1_matrix.build_dynamic_schedule_model
+
+    Returns:
+        DataFrame: 每条违反规则的记录一行，列为 VIOLATION_COLUMNS，未发现问题时为空
+    """
+    ref_flows = np.asarray(ref_flows, dtype=float)
+    hourly_flows = np.asarray(hourly_flows, dtype=float)
+    violations = []
+
+    upper_bound_violations(ref_flows, window_max, slot_limits, limits_15, violations)
+
+    ref_hourly = window_sums(ref_flows, HOUR_SLOTS, HOUR_SLOTS)
+    collect(violations, 'H_REF', FLOWS, ref_hourly, hourly_flows, ref_hourly > hourly_flows, HOUR_SLOTS)
+
+    hourly_windows = category_flows(hourly_flows, WINDOW_CATEGORIES)
+    window_rhs = np.array([window_max[category] for category in WINDOW_CATEGORIES], dtype=float)
+    collect(violations, 'H_MAX', list(WINDOW_CATEGORIES), hourly_windows, window_rhs,
+            hourly_windows > window_rhs, HOUR_SLOTS)
+    reachable = (hourly_windows[:-1] + hourly_windows[1:]).max(axis=0)
+    for col in np.nonzero(reachable < window_rhs)[0]:
+        violations.append(('H_EQ_MAX', list(WINDOW_CATEGORIES)[col], None, reachable[col], window_rhs[col]))
+
+    hourly_limits = category_flows(hourly_flows, LIMIT_CATEGORIES)
+    slot_rhs = HOUR_SLOTS * np.array([slot_limits[category] for category in LIMIT_CATEGORIES], dtype=float)
+    collect(violations, 'H_LIMIT', list(LIMIT_CATEGORIES), hourly_limits, slot_rhs, hourly_limits > slot_rhs,
+            HOUR_SLOTS)
+    rhs_15 = HOUR_SLOTS // SLOTS_15 * np.array([limits_15[category] for category in LIMIT_CATEGORIES], dtype=float)
+    collect(violations, 'H_15min', list(LIMIT_CATEGORIES), hourly_limits, rhs_15, hourly_limits > rhs_15,
+            HOUR_SLOTS)
+
+    return pd.DataFrame(violations, columns=VIOLATION_COLUMNS)
+
+
+def check_dynamic_sheet(dynamic_df, params, max_delta=3):
+    """
+    检查动态时刻表是否满足 task1 的全部规则
+
+    Args:
+        dynamic_df: 动态时刻表，列为 Time、ARR_DOM、ARR_INT、DEP_DOM、DEP_INT，见 task1.py
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+        max_delta: 相邻时段最大变化量
+
+    Returns:
+        DataFrame: 违反规则的记录，见 check_schedule
+    """
+    return check_schedule(dynamic_df[FLOWS].to_numpy(dtype=float), max_delta=max_delta, **model_inputs(params))
+
+
+def check_parameters(params):
+    """检查时刻表输入参数，返回使 task1 模型必然无解的记录，见 check_inputs"""
+    return check_inputs(**model_inputs(params))
+
+
+def print_violations(violations, limit=20):
+    """打印违反规则的记录，最多打印 limit 条"""
+    if violations.empty:
+        print("满足全部规则")
+        return
+    print(f"共 {len(violations)} 条违反规则的记录，各规则数量：")
+    print(violations['规则'].value_counts().to_string())
+    print(violations.head(limit).to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="检查动态时刻表是否满足task1的容量规则")
+    parser.add_argument('dynamic', nargs='?', default='dynamic_sheet.xlsx', help="动态时刻表文件")
+    parser.add_argument('--input', default=INPUT_FILE, help="时刻表输入文件")
+    parser.add_argument('--max-delta', type=int, default=3, help="相邻时段最大变化量")
+    args = parser.parse_args()
+
+    params = load_schedule_parameters(args.input)
+    print("输入参数检查：")
+    print_violations(check_parameters(params))
+    print(f"\n{args.dynamic} 检查：")
+    print_violations(check_dynamic_sheet(pd.read_excel(args.dynamic, dtype={'Time': str}), params, args.max_delta))
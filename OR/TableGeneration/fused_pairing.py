@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from after_task2 import PAIR_WEIGHT
+from pairing_candidates import DATE_PAIRS, generate_pairing_candidates
+from pairing_matching import assignment_start_rows
+from pairing_model import solve_pairing
+
+# 合并模型在task2的基础上增加的 (到达日期, 出发日期, 是否允许混接)：日期2到达与日期3出发的同市场配对
+OVERNIGHT_DATE_PAIRS = [(2, 3, False)]
+
+# 每个配对的基础收益为 after_task2.PAIR_WEIGHT，跨夜配对的收益为 PAIR_WEIGHT - 过站时间；跨夜过站时间最长可达
+# 2*1440 分钟，与 after_task2 相同，过站时间不小于 PAIR_WEIGHT 的跨夜配对收益不为正，不会被选中
+
+
+def with_date3_departures(dep_df):
+    """在出发航班表后追加日期3的出发航班，由日期2的出发航班复制生成，ID和机型为空"""
+    date3_dep_df = dep_df[dep_df['日期'] == 2].copy()
+    date3_dep_df['日期'] = 3
+    date3_dep_df['ID'] = np.nan
+    date3_dep_df['机型'] = np.nan
+    return pd.concat([dep_df, date3_dep_df], ignore_index=True)
+
+
+def pair_flights_multiday(arr_df, dep_df, params, peak_configs, warm_start=True, max_turnaround=None,
+                          max_candidates=None):
+    """
+    在一个模型中完成 task2 和 after_task2 的配对
+
+    出发航班表追加日期3的副本，候选配对按绝对分钟（日期1零点起）生成，包括日期1到达配日期2出发、
+    日期2到达配日期2出发和日期2到达配日期3出发，约束与 task2 相同：
+    - 日期2到达的跨夜配对计入到达机型配额，与当日配对共用同一限额
+    - 高峰比例与两步配对相同：当日配对使用 task2 的规则；某机型在高峰时段内有跨夜配对时，
+      与 after_task2.overnight_limits 相同，时段内日期2到达的当日配对与跨夜配对之和不超过 round(total * ratio) + 1
+    - 日期3出发不计入出发配额、小时分布、出发方向的高峰比例和混接比例
+    约束与两步配对相同，但当日配对和跨夜配对一起优化，结果可能不同。
+    目标为 sum(PAIR_WEIGHT * 当日配对) + sum((PAIR_WEIGHT - 过站时间) * 跨夜配对)。
+
+    Args:
+        arr_df: 到达航班表，见 pre_task2.prepare_flights
+        dep_df: 出发航班表（只含日期2）
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+        peak_configs: 高峰小时机型比例约束配置，见 utils2.build_peak_configs
+        warm_start: 是否先用指派问题求解配对松弛问题，作为MIP初始解
+        max_turnaround: 当日配对的最大过站时间（分钟），为 None 时不限制
+        max_candidates: 每个到达航班最多保留的当日出发航班数，为 None 时不限制
+
+    Returns:
+        (到达航班表, 出发航班表)，格式与 after_task2.extend_pairing 的结果相同：当日配对的ID从1开始，
+        跨夜配对的ID接在其后，出发航班表包含配对成功的日期3航班
+    """
+    arr_df = arr_df.astype({'ID': object, '机型': object})
+    dep_df = with_date3_departures(dep_df).astype({'ID': object, '机型': object})
+
+    # 剪枝参数只作用于当日配对，跨夜配对与 after_task2 相同不剪枝
+    candidates = pd.concat([
+        generate_pairing_candidates(arr_df, dep_df, params.quotas, params.min_times, DATE_PAIRS, max_turnaround,
+                                    max_candidates),
+        generate_pairing_candidates(arr_df, dep_df, params.quotas, params.min_times, OVERNIGHT_DATE_PAIRS),
+    ]).sort_values(['arr', 'dep'], kind='stable').reset_index(drop=True)
+    overnight = dep_df['日期'].to_numpy()[candidates['dep'].to_numpy(dtype=int)] == 3
+    weights = PAIR_WEIGHT - np.where(overnight, candidates['delta'].to_numpy(), 0)
+
+    start = None
+    if warm_start:
+        start = assignment_start_rows(candidates, arr_df, dep_df, params.quotas, params.DOM_INT_MIX_p)
+    chosen = solve_pairing(candidates, arr_df, dep_df, params, peak_configs, start, weights=weights)
+    if chosen is None:
+        raise RuntimeError("航班配对模型无解")
+
+    # 当日配对在前、跨夜配对在后，各自按候选配对的顺序编号
+    pairs = pd.concat([candidates[chosen & ~overnight], candidates[chosen & overnight]])
+    for pair_id, (i, j, k) in enumerate(zip(pairs['arr'].tolist(), pairs['dep'].tolist(), pairs['k'].tolist()),
+                                        start=1):
+        arr_df.at[arr_df.index[i], 'ID'] = pair_id
+        arr_df.at[arr_df.index[i], '机型'] = k
+        dep_df.at[dep_df.index[j], 'ID'] = pair_id
+        dep_df.at[dep_df.index[j], '机型'] = k
+
+    unpaired = arr_df[(arr_df['ID'].isna()) & (arr_df['日期'] == 2)]
+    print("当日配对量: ", int((chosen & ~overnight).sum()))
+    print("跨夜配对量: ", int((chosen & overnight).sum()))
+    if len(unpaired):
+        print(f"有 {len(unpaired)} 个航班未完成配对，请检查！！！")
+
+    return arr_df, dep_df[(dep_df['日期'] != 3) | (dep_df['ID'].notna())]
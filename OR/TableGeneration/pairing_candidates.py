@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+# 机型类别，决策变量按此顺序生成
+AIRCRAFT_TYPES = ['C', 'E', 'F']
+
+# 可配对的 (到达日期, 出发日期, 是否允许混接)：同市场可当日配对或日期1到达配日期2出发，混接仅限日期均为2
+DATE_PAIRS = [(1, 2, False), (2, 2, True)]
+
+
+def to_minutes(times):
+    """将 HH:MM 时间字符串序列转换为分钟数数组"""
+    parts = pd.Series(times).astype(str).str.split(':', expand=True).astype(int)
+    return (parts[0] * 60 + parts[1]).to_numpy()
+
+
+def allowed_types(arr_market, dep_market, quotas, min_times):
+    """
+    计算某一市场组合下可用的机型及其最小过站时间
+
+    到达市场和出发市场在该机型上都有正的配额时机型才可用；最小过站时间按到达市场取，
+    未配置或为空时视为0。
+
+    Returns:
+        list: [(机型, 最小过站时间)]，按 AIRCRAFT_TYPES 顺序
+    """
+    result = []
+    for k in AIRCRAFT_TYPES:
+        arr_quota = quotas.get((arr_market, k), {}).get('ARR', 0)
+        dep_quota = quotas.get((dep_market, k), {}).get('DEP', 0)
+        if arr_quota > 0 and dep_quota > 0:
+            min_time = min_times.get((arr_market, k), 0)
+            result.append((k, 0 if pd.isna(min_time) else min_time))
+    return result
+
+
+def generate_pairing_candidates(arr_df, dep_df, quotas, min_times, date_pairs=DATE_PAIRS,
+                                max_turnaround=None, max_candidates=None):
+    """
+    生成到达航班与出发航班的候选配对
+
+    出发航班按 (日期, 市场) 分组并按绝对分钟排序，每个到达航班用二分查找确定过站时间落在
+    [最小过站时间, max_turnaround] 内的出发航班区间，只生成区间内的配对，变量数量和
+    生成时间与实际候选数量成线性关系，不再枚举全部 到达 × 出发 组合。
+
+    Args:
+        arr_df: 到达航班表，需包含 时间、市场、日期 列
+        dep_df: 出发航班表，需包含 时间、市场、日期 列
+        quotas: 机型配额 {(市场, 机型): {'ARR': 配额, 'DEP': 配额}}
+        min_times: 最小过站时间 {(市场, 机型): 分钟}
+        date_pairs: 可配对的 (到达日期, 出发日期, 是否允许混接) 列表
+        max_turnaround: 最大过站时间（分钟），为 None 时不限制
+        max_candidates: 每个到达航班最多保留的出发航班数（按过站时间从短到长），为 None 时不限制
+
+    Returns:
+        DataFrame: 列为 arr、dep（到达、出发航班在表中的行号）、k（机型）、delta（过站时间）、
+        mixed（是否混接），按 (arr, dep, 机型) 排序
+    """
+    arr_minutes = to_minutes(arr_df['时间']) + (arr_df['日期'].to_numpy() - 1) * 24 * 60
+    dep_minutes = to_minutes(dep_df['时间']) + (dep_df['日期'].to_numpy() - 1) * 24 * 60
+    arr_groups = pd.DataFrame({'日期': arr_df['日期'].to_numpy(), '市场': arr_df['市场'].to_numpy()}) \
+        .groupby(['日期', '市场']).indices
+    dep_groups = pd.DataFrame({'日期': dep_df['日期'].to_numpy(), '市场': dep_df['市场'].to_numpy()}) \
+        .groupby(['日期', '市场']).indices
+
+    pieces = []
+    for arr_date, dep_date, mixed_allowed in date_pairs:
+        for (a_date, arr_market), arr_rows in arr_groups.items():
+            if a_date != arr_date:
+                continue
+            for (d_date, dep_market), dep_rows in dep_groups.items():
+                if d_date != dep_date or (arr_market != dep_market and not mixed_allowed):
+                    continue
+                types = allowed_types(arr_market, dep_market, quotas, min_times)
+                if not types:
+                    continue
+
+                # 出发航班按绝对分钟排序，二分查找每个到达航班的可行出发区间
+                order = np.argsort(dep_minutes[dep_rows], kind='stable')
+                dep_sorted = dep_rows[order]
+                dep_sorted_minutes = dep_minutes[dep_sorted]
+                base = arr_minutes[arr_rows]
+                min_gap = min(min_time for _, min_time in types)
+                start = np.maximum(np.searchsorted(dep_sorted_minutes, base, side='right'),
+                                   np.searchsorted(dep_sorted_minutes, base + min_gap, side='left'))
+                if max_turnaround is None:
+                    end = np.full(len(base), len(dep_sorted))
+                else:
+                    end = np.searchsorted(dep_sorted_minutes, base + max_turnaround, side='right')
+                end = np.maximum(end, start)
+                if max_candidates is not None:
+                    end = np.minimum(end, start + max_candidates)
+
+                # 展开各到达航班的出发区间
+                counts = end - start
+                arr_idx = np.repeat(arr_rows, counts)
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                dep_idx = dep_sorted[np.repeat(start, counts) + offsets]
+                delta = dep_minutes[dep_idx] - arr_minutes[arr_idx]
+
+                for k, min_time in types:
+                    keep = delta >= min_time
+                    pieces.append(pd.DataFrame({
+                        'arr': arr_idx[keep],
+                        'dep': dep_idx[keep],
+                        'k': k,
+                        'delta': delta[keep],
+                        'mixed': arr_market != dep_market,
+                    }))
+
+    if not pieces:
+        return pd.DataFrame({'arr': pd.Series(dtype=int), 'dep': pd.Series(dtype=int), 'k': pd.Series(dtype=str),
+                             'delta': pd.Series(dtype=int), 'mixed': pd.Series(dtype=bool)})
+
+    candidates = pd.concat(pieces, ignore_index=True).drop_duplicates(['arr', 'dep', 'k'])
+    if max_candidates is not None:
+        # 各分组内已截取，这里在到达航班的全部出发分组间再取过站时间最短的 max_candidates 个
+        pairs = candidates.drop_duplicates(['arr', 'dep']).sort_values(['arr', 'delta', 'dep'], kind='stable')
+        pairs = pairs[pairs.groupby('arr').cumcount() < max_candidates]
+        candidates = candidates.merge(pairs[['arr', 'dep']], on=['arr', 'dep'])
+    k_order = candidates['k'].map({k: n for n, k in enumerate(AIRCRAFT_TYPES)})
+    order = np.lexsort((k_order.to_numpy(), candidates['dep'].to_numpy(), candidates['arr'].to_numpy()))
+    return candidates.iloc[order].reset_index(drop=True)
@@ -0,0 +1,187 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import gurobipy as gp
+import numpy as np
+
+from pairing_candidates import to_minutes
+from pairing_matching import assignment_start_rows
+from pairing_model import solve_pairing
+
+# 分解求解的市场，按此顺序生成子问题
+MARKETS = ['DOM', 'INT']
+
+# 协调模型无解时扩大邻域的最多次数，仍无解时改为整体求解
+REPAIR_EXPANSIONS = 2
+
+
+def subproblems(candidates, arr_df, dep_df, band_hours=None):
+    """
+    将配对问题按市场（及出发时段）分解为互相独立的子问题
+
+    子问题只包含同市场配对。按时段分解时，出发航班按出发时间（日期1零点起的绝对小时）划入互不重叠的时段，
+    每个时段包含出发航班在本时段的配对，同一到达航班可出现在多个时段中；机型配额按时段缩放，见 band_quotas。
+
+    Args:
+        candidates: 候选配对表，见 pairing_candidates.generate_pairing_candidates
+        arr_df: 到达航班表
+        dep_df: 出发航班表
+        band_hours: 每个时段的小时数，为 None 时只按市场分解
+
+    Returns:
+        list: [(子问题名称, 候选配对行号, 本子问题日期2出发航班占本市场的比例)]
+    """
+    arr_markets = arr_df['市场'].to_numpy(dtype=object)
+    dep_markets = dep_df['市场'].to_numpy(dtype=object)
+    arr = candidates['arr'].to_numpy(dtype=int)
+    dep = candidates['dep'].to_numpy(dtype=int)
+    same_market = ~candidates['mixed'].to_numpy(dtype=bool)
+
+    problems = []
+    for market in MARKETS:
+        rows = same_market & (arr_markets[arr] == market)
+        if band_hours is None:
+            problems.append((market, np.nonzero(rows)[0], 1.0))
+            continue
+
+        dep_minutes = to_minutes(dep_df['时间']) + (dep_df['日期'].to_numpy() - 1) * 24 * 60
+        dep_bands = dep_minutes // (band_hours * 60)
+        date2 = (dep_markets == market) & (dep_df['日期'].to_numpy() == 2)
+        for band in np.unique(dep_bands[dep_markets == market]):
+            owned = (dep_markets == market) & (dep_bands == band)
+            name = f"{market} {band * band_hours}-{(band + 1) * band_hours}时"
+            share = (owned & date2).sum() / date2.sum() if date2.any() else 1.0
+            problems.append((name, np.nonzero(rows & owned[dep])[0], share))
+    return problems
+
+
+def band_quotas(quotas, share):
+    """
+    按时段分解时，将机型配额按本时段日期2出发航班占全市场的比例缩放（向上取整）
+
+    各时段子问题都使用全天配额时，合并后的配对会超出配额，协调模型只能大幅调整甚至无解；
+    缩放后各时段配额之和与全天配额接近，超出的少量配对由协调模型调整机型或取消。
+
+    Args:
+        quotas: 机型配额 {(市场, 机型): {'ARR': 配额, 'DEP': 配额}}
+        share: 本时段日期2出发航班占本市场日期2出发航班的比例
+
+    Returns:
+        dict: 与 quotas 结构相同的本时段配额
+    """
+    return {key: {direction: np.ceil(value * share) for direction, value in quota.items()}
+            for key, quota in quotas.items()}
+
+
+def solve_subproblem_in_env(candidates, arr_df, dep_df, params, peak_configs, warm_start, threads):
+    """
+    在独立的Gurobi环境中求解一个子问题，供进程池调用
+
+    子问题不添加必须配对约束，只最大化同市场的配对数量，部分航班只能混接配对时子问题仍然可行；
+    必须配对约束由协调模型保证。
+
+    Returns:
+        ndarray: 与子问题候选配对各行对应的布尔数组；无解时返回 None
+    """
+    start = None
+    if warm_start:
+        start = assignment_start_rows(candidates, arr_df, dep_df, params.quotas, params.DOM_INT_MIX_p)
+    try:
+        with gp.Env(params={'OutputFlag': 0}) as env:
+            return solve_pairing(candidates, arr_df, dep_df, params, peak_configs, start,
+                                 np.zeros(len(arr_df), dtype=bool), np.zeros(len(dep_df), dtype=bool), env, threads)
+    except gp.GurobiError as e:
+        print(f"子问题求解失败: {e}")
+        return None
+
+
+def merge_solutions(candidates, chosen_rows, num_arr, num_dep):
+    """
+    合并各子问题选中的配对，同一航班在多个子问题中被选中时只保留行号最小的配对
+
+    Returns:
+        (合并后互不冲突的候选配对行号, 未配对或存在冲突的到达航班的布尔数组, 同样的出发航班的布尔数组)
+    """
+    arr = candidates['arr'].to_numpy(dtype=int)[chosen_rows]
+    dep = candidates['dep'].to_numpy(dtype=int)[chosen_rows]
+    _, first_arr = np.unique(arr, return_index=True)
+    _, first_dep = np.unique(dep, return_index=True)
+    keep = np.zeros(len(chosen_rows), dtype=bool)
+    keep[np.intersect1d(first_arr, first_dep)] = True
+
+    free_arr = np.ones(num_arr, dtype=bool)
+    free_dep = np.ones(num_dep, dtype=bool)
+    free_arr[arr[keep]] = False
+    free_dep[dep[keep]] = False
+    return chosen_rows[keep], free_arr, free_dep
+
+
+def decomposed_pairing(candidates, arr_df, dep_df, params, peak_configs, band_hours=None, warm_start=True,
+                       workers=None):
+    """
+    分解求解航班配对模型
+
+    1. 按市场（及出发时段）分解为子问题，在进程池中并行求解，每个进程使用独立的Gurobi环境；
+    2. 协调模型：只保留子问题选中的配对（含其它机型），以及与未配对或存在冲突的航班相关的全部候选配对（包括混接配对），
+       以合并后的子问题解为初始解，加上全部约束（机型配额、高峰比例、混接比例、必须配对等）重新求解。
+    子问题无解时其航班全部在协调模型中重新配对；协调模型无解时逐层扩大放开的航班（最多 REPAIR_EXPANSIONS 次），
+    仍无解时改为在全部候选配对上整体求解。
+
+    Args:
+        candidates: 候选配对表，见 pairing_candidates.generate_pairing_candidates
+        arr_df: 到达航班表
+        dep_df: 出发航班表
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+        peak_configs: 高峰小时机型比例约束配置，见 utils2.build_peak_configs
+        band_hours: 每个时段的小时数，为 None 时只按市场分解
+        warm_start: 子问题是否用指派问题的解作为初始解
+        workers: 并行进程数，为 None 时取子问题数和CPU核数中的较小值
+
+    Returns:
+        ndarray: 与候选配对各行对应的布尔数组，True 表示选中该配对；没有可行解时返回 None
+    """
+    problems = [problem for problem in subproblems(candidates, arr_df, dep_df, band_hours) if len(problem[1])]
+    workers = workers or max(1, min(len(problems), os.cpu_count() or 1))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(solve_subproblem_in_env, candidates.iloc[rows].reset_index(drop=True), arr_df,
+                                   dep_df, params._replace(quotas=band_quotas(params.quotas, share)), peak_configs,
+                                   warm_start, threads)
+                   for _, rows, share in problems]
+        results = [future.result() for future in futures]
+
+    # 子问题无解（如宽体机型小时分布无法只用同市场配对满足）时，其航班均视为未配对，在协调模型中重新配对
+    chosen_rows = [np.array([], dtype=int)]
+    for (name, rows, _), result in zip(problems, results):
+        if result is None:
+            print(f"子问题 {name}: {len(rows)} 个候选配对，无解，在协调模型中重新配对")
+            continue
+        print(f"子问题 {name}: {len(rows)} 个候选配对，配对 {result.sum()} 个")
+        chosen_rows.append(rows[result])
+
+    # 协调模型
+    chosen_rows = np.sort(np.concatenate(chosen_rows))
+    start_rows, free_arr, free_dep = merge_solutions(candidates, chosen_rows, len(arr_df), len(dep_df))
+    arr = candidates['arr'].to_numpy(dtype=int)
+    dep = candidates['dep'].to_numpy(dtype=int)
+    # 选中配对的全部机型都保留，协调模型可改变机型以满足配额
+    chosen_pairs = np.isin(arr * len(dep_df) + dep, arr[chosen_rows] * len(dep_df) + dep[chosen_rows])
+    for expansion in range(REPAIR_EXPANSIONS + 1):
+        open_rows = free_arr[arr] | free_dep[dep]
+        repair_rows = np.nonzero(chosen_pairs | open_rows)[0]
+        print(f"协调模型: {len(repair_rows)}/{len(candidates)} 个候选配对")
+        result = solve_pairing(candidates.iloc[repair_rows].reset_index(drop=True), arr_df, dep_df, params,
+                               peak_configs, np.searchsorted(repair_rows, start_rows))
+        if result is not None or len(repair_rows) == len(candidates):
+            break
+        # 扩大一层邻域：与放开的航班存在候选配对的航班也放开其全部候选配对
+        print("协调模型无解，扩大邻域")
+        free_arr[arr[open_rows]] = True
+        free_dep[dep[open_rows]] = True
+    if result is None:
+        print("协调模型无解，改为整体求解")
+        return solve_pairing(candidates, arr_df, dep_df, params, peak_configs, start_rows)
+
+    chosen = np.zeros(len(candidates), dtype=bool)
+    chosen[repair_rows[result]] = True
+    return chosen
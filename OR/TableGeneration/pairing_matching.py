@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+from pairing_candidates import AIRCRAFT_TYPES
+
+
+def remaining_quota(quotas):
+    """将机型配额整理为可递减的剩余配额字典，空值视为0"""
+    remaining = {}
+    for (market, k), quota in quotas.items():
+        for direction in ['ARR', 'DEP']:
+            value = quota.get(direction, 0)
+            remaining[(market, k, direction)] = 0 if pd.isna(value) else value
+    return remaining
+
+
+def assignment_warm_start(candidates, arr_df, dep_df, quotas, mix_ratio, mandatory_weight=1.0, mixed_penalty=0.001):
+    """
+    用指派问题求解配对的松弛问题，生成MIP初始解
+
+    先在候选配对构成的稀疏二分图上求最大权配对（min_weight_full_bipartite_matching），日期1的到达航班
+    带额外权重以优先配对，混接配对带少量惩罚；二分图只包含候选配对中出现的航班和候选配对的边，
+    每个到达航班另有一条只连向自身的虚拟出发航班的边，表示不配对，因此总存在完全配对。再按机型顺序为每个配对选取仍有配额的机型，
+    最后去掉超出混接比例的混接配对。高峰比例和小时分布等约束不在此处考虑，由Gurobi修复。
+
+    Args:
+        candidates: 候选配对表，见 generate_pairing_candidates
+        arr_df: 到达航班表，需包含 市场、日期 列
+        dep_df: 出发航班表，需包含 市场、日期 列
+        quotas: 机型配额 {(市场, 机型): {'ARR': 配额, 'DEP': 配额}}
+        mix_ratio: 混接配对占总配对数的最大比例
+        mandatory_weight: 日期1到达航班配对的额外权重
+        mixed_penalty: 混接配对的惩罚
+
+    Returns:
+        list: 初始解中取值为1的 (到达行号, 出发行号, 机型) 列表
+    """
+    if candidates.empty:
+        return []
+
+    arr_markets = arr_df['市场'].to_numpy()
+    arr_dates = arr_df['日期'].to_numpy()
+    dep_markets = dep_df['市场'].to_numpy()
+    dep_dates = dep_df['日期'].to_numpy()
+
+    # 松弛问题：每个到达和出发航班最多配对一次，收益为配对数量
+    pairs = candidates.drop_duplicates(['arr', 'dep'])
+    arr_idx = pairs['arr'].to_numpy()
+    dep_idx = pairs['dep'].to_numpy()
+    gain = 1.0 + mandatory_weight * (arr_dates[arr_idx] == 1) - mixed_penalty * pairs['mixed'].to_numpy()
+
+    # 按候选配对中出现的航班重新编号；费用 = 基准 - 收益，均为正数，虚拟边的费用为基准，即收益为0
+    arr_ids, arr_pos = np.unique(arr_idx, return_inverse=True)
+    dep_ids, dep_pos = np.unique(dep_idx, return_inverse=True)
+    base = 2.0 + mandatory_weight
+    num_arr, num_dep = len(arr_ids), len(dep_ids)
+    graph = sp.csr_matrix((np.concatenate([base - gain, np.full(num_arr, base)]),
+                           (np.concatenate([arr_pos, np.arange(num_arr)]),
+                            np.concatenate([dep_pos, num_dep + np.arange(num_arr)]))),
+                          shape=(num_arr, num_dep + num_arr))
+    rows, cols = min_weight_full_bipartite_matching(graph)
+    matched = cols < num_dep
+    rows, cols = arr_ids[rows[matched]], dep_ids[cols[matched]]
+
+    # 为每个配对选取仍有配额的机型，日期1的到达航班优先
+    arr_all = candidates['arr'].to_numpy()
+    dep_all = candidates['dep'].to_numpy()
+    width = dep_all.max() + 1
+    chosen = candidates[np.isin(arr_all * width + dep_all, rows * width + cols)]
+    types = chosen.groupby(['arr', 'dep'], sort=False)['k'].agg(list).to_dict()
+    remaining = remaining_quota(quotas)
+    order = np.argsort(arr_dates[rows] != 1, kind='stable')
+    start = []
+    for i, j in zip(rows[order].tolist(), cols[order].tolist()):
+        for k in AIRCRAFT_TYPES:
+            if k not in types[(i, j)]:
+                continue
+            arr_key = (arr_markets[i], k, 'ARR')
+            dep_key = (dep_markets[j], k, 'DEP')
+            if arr_dates[i] == 2 and remaining.get(arr_key, 0) < 1:
+                continue
+            if dep_dates[j] == 2 and remaining.get(dep_key, 0) < 1:
+                continue
+            if arr_dates[i] == 2:
+                remaining[arr_key] -= 1
+            if dep_dates[j] == 2:
+                remaining[dep_key] -= 1
+            start.append((i, j, k))
+            break
+
+    # 去掉超出混接比例的混接配对，从最后选取的开始
+    mixed = [n for n, (i, j, _) in enumerate(start) if arr_markets[i] != dep_markets[j]]
+    drop = set()
+    while mixed and len(mixed) > mix_ratio * (len(start) - len(drop)):
+        drop.add(mixed.pop())
+    return [key for n, key in enumerate(start) if n not in drop]
+
+
+def assignment_start_rows(candidates, arr_df, dep_df, quotas, mix_ratio):
+    """
+    将 assignment_warm_start 的初始解转换为候选配对的行号
+
+    Returns:
+        list: 初始解中取值为1的候选配对行号，没有初始解时为空
+    """
+    keys = assignment_warm_start(candidates, arr_df, dep_df, quotas, mix_ratio)
+    if not keys:
+        return []
+    keys = pd.DataFrame(keys, columns=['arr', 'dep', 'k'])
+    return candidates.reset_index().merge(keys, on=['arr', 'dep', 'k'])['index'].tolist()
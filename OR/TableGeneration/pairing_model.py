@@ -0,0 +1,253 @@
+import numpy as np
+import pandas as pd
+from gurobipy import Model, GRB, LinExpr, quicksum
+
+from pairing_candidates import AIRCRAFT_TYPES, to_minutes
+
+
+def group_rows(mask, *keys):
+    """
+    将 mask 为 True 的候选配对行号按键分组
+
+    Args:
+        mask: 与候选配对等长的布尔数组
+        keys: 与候选配对等长的分组键数组，多个键时分组键为元组
+
+    Returns:
+        dict: {分组键: 候选配对行号数组}，分组按首次出现的顺序，组内保持候选配对的顺序
+    """
+    rows = np.nonzero(mask)[0]
+    by = keys[0][rows] if len(keys) == 1 else [key[rows] for key in keys]
+    return {key: rows[positions] for key, positions in pd.Series(rows).groupby(by, sort=False).indices.items()}
+
+
+def constraint_groups(candidates, arr_df, dep_df, peak_configs, mandatory_arr=None, mandatory_dep=None):
+    """
+    一次性计算各约束族包含的候选配对行号
+
+    各约束族按航班、(市场, 机型)、小时或高峰时段对候选配对分组，每个约束只需对本组的行号求和，
+    建模时间与候选配对数量成线性关系，不再为每个航班或配额扫描全部变量。
+
+    Args:
+        candidates: 候选配对表，见 pairing_candidates.generate_pairing_candidates
+        arr_df: 到达航班表，需包含 时间、市场、日期 列
+        dep_df: 出发航班表，需包含 时间、市场、日期 列
+        peak_configs: 高峰小时机型比例约束配置，见 utils2.build_peak_configs
+        mandatory_arr: 必须配对的到达航班的布尔数组，与 arr_df 等长，为 None 时为全部日期1的到达航班
+        mandatory_dep: 必须配对的出发航班的布尔数组，与 dep_df 等长，为 None 时为全部日期2的出发航班
+
+    Returns:
+        dict: 各约束族的 {分组键: 候选配对行号数组}
+            'arr'、'dep': 每个到达、出发航班的全部配对
+            'arr_quota'、'dep_quota': 日期2的到达、出发航班按 (市场, 机型) 分组
+            'date1_arr': 必须配对的每个日期1到达航班与日期2出发航班的配对，包含没有配对的航班
+            'date2_dep': 必须配对的每个日期2出发航班与日期1、2到达航班的配对，包含没有配对的航班
+            'hourly': 日期2出发的宽体机型配对按 (出发小时, 出发市场) 分组
+            'peak': 与 peak_configs 对应的列表，每项为该高峰时段内的当日配对（日期2出发）按机型分组
+            'overnight_peak': 与 peak_configs 对应的列表，每项为该高峰时段内日期2到达的全部配对（当日配对和
+                跨夜到日期3出发的配对）按机型分组，只包含有跨夜配对的机型，task2 中均为空字典
+            'mixed': 混接配对的行号数组
+            'day': 日期2出发的配对（不含跨夜到日期3出发的配对）的行号数组
+    """
+    arr = candidates['arr'].to_numpy(dtype=int)
+    dep = candidates['dep'].to_numpy(dtype=int)
+    k = candidates['k'].to_numpy(dtype=object)
+    arr_dates = arr_df['日期'].to_numpy()
+    dep_dates = dep_df['日期'].to_numpy()
+    mandatory_arr = arr_dates == 1 if mandatory_arr is None else mandatory_arr & (arr_dates == 1)
+    mandatory_dep = dep_dates == 2 if mandatory_dep is None else mandatory_dep & (dep_dates == 2)
+    arr_market = arr_df['市场'].to_numpy(dtype=object)[arr]
+    dep_market = dep_df['市场'].to_numpy(dtype=object)[dep]
+    arr_date = arr_dates[arr]
+    dep_date = dep_dates[dep]
+    arr_time = to_minutes(arr_df['时间'])[arr] if len(arr_df) else arr
+    dep_time = to_minutes(dep_df['时间'])[dep] if len(dep_df) else dep
+    everything = np.ones(len(candidates), dtype=bool)
+
+    def per_flight(flights, mask, keys):
+        groups = group_rows(mask, keys)
+        return {n: groups.get(n, np.array([], dtype=int)) for n in flights}
+
+    groups = {
+        'arr': group_rows(everything, arr),
+        'dep': group_rows(everything, dep),
+        'arr_quota': group_rows(arr_date == 2, arr_market, k),
+        'dep_quota': group_rows(dep_date == 2, dep_market, k),
+        'date1_arr': per_flight(np.nonzero(mandatory_arr)[0], (arr_date == 1) & (dep_date == 2), arr),
+        'date2_dep': per_flight(np.nonzero(mandatory_dep)[0], (dep_date == 2) & np.isin(arr_date, [1, 2]), dep),
+        'hourly': group_rows(np.isin(k, ['E', 'F']) & (dep_date == 2), dep_time // 60, dep_market),
+        'peak': [],
+        'overnight_peak': [],
+        'mixed': np.nonzero(candidates['mixed'].to_numpy(dtype=bool))[0],
+        'day': np.nonzero(dep_date == 2)[0],
+    }
+
+    for config in peak_configs:
+        start_min = to_minutes([config['start_time']])[0]
+        end_min = to_minutes([config['end_time']])[0]
+        arr_in = (arr_market == config['market']) & (arr_date == 2) & (arr_time >= start_min) & (arr_time <= end_min)
+        dep_in = (dep_market == config['market']) & (dep_date == 2) & (dep_time >= start_min) & (dep_time <= end_min)
+        selected = {'ARR': arr_in, 'DEP': dep_in, 'both': arr_in | dep_in}.get(config['direction'], ~everything)
+        selected = selected & (dep_date == 2)
+        groups['peak'].append({aircraft: np.nonzero(selected & (k == aircraft))[0] for aircraft in AIRCRAFT_TYPES})
+        # 与 after_task2.overnight_limits 相同，跨夜配对按到达航班计入高峰时段，不论方向
+        overnight_rows = {aircraft: np.nonzero(arr_in & (k == aircraft))[0] for aircraft in AIRCRAFT_TYPES}
+        groups['overnight_peak'].append({aircraft: rows for aircraft, rows in overnight_rows.items()
+                                         if (dep_date[rows] == 3).any()})
+    return groups
+
+
+def build_pairing_model(candidates, arr_df, dep_df, params, peak_configs, mandatory_arr=None, mandatory_dep=None,
+                        env=None, weights=None):
+    """
+    在候选配对上构建航班配对模型
+
+    Args:
+        candidates: 候选配对表，见 pairing_candidates.generate_pairing_candidates，可以只是其中一部分行
+        arr_df: 到达航班表，候选配对中的行号指向此表
+        dep_df: 出发航班表
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+        peak_configs: 高峰小时机型比例约束配置，见 utils2.build_peak_configs
+        mandatory_arr, mandatory_dep: 必须配对的航班范围，见 constraint_groups
+        env: Gurobi环境，为 None 时使用默认环境
+        weights: 各候选配对在目标函数中的权重，为 None 时目标为配对总数
+
+    Returns:
+        (Gurobi模型, 与候选配对各行对应的二元变量列表)
+    """
+    model = Model('Flight_Pairing', env=env)
+
+    # 生成变量：x[n]表示候选配对第n行的到达航班与出发航班配对且机型为该行的机型
+    names = [f'x_{i}_{j}_{k}' for i, j, k in zip(candidates['arr'].tolist(), candidates['dep'].tolist(),
+                                                  candidates['k'].tolist())]
+    x = list(model.addVars(len(candidates), vtype=GRB.BINARY, name=names).values())
+    groups = constraint_groups(candidates, arr_df, dep_df, peak_configs, mandatory_arr, mandatory_dep)
+
+    def total(rows):
+        return quicksum(x[n] for n in rows)
+
+    # 目标函数：最大化配对总数（或加权配对总数）
+    if weights is None:
+        model.setObjective(quicksum(x), GRB.MAXIMIZE)
+    else:
+        model.setObjective(LinExpr(list(map(float, weights)), x), GRB.MAXIMIZE)
+
+    # 约束1：每个到达航班最多配对一次
+    for i, rows in groups['arr'].items():
+        model.addConstr(total(rows) <= 1, name=f'arr_{i}')
+
+    # 约束2：每个出发航班最多配对一次
+    for j, rows in groups['dep'].items():
+        model.addConstr(total(rows) <= 1, name=f'dep_{j}')
+
+    # 约束3：机型配额限制
+    for (market, k), quota in params.quotas.items():
+        arr_total = groups['arr_quota'].get((market, k), [])
+        dep_total = groups['dep_quota'].get((market, k), [])
+        if len(arr_total):
+            model.addConstr(total(arr_total) <= quota['ARR'], f'arr_quota_{market}_{k}')
+        if len(dep_total):
+            model.addConstr(total(dep_total) <= quota['DEP'], f'dep_quota_{market}_{k}')
+
+    # 约束4：日期1的到达航班必须全部配对（与日期2的出发航班）
+    for i, rows in groups['date1_arr'].items():
+        if not len(rows):
+            raise ValueError(f"日期1的到达航班{i}没有可用的出发航班配对，请检查数据")
+        model.addConstr(total(rows) == 1, name=f"mandatory_pairing_date1_arr_{i}")
+
+    # 约束5：日期2的所有出发航班必须配对（与日期1或日期2的到达航班）
+    for j, rows in groups['date2_dep'].items():
+        if not len(rows):
+            raise ValueError(f"日期2的出发航班{j}没有可用的到达航班配对，请检查数据")
+        model.addConstr(total(rows) == 1, name=f"mandatory_pairing_date2_dep_{j}")
+
+    # 约束6：宽体机型在第二天的离港小时分布限制
+    # 创建小时限制字典
+    hour_limits = {}
+    for h, dom_dep, int_dep in params.dep_hour_distribution:
+        hour_limits[(h, 'DOM')] = dom_dep
+        hour_limits[(h, 'INT')] = int_dep
+
+    # 添加小时分布约束
+    for (h, market), rows in groups['hourly'].items():
+        if (h, market) in hour_limits:
+            # 检查hour_limits中的值是否为nan
+            if pd.isna(hour_limits[(h, market)]):
+                continue
+            original = hour_limits[(h, market)]
+            # 计算允许的上下限
+            bias = 0
+            upper_bound = original + bias
+            lower_bound = max(0, original - bias)  # 保证下限不低于0
+
+            # 添加柔性约束
+            model.addConstr(
+                total(rows) <= upper_bound,
+                name=f"flex_hourly_upper_{market}_h{h}"
+            )
+            # 仅当原限制>0时添加下限约束
+            if original > 0:
+                model.addConstr(
+                    total(rows) >= lower_bound,
+                    name=f"flex_hourly_lower_{market}_h{h}"
+                )
+
+    # 约束7：国内国际高峰小时机型比例约束
+    for config, type_rows in zip(peak_configs, groups['peak']):
+        # 计算机型配额
+        ratios = config['ratios']
+        e_count = round(config['total'] * ratios.get('E', 0))
+        f_count = round(config['total'] * ratios.get('F', 0))
+        c_count = config['total'] - e_count - f_count
+
+        # 添加约束
+        for k, count in [('C', c_count), ('E', e_count), ('F', f_count)]:
+            if count >= 0 and len(type_rows[k]):
+                model.addConstr(total(type_rows[k]) <= count, name=f"peak_{config['name']}_{k}")
+
+    # 约束7'：跨夜配对的高峰小时机型比例，与 after_task2.overnight_limits 相同：
+    # 高峰时段内日期2到达的当日配对与跨夜配对之和不超过 round(total * ratio) + 1
+    for config, type_rows in zip(peak_configs, groups['overnight_peak']):
+        for k, rows in type_rows.items():
+            if k in config['ratios']:
+                model.addConstr(total(rows) <= round(config['total'] * config['ratios'][k]) + 1,
+                                name=f"ext_peak_{config['name']}_{k}")
+
+    # 约束8：国内国际混接比例：5% （仅讨论第二天天内）
+    if len(groups['mixed']):
+        model.addConstr(
+            total(groups['mixed']) <= params.DOM_INT_MIX_p * total(groups['day']),
+            name="mixed_market_limit"
+        )
+
+    return model, x
+
+
+def solve_pairing(candidates, arr_df, dep_df, params, peak_configs, start=None, mandatory_arr=None,
+                  mandatory_dep=None, env=None, threads=None, weights=None):
+    """
+    构建并求解航班配对模型
+
+    Args:
+        candidates, arr_df, dep_df, params, peak_configs, mandatory_arr, mandatory_dep, env, weights:
+            见 build_pairing_model
+        start: 初始解中取值为1的候选配对行号，为 None 时不设初始解
+        threads: Gurobi求解线程数，为 None 时由Gurobi自动决定
+
+    Returns:
+        ndarray: 与候选配对各行对应的布尔数组，True 表示选中该配对；没有可行解时返回 None
+    """
+    model, x = build_pairing_model(candidates, arr_df, dep_df, params, peak_configs, mandatory_arr, mandatory_dep, env,
+                                   weights)
+    if threads:
+        model.Params.Threads = threads
+
+    # 未给出的变量由Gurobi补全
+    if start is not None:
+        for n in start:
+            x[n].Start = 1
+
+    model.optimize()
+    if model.SolCount == 0:
+        return None
+    return np.array(model.getAttr('X', x)) > 0.5
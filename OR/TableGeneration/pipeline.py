@@ -0,0 +1,161 @@
+import argparse
+import os
+
+import pandas as pd
+
+from after_task2 import extend_pairing
+from fused_pairing import pair_flights_multiday
+from pre_task2 import prepare_flights, find_peak_windows
+from stage_cache import STAGE_CACHE_DIR, cached_stage
+from task1 import solve_dynamic_schedule
+from task2 import pair_flights
+from utils import INPUT_FILE, load_schedule_parameters
+from utils2 import build_peak_configs
+
+# 各步骤的输出文件，与单独运行各脚本时的文件名相同
+STAGE_FILES = {
+    'task1': 'dynamic_sheet.xlsx',
+    'pre_task2': 'pre_task2.xlsx',
+    'task2': 'output_flight_pairing.xlsx',
+    'after_task2': 'final_pairing.xlsx',
+}
+
+# 各步骤实际使用的输入参数，只有这些参数变化时才重新运行该步骤
+STAGE_PARAMETERS = {
+    'task1': ['ref_arr_dom', 'ref_arr_int', 'ref_dep_dom', 'ref_dep_int',
+              'H_arr_dom', 'H_arr_int', 'H_dep_dom', 'H_dep_int',
+              'ARR_DOM_MAX', 'ARR_INT_MAX', 'DEP_DOM_MAX', 'DEP_INT_MAX',
+              'ARR_MAX', 'DEP_MAX', 'DOM_MAX', 'INT_MAX', 'TOT_MAX',
+              'ARR_LIMIT', 'DEP_LIMIT', 'TOT_LIMIT', 'ARR_15_LIMIT', 'DEP_15_LIMIT', 'TOT_15_LIMIT'],
+    'pre_task2': ['DOM_MIX_p', 'INT_MIX_p'],
+    'task2': ['DOM_INT_MIX_p', 'quotas', 'min_times', 'dep_hour_distribution'],
+    'after_task2': ['quotas', 'min_times'],
+    'fused_pairing': ['DOM_INT_MIX_p', 'quotas', 'min_times', 'dep_hour_distribution'],
+}
+
+
+def write_flights(path, arr_df, dep_df):
+    """将到达和出发航班表写入Excel文件的两个sheet"""
+    with pd.ExcelWriter(path) as writer:
+        arr_df.to_excel(writer, sheet_name='到达航班', index=False)
+        dep_df.to_excel(writer, sheet_name='出发航班', index=False)
+
+
+def stage_inputs(params, stage, **inputs):
+    """
+    返回某个步骤的全部输入，用于计算该步骤的缓存键
+
+    Args:
+        params: 时刻表输入参数
+        stage: 步骤名称，取值见 STAGE_PARAMETERS
+        inputs: 上一步骤的结果等其它输入
+
+    Returns:
+        dict: 该步骤使用的参数字段及其它输入
+    """
+    depends = {field: getattr(params, field) for field in STAGE_PARAMETERS[stage]}
+    depends.update(inputs)
+    return depends
+
+
+def run_pipeline(params=None, dynamic_df=None, write_stages=(), output_dir='.', cache_dir=STAGE_CACHE_DIR,
+                 fused=False):
+    """
+    在内存中依次运行 task1、pre_task2、task2、after_task2
+
+    各步骤之间直接传递DataFrame，不经过Excel文件；只有 write_stages 中的步骤写出Excel文件，
+    文件名与单独运行各脚本时相同，可用单独的脚本从任一步骤继续运行。
+    各步骤的结果按输入内容（上一步骤的结果、STAGE_PARAMETERS 中的参数和代码）的哈希缓存在 cache_dir 中，
+    输入未变化的步骤直接读取缓存，只重新运行受修改影响的步骤及其后续步骤。
+
+    Args:
+        params: 时刻表输入参数，为 None 时读取 utils.INPUT_FILE，见 utils.load_schedule_parameters
+        dynamic_df: 已有的动态时刻表，给出时跳过 task1
+        write_stages: 需要写出Excel文件的步骤，取值见 STAGE_FILES
+        output_dir: Excel文件输出目录
+        cache_dir: 步骤结果缓存目录，为 None 时不使用缓存，见 stage_cache.py
+        fused: 是否用 fused_pairing.pair_flights_multiday 在一个模型中完成 task2 和 after_task2，
+            结果记为 after_task2，没有 task2 的结果
+
+    Returns:
+        dict: 各步骤的结果，'task1' 为动态时刻表，其余为 (到达航班表, 出发航班表)
+    """
+    unknown = set(write_stages) - set(STAGE_FILES)
+    if unknown:
+        raise ValueError(f"未知的步骤: {sorted(unknown)}")
+    if fused and 'task2' in write_stages:
+        raise ValueError("合并配对时没有 task2 的结果")
+    if params is None:
+        params = load_schedule_parameters()
+    if write_stages:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def output_path(stage):
+        return os.path.join(output_dir, STAGE_FILES[stage])
+
+    results = {}
+
+    # task1：动态时刻表
+    if dynamic_df is None:
+        dynamic_df = cached_stage(cache_dir, 'task1', lambda: solve_dynamic_schedule(params),
+                                  depends=stage_inputs(params, 'task1'))
+        if dynamic_df is None:
+            raise RuntimeError("动态时刻表模型无解")
+    results['task1'] = dynamic_df
+    if 'task1' in write_stages:
+        dynamic_df.to_excel(output_path('task1'), index=False)
+
+    # pre_task2：展开为逐航班记录，高峰时段在task2和after_task2中共用
+    arr_df, dep_df = cached_stage(cache_dir, 'pre_task2', lambda: prepare_flights(dynamic_df, params),
+                                  depends=stage_inputs(params, 'pre_task2', dynamic_df=dynamic_df))
+    peak_configs = build_peak_configs(find_peak_windows(arr_df, dep_df), params)
+    results['pre_task2'] = (arr_df, dep_df)
+    if 'pre_task2' in write_stages:
+        write_flights(output_path('pre_task2'), arr_df, dep_df)
+
+    # 合并配对：一个模型完成当日配对和跨夜配对，替代 task2 和 after_task2
+    if fused:
+        arr_df, dep_df = cached_stage(cache_dir, 'fused_pairing',
+                                      lambda: pair_flights_multiday(arr_df, dep_df, params, peak_configs),
+                                      depends=stage_inputs(params, 'fused_pairing', arr_df=arr_df, dep_df=dep_df,
+                                                           peak_configs=peak_configs))
+        results['after_task2'] = (arr_df, dep_df)
+        if 'after_task2' in write_stages:
+            write_flights(output_path('after_task2'), arr_df, dep_df)
+        return results
+
+    # task2：航班配对
+    arr_df, dep_df = cached_stage(cache_dir, 'task2', lambda: pair_flights(arr_df, dep_df, params, peak_configs),
+                                  depends=stage_inputs(params, 'task2', arr_df=arr_df, dep_df=dep_df,
+                                                       peak_configs=peak_configs))
+    results['task2'] = (arr_df, dep_df)
+    if 'task2' in write_stages:
+        write_flights(output_path('task2'), arr_df, dep_df)
+
+    # after_task2：日期2到达与日期3出发配对
+    arr_df, dep_df = cached_stage(cache_dir, 'after_task2',
+                                  lambda: extend_pairing(arr_df, dep_df, params, peak_configs),
+                                  depends=stage_inputs(params, 'after_task2', arr_df=arr_df, dep_df=dep_df,
+                                                       peak_configs=peak_configs))
+    results['after_task2'] = (arr_df, dep_df)
+    if 'after_task2' in write_stages:
+        write_flights(output_path('after_task2'), arr_df, dep_df)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="在内存中运行完整的时刻表生成流程")
+    parser.add_argument('--input', default=INPUT_FILE, help="时刻表输入文件")
+    parser.add_argument('--dynamic', default=None, help="已有的动态时刻表文件，给出时跳过task1")
+    parser.add_argument('--write', nargs='*', default=['after_task2'],
+                        help=f"需要写出Excel文件的步骤，可选 {' '.join(STAGE_FILES)}，默认只写出最终结果")
+    parser.add_argument('--output-dir', default='.', help="Excel文件输出目录")
+    parser.add_argument('--no-cache', action='store_true', help="不使用步骤结果缓存，所有步骤重新运行")
+    parser.add_argument('--fused', action='store_true',
+                        help="用合并配对模型（fused_pairing）替代task2和after_task2，不能与 --write task2 同时使用")
+    args = parser.parse_args()
+
+    dynamic = pd.read_excel(args.dynamic, dtype={'Time': str}) if args.dynamic else None
+    run_pipeline(load_schedule_parameters(args.input), dynamic, args.write, args.output_dir,
+                 None if args.no_cache else STAGE_CACHE_DIR, args.fused)
@@ -1,36 +1,22 @@
-from datetime import timedelta, datetime
-
+import numpy as np
 import pandas as pd
-from utils import xls
+from utils import load_schedule_parameters
 
-df2 = pd.read_excel(xls, sheet_name="其它参数设置")
-DOM_MIX_p = df2.iloc[20, 3]
-INT_MIX_p = df2.iloc[20, 4]
+# 动态时刻表中的四类流量
+FLOWS = ['ARR_DOM', 'ARR_INT', 'DEP_DOM', 'DEP_INT']
 
-# 新增功能：统计第二天各类别高峰时段
-def find_peak_window(df, market, direction):
-    """找出指定市场和方向的高峰时段"""
-    df = df[(df['市场'] == market) & (df['日期'] == 2)]
-    time_counts = []
-
-    # 生成所有有效时间窗口
-    for start_time in pd.date_range("00:00", "23:59", freq="5T").time:
-        start_min = start_time.hour * 60 + start_time.minute
-        if start_min + 55 > 1439:  # 过滤跨日窗口
-            continue
-
-        # 计算时间窗口
-        start_str = start_time.strftime("%H:%M")
-        end_time = (datetime.combine(datetime.today(), start_time)
-                    + timedelta(minutes=55)).time().strftime("%H:%M")
-        window = f"{start_str}-{end_time}"
-
-        # 统计该窗口内的航班数
-        mask = df['时间'].between(start_str, end_time)
-        time_counts.append((window, mask.sum()))
+# 高峰时段统计的类别：{类别: (市场, 方向)}
+PEAK_CATEGORIES = {
+    "国内双向": ("DOM", "both"),
+    "国内进港": ("DOM", "ARR"),
+    "国内离港": ("DOM", "DEP"),
+    "国际双向": ("INT", "both"),
+    "国际进港": ("INT", "ARR"),
+    "国际离港": ("INT", "DEP")
+}
 
-    # 找出最高峰窗口
-    return max(time_counts, key=lambda x: x[1]) if time_counts else ("N/A", 0)
+# 一天的分钟数
+MINUTES_PER_DAY = 1440
 
 
 # 为每个类别计算高峰时段（使用向量化操作优化性能）
@@ -42,153 +28,233 @@ def add_minutes_column(df):
     return df
 
 
-# 定义统计函数
-def count_in_window(start_min, market, direction):
-    """统计指定时间窗口的航班数"""
-    end_min = start_min + 55
-    if direction == "ARR":
-        df = arr_df_day2[arr_df_day2['市场'] == market]
-    elif direction == "DEP":
-        df = dep_df_day2[dep_df_day2['市场'] == market]
-    return ((df['minutes'] >= start_min) & (df['minutes'] <= end_min)).sum()
-
-
-# 读取Excel文件
-# df = pd.read_excel('TFU_dynamic_sheet2040_rand_smooth_2-23_ZG.xlsx', dtype={'Time': str})
-df = pd.read_excel('dynamic_sheet.xlsx', dtype={'Time': str})
-# 各类型高峰时段统计：
-# 国内双向    : 13:20-14:15 (119 架次)(0.84%)
-# 国内进港    : 13:30-14:25 (71 架次)(1.41%)
-# 国内离港    : 07:35-08:30 (77 架次)(1.3%)
-# 国际双向    : 01:50-02:45 (26 架次)(3.85%)
-# 国际进港    : 22:25-23:20 (16 架次)(6.25%)
-# 国际离港    : 09:05-10:00 (18 架次)(5.56%)
-records = []
-
-for _, row in df.iterrows():
-    time = row['Time']
-
-    # 处理ARR组（到达航班）
-    for _ in range(row['ARR_DOM']):
-        records.append({
-            'ID': '',
-            '时间': time,
-            '市场': 'DOM',
-            '进出港': 'ARR',
-            '机型': '',
-            '日期': 2
-        })
-    for _ in range(row['ARR_INT']):
-        records.append({
-            'ID': '',
-            '时间': time,
-            '市场': 'INT',
-            '进出港': 'ARR',
-            '机型': '',
-            '日期': 2
-        })
-
-    # 处理DEP组（出发航班）
-    for _ in range(row['DEP_DOM']):
-        records.append({
-            'ID': '',
-            '时间': time,
-            '市场': 'DOM',
-            '进出港': 'DEP',
-            '机型': '',
-            '日期': 2
-        })
-    for _ in range(row['DEP_INT']):
-        records.append({
-            'ID': '',
-            '时间': time,
-            '市场': 'INT',
-            '进出港': 'DEP',
-            '机型': '',
-            '日期': 2
-        })
-
-# 创建完整DataFrame
-full_df = pd.DataFrame(records)[['ID', '时间', '市场', '进出港', '机型', '日期']]
-
-# 分组处理
-arr_df = full_df[full_df['进出港'] == 'ARR']
-dep_df = full_df[full_df['进出港'] == 'DEP']
-
-# 统计日期为2的0-10点出港航班数量
-dep_flights_2_0_10 = dep_df[(dep_df['日期'] == 2) & (dep_df['时间'].between('00:00', '10:00'))].shape[0]
-
-# 国际出港航班数量
-international_flights = \
-    dep_df[(dep_df['日期'] == 2) & (dep_df['时间'].between('00:00', '10:00')) & (dep_df['市场'] == 'INT')].shape[0]
-
-# 国内出港航班数量
-domestic_flights = \
-    dep_df[(dep_df['日期'] == 2) & (dep_df['时间'].between('00:00', '10:00')) & (dep_df['市场'] == 'DOM')].shape[0]
-
-print(f"日期为2的0-10点出港航班数量: {dep_flights_2_0_10}")
-print(f"其中国际出港航班数量: {international_flights}")
-print(f"其中国内出港航班数量: {domestic_flights}")
-
-day1_int_flights = round(international_flights * INT_MIX_p)
-day1_dom_flights = round(domestic_flights * DOM_MIX_p)
-print(f'第一天国际航班量：{day1_int_flights}')
-print(f'第一天国内航班量：{day1_dom_flights}')
-
-late_int_flights = arr_df[arr_df['市场'] == 'INT'].sort_values('时间', ascending=False).head(day1_int_flights)
-late_dom_flights = arr_df[arr_df['市场'] == 'DOM'].sort_values('时间', ascending=False).head(day1_dom_flights)
-late_flights = pd.concat([late_int_flights, late_dom_flights])
-late_flights['日期'] = 1
-
-arr_df = pd.concat([late_flights, arr_df]).reset_index(drop=True)
-
-# 预处理数据
-arr_df_day2 = add_minutes_column(arr_df[arr_df['日期'] == 2])
-dep_df_day2 = add_minutes_column(dep_df[dep_df['日期'] == 2])
-
-# 主分析逻辑
-categories = {
-    "国内双向": ("DOM", "both"),
-    "国内进港": ("DOM", "ARR"),
-    "国内离港": ("DOM", "DEP"),
-    "国际双向": ("INT", "both"),
-    "国际进港": ("INT", "ARR"),
-    "国际离港": ("INT", "DEP")
-}
+def minutes_to_time(minutes):
+    """将分钟数转换为 HH:MM 字符串"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def minute_histograms(arr_df, dep_df, categories=PEAK_CATEGORIES):
+    """
+    统计日期为2的各类别每分钟的航班数
 
-peak_results = {}
-for cat_name, (market, direction) in categories.items():
-    max_count = 0
-    best_window = ""
+    Args:
+        arr_df: 到达航班表
+        dep_df: 出发航班表
+        categories: {类别: (市场, 方向)}，方向为 'ARR'、'DEP' 或 'both'
 
-    # 遍历所有时间窗口
-    for start_time in pd.date_range("00:00", "23:59", freq="5min").time:
-        start_min = start_time.hour * 60 + start_time.minute
-        if start_min + 55 > 1439:
+    Returns:
+        ndarray: 形状为 (类别数, 1440)，行的顺序与 categories 相同
+    """
+    # 市场和方向的四种组合各统计一次，双向类别为进港和离港之和
+    markets = ['DOM', 'INT']
+    counts = {(market, direction): np.zeros(MINUTES_PER_DAY, dtype=np.int64)
+              for market in markets for direction in ['ARR', 'DEP']}
+    for direction, df in [('ARR', arr_df), ('DEP', dep_df)]:
+        df = df[df['日期'] == 2]
+        if df.empty:
             continue
+        df = add_minutes_column(df)
+        market_index = df['市场'].map({market: i for i, market in enumerate(markets)}).fillna(-1).to_numpy(dtype=int)
+        keep = market_index >= 0
+        flat = np.bincount(market_index[keep] * MINUTES_PER_DAY + df['minutes'].to_numpy()[keep],
+                           minlength=len(markets) * MINUTES_PER_DAY)
+        for i, market in enumerate(markets):
+            counts[(market, direction)] = flat[i * MINUTES_PER_DAY:(i + 1) * MINUTES_PER_DAY]
+
+    histograms = np.zeros((len(categories), MINUTES_PER_DAY), dtype=np.int64)
+    for row, (market, direction) in enumerate(categories.values()):
+        for d in (['ARR', 'DEP'] if direction == 'both' else [direction]):
+            histograms[row] += counts[(market, d)]
+    return histograms
+
+
+def window_counts(histograms, window_minutes=60, step=5):
+    """
+    用前缀和计算所有时间窗口内的航班数
+
+    窗口起点为 0、step、2*step……，包含 [起点, 起点 + window_minutes - step] 的航班，
+    与按 step 分钟时段统计的 window_minutes 分钟窗口一致；不统计跨日窗口。
+
+    Args:
+        histograms: 每分钟航班数，形状为 (类别数, 1440)
+        window_minutes: 窗口长度（分钟），如 15、30、60
+        step: 窗口起点间隔（分钟）
+
+    Returns:
+        (各窗口起点的分钟数, 形状为 (类别数, 窗口数) 的航班数)
+    """
+    span = window_minutes - step
+    starts = np.arange(0, MINUTES_PER_DAY - span, step)
+    cumulative = np.zeros((histograms.shape[0], MINUTES_PER_DAY + 1), dtype=np.int64)
+    np.cumsum(histograms, axis=1, out=cumulative[:, 1:])
+    return starts, cumulative[:, starts + span + 1] - cumulative[:, starts]
+
+
+def peak_windows(arr_df, dep_df, window_minutes=60, step=5, categories=PEAK_CATEGORIES):
+    """
+    找出日期为2的各类别高峰时段，并列时取最早的窗口
+
+    Args:
+        arr_df: 到达航班表
+        dep_df: 出发航班表
+        window_minutes: 窗口长度（分钟）
+        step: 窗口起点间隔（分钟）
+        categories: {类别: (市场, 方向)}
+
+    Returns:
+        dict: {类别: ('HH:MM-HH:MM', 架次)}
+    """
+    starts, counts = window_counts(minute_histograms(arr_df, dep_df, categories), window_minutes, step)
+    best = counts.argmax(axis=1)
+    span = window_minutes - step
+    return {name: (f"{minutes_to_time(starts[i])}-{minutes_to_time(starts[i] + span)}", int(counts[row, i]))
+            for row, (name, i) in enumerate(zip(categories, best))}
 
-        # 计算窗口航班数
-        if direction == "both":
-            count = count_in_window(start_min, market, "ARR") + count_in_window(start_min, market, "DEP")
-        else:
-            count = count_in_window(start_min, market, direction)
-
-        # 更新最大值
-        if count > max_count or (count == max_count and best_window == ""):
-            max_count = count
-            window_start = start_time.strftime("%H:%M")
-            window_end = (datetime.combine(datetime.today(), start_time)
-                          + timedelta(minutes=55)).time().strftime("%H:%M")
-            best_window = f"{window_start}-{window_end}"
-
-    peak_results[cat_name] = (best_window, max_count)
-
-# 打印结果
-print("\n各类型高峰时段统计：")
-for category, (window, count) in peak_results.items():
-    print(f"{category.ljust(8)}: {window} ({count} 架次)({round((1 / count) * 100, 2)}%)")
-
-# 保存到不同sheet
-with pd.ExcelWriter('pre_task2.xlsx') as writer:
-    arr_df.to_excel(writer, sheet_name='到达航班', index=False)
-    dep_df.to_excel(writer, sheet_name='出发航班', index=False)
+
+# 新增功能：统计第二天各类别高峰时段
+def find_peak_window(df, market, direction):
+    """找出指定市场的高峰时段，df 中的航班不区分方向全部统计"""
+    return peak_windows(df, df.iloc[:0], categories={'peak': (market, 'ARR')})['peak']
+
+
+def expand_flows(dynamic_df, direction, day=2):
+    """
+    按某个方向国内、国际两列的航班数展开为逐航班的记录
+
+    Args:
+        dynamic_df: 动态时刻表，航班数为非负整数
+        direction: 'ARR' 或 'DEP'
+        day: 记录的日期
+
+    Returns:
+        航班表，按时段排列，同一时段内国内在前、国际在后
+    """
+    markets = np.array(['DOM', 'INT'])
+    # 按行展平后为 时段1国内、时段1国际、时段2国内……，与逐行展开的顺序相同
+    counts = dynamic_df[[f'{direction}_{market}' for market in markets]].to_numpy().clip(min=0).ravel()
+    times = np.repeat(dynamic_df['Time'].to_numpy(), len(markets))
+    n = int(counts.sum())
+    return pd.DataFrame({
+        'ID': np.full(n, np.nan),
+        '时间': np.repeat(times, counts),
+        '市场': np.repeat(np.tile(markets, len(dynamic_df)), counts),
+        '进出港': direction,
+        '机型': np.full(n, np.nan),
+        '日期': np.full(n, day, dtype=np.int64)
+    })
+
+
+def expand_dynamic_schedule(dynamic_df):
+    """
+    将动态时刻表展开为逐航班的记录
+
+    Args:
+        dynamic_df: 动态时刻表，列为 Time、ARR_DOM、ARR_INT、DEP_DOM、DEP_INT，见 task1.py
+
+    Returns:
+        (到达航班表, 出发航班表)，日期均为2，ID和机型为空
+    """
+    # 求解结果可能为浮点数，取整后展开
+    dynamic_df = dynamic_df.copy()
+    dynamic_df[FLOWS] = dynamic_df[FLOWS].round().astype(int)
+
+    return expand_flows(dynamic_df, 'ARR'), expand_flows(dynamic_df, 'DEP')
+
+
+def add_day1_arrivals(arr_df, dep_df, params):
+    """
+    按日期为2的0-10点出港航班数量和比例，将最晚的若干到达航班复制为日期1的到达航班
+
+    Args:
+        arr_df: 到达航班表
+        dep_df: 出发航班表
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+
+    Returns:
+        加入日期1到达航班后的到达航班表
+    """
+    # 统计日期为2的0-10点出港航班数量
+    dep_flights_2_0_10 = dep_df[(dep_df['日期'] == 2) & (dep_df['时间'].between('00:00', '10:00'))].shape[0]
+
+    # 国际出港航班数量
+    international_flights = \
+        dep_df[(dep_df['日期'] == 2) & (dep_df['时间'].between('00:00', '10:00')) & (dep_df['市场'] == 'INT')].shape[0]
+
+    # 国内出港航班数量
+    domestic_flights = \
+        dep_df[(dep_df['日期'] == 2) & (dep_df['时间'].between('00:00', '10:00')) & (dep_df['市场'] == 'DOM')].shape[0]
+
+    print(f"日期为2的0-10点出港航班数量: {dep_flights_2_0_10}")
+    print(f"其中国际出港航班数量: {international_flights}")
+    print(f"其中国内出港航班数量: {domestic_flights}")
+
+    day1_int_flights = round(international_flights * params.INT_MIX_p)
+    day1_dom_flights = round(domestic_flights * params.DOM_MIX_p)
+    print(f'第一天国际航班量：{day1_int_flights}')
+    print(f'第一天国内航班量：{day1_dom_flights}')
+
+    late_int_flights = arr_df[arr_df['市场'] == 'INT'].sort_values('时间', ascending=False).head(day1_int_flights)
+    late_dom_flights = arr_df[arr_df['市场'] == 'DOM'].sort_values('时间', ascending=False).head(day1_dom_flights)
+    late_flights = pd.concat([late_int_flights, late_dom_flights])
+    late_flights['日期'] = 1
+
+    return pd.concat([late_flights, arr_df]).reset_index(drop=True)
+
+
+def find_peak_windows(arr_df, dep_df, window_minutes=60):
+    """
+    统计日期为2的各类别高峰时段
+
+    Args:
+        arr_df: 到达航班表
+        dep_df: 出发航班表
+        window_minutes: 窗口长度（分钟），默认为高峰小时
+
+    Returns:
+        dict: {类别: ('HH:MM-HH:MM', 架次)}，类别见 PEAK_CATEGORIES
+    """
+    peak_results = peak_windows(arr_df, dep_df, window_minutes)
+
+    # 打印结果
+    print("\n各类型高峰时段统计：")
+    for category, (window, count) in peak_results.items():
+        print(f"{category.ljust(8)}: {window} ({count} 架次)({round((1 / count) * 100, 2)}%)")
+    return peak_results
+
+
+def prepare_flights(dynamic_df, params):
+    """
+    由动态时刻表生成任务2的到达和出发航班表
+
+    Args:
+        dynamic_df: 动态时刻表，见 task1.py
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+
+    Returns:
+        (到达航班表, 出发航班表)
+    """
+    arr_df, dep_df = expand_dynamic_schedule(dynamic_df)
+    arr_df = add_day1_arrivals(arr_df, dep_df, params)
+    return arr_df, dep_df
+
+
+if __name__ == "__main__":
+    params = load_schedule_parameters()
+
+    # 读取Excel文件
+    # df = pd.read_excel('TFU_dynamic_sheet2040_rand_smooth_2-23_ZG.xlsx', dtype={'Time': str})
+    df = pd.read_excel('dynamic_sheet.xlsx', dtype={'Time': str})
+    # 各类型高峰时段统计：
+    # 国内双向    : 13:20-14:15 (119 架次)(0.84%)
+    # 国内进港    : 13:30-14:25 (71 架次)(1.41%)
+    # 国内离港    : 07:35-08:30 (77 架次)(1.3%)
+    # 国际双向    : 01:50-02:45 (26 架次)(3.85%)
+    # 国际进港    : 22:25-23:20 (16 架次)(6.25%)
+    # 国际离港    : 09:05-10:00 (18 架次)(5.56%)
+    arr_df, dep_df = prepare_flights(df, params)
+    find_peak_windows(arr_df, dep_df)
+
+    # 保存到不同sheet
+    with pd.ExcelWriter('pre_task2.xlsx') as writer:
+        arr_df.to_excel(writer, sheet_name='到达航班', index=False)
+        dep_df.to_excel(writer, sheet_name='出发航班', index=False)
@@ -0,0 +1,178 @@
+import argparse
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# 本文件与 OR/AirlineHeadingMatch/stage_cache.py 为有意保留的两份副本：两个目录各自作为脚本目录运行，互不导入；
+# 本目录的参数都写在各脚本顶部，随代码指纹计入哈希，因此不排除任何文件。修改缓存格式时两份需同步修改
+
+# 步骤结果缓存目录，为 None 时不使用缓存
+STAGE_CACHE_DIR = ".stage_cache"
+
+# 缓存格式版本，缓存写法变化时修改此值使旧缓存失效
+CACHE_VERSION = 1
+
+code_fingerprint_value = None
+
+
+def code_fingerprint():
+    """返回本目录下代码文件的内容哈希，代码（包括各脚本顶部的参数）修改后所有步骤的缓存失效"""
+    global code_fingerprint_value
+    if code_fingerprint_value is None:
+        digest = hashlib.sha1()
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+            digest.update(os.path.basename(path).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        code_fingerprint_value = digest.hexdigest()
+    return code_fingerprint_value
+
+
+def update_hash(digest, value):
+    """
+    将输入内容写入哈希
+
+    支持 DataFrame、Series、ndarray、dict、list、tuple（含namedtuple）、set 及标量，
+    dict 和 set 按元素排序后写入，结果与元素顺序无关。
+    """
+    if isinstance(value, pd.DataFrame):
+        digest.update(f"DataFrame{value.shape}".encode('utf-8'))
+        update_hash(digest, [repr(column) for column in value.columns])
+        update_hash(digest, [str(dtype) for dtype in value.dtypes])
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(f"Series{len(value)}{value.name!r}{value.dtype}".encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"ndarray{value.shape}{value.dtype}".encode('utf-8'))
+        if value.dtype == object:
+            update_hash(digest, value.tolist())
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(f"dict{len(value)}".encode('utf-8'))
+        for key, item in sorted(value.items(), key=lambda pair: repr(pair[0])):
+            update_hash(digest, key)
+            update_hash(digest, item)
+    elif isinstance(value, (set, frozenset)):
+        digest.update(f"set{len(value)}".encode('utf-8'))
+        for item in sorted(value, key=repr):
+            update_hash(digest, item)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode('utf-8'))
+        for item in value:
+            update_hash(digest, item)
+    else:
+        digest.update(f"{type(value).__name__}:{value!r};".encode('utf-8'))
+
+
+def stage_key(name, args=(), kwargs=None, depends=None):
+    """
+    计算某个步骤的缓存键
+
+    Args:
+        name: 步骤名称，如 'task2'
+        args: 步骤函数的位置参数
+        kwargs: 步骤函数的关键字参数
+        depends: 参与计算的其它输入，如步骤实际使用的部分时刻表输入参数
+
+    Returns:
+        str: 由步骤名称、代码指纹和全部输入内容确定的哈希
+    """
+    digest = hashlib.sha1(f"{name}|{CACHE_VERSION}|{code_fingerprint()}".encode('utf-8'))
+    update_hash(digest, list(args))
+    update_hash(digest, kwargs or {})
+    update_hash(digest, depends or {})
+    return digest.hexdigest()
+
+
+def stage_path(cache_dir, name, key):
+    """返回某个步骤结果的缓存文件路径"""
+    return os.path.join(cache_dir, f"{name}_{key[:20]}.pkl")
+
+
+def load_stage(cache_dir, name, key):
+    """读取某个步骤的缓存结果，缓存目录为 None、缓存不存在或无法读取时返回 None"""
+    if cache_dir is None:
+        return None
+    path = stage_path(cache_dir, name, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        result = pd.read_pickle(path)
+    except Exception as e:
+        print(f"读取步骤缓存 {path} 失败: {e}")
+        return None
+    print(f"{name} 的输入未变化，使用缓存结果")
+    return result
+
+
+def save_stage(cache_dir, name, key, result):
+    """保存某个步骤的结果，先写临时文件再替换，并行写入时不会读到不完整的文件"""
+    if cache_dir is None:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    path = stage_path(cache_dir, name, key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pd.to_pickle(result, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def cached_stage(cache_dir, name, func, args=(), kwargs=None, depends=None, valid=lambda result: result is not None):
+    """
+    运行某个步骤，输入与之前某次运行完全相同时直接返回缓存结果
+
+    Args:
+        cache_dir: 缓存目录，为 None 时不使用缓存
+        name: 步骤名称
+        func: 步骤函数
+        args: 步骤函数的位置参数
+        kwargs: 步骤函数的关键字参数
+        depends: 参与计算的其它输入
+        valid: 判断结果是否有效的函数，只缓存有效结果（如求解失败时不缓存）
+
+    Returns:
+        func(*args, **kwargs) 的结果
+    """
+    kwargs = kwargs or {}
+    if cache_dir is None:
+        return func(*args, **kwargs)
+
+    key = stage_key(name, args, kwargs, depends)
+    result = load_stage(cache_dir, name, key)
+    if result is not None:
+        return result
+    result = func(*args, **kwargs)
+    if valid(result):
+        save_stage(cache_dir, name, key, result)
+    return result
+
+
+def clear_cache(cache_dir=STAGE_CACHE_DIR):
+    """
+    清除步骤缓存
+
+    Returns:
+        int: 删除的缓存文件数量
+    """
+    if cache_dir is None or not os.path.isdir(cache_dir):
+        return 0
+    files = glob.glob(os.path.join(cache_dir, '*.pkl'))
+    for file in files:
+        os.remove(file)
+    return len(files)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="管理时刻表生成各步骤的结果缓存")
+    parser.add_argument('--clear', action='store_true', help="清除缓存")
+    parser.add_argument('--cache-dir', default=STAGE_CACHE_DIR, help="缓存目录")
+    args = parser.parse_args()
+
+    if args.clear:
+        print(f"已删除 {clear_cache(args.cache_dir)} 个缓存文件")
+    else:
+        parser.print_help()
@@ -0,0 +1,132 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import gurobipy as gp
+import numpy as np
+
+from capacity_check import check_parameters, print_violations
+from task1 import PEAK_MODE, PEAK_MODES, OBJECTIVE, OBJECTIVES, solve_dynamic_schedule
+from task1_matrix import FLOWS, periods_per, schedule_to_frame
+from utils import INPUT_FILE, load_schedule_parameters
+
+# 多方案动态时刻表文件
+BATCH_FILE = 'dynamic_sheets.npz'
+
+
+def solve_seed_in_env(params, seed, peak_mode, objective, threads):
+    """
+    在独立的Gurobi环境中求解一个随机种子的动态时刻表，供进程池调用
+
+    Returns:
+        ndarray: 形状为 (288, 4) 的流量，列顺序同 FLOWS；无解时返回 None
+    """
+    try:
+        with gp.Env(params={'OutputFlag': 0}) as env:
+            df = solve_dynamic_schedule(params, peak_mode, objective, seed, env, threads)
+    except gp.GurobiError as e:
+        print(f"种子 {seed} 求解失败: {e}")
+        return None
+    if df is None:
+        return None
+    return np.round(df[FLOWS].to_numpy(dtype=float)).astype(np.int16)
+
+
+def generate_schedules(params, seeds, workers=None, threads=None, peak_mode=PEAK_MODE, objective=OBJECTIVE):
+    """
+    用不同的随机种子并行生成多个动态时刻表
+
+    各种子的平滑扰动目标权重不同，模型互相独立，每个种子在单独的进程中使用各自的Gurobi环境求解。
+
+    Args:
+        params: 时刻表输入参数，见 utils.load_schedule_parameters
+        seeds: 随机种子列表
+        workers: 并行进程数，为 None 时取种子数和CPU核数中的较小值
+        threads: 每个进程的Gurobi求解线程数，为 None 时CPU核数在各进程间平均分配
+        peak_mode: "至少一个窗口达到动态小时最大值"的建模方式，见 task1.PEAK_MODES
+        objective: 平滑目标，见 task1.OBJECTIVES
+
+    Returns:
+        dict: {种子: 形状为 (288, 4) 的流量}，无解的种子值为 None；输入参数使模型必然无解时返回空dict
+    """
+    # 各种子的约束相同，输入参数的检查只需做一次
+    violations = check_parameters(params)
+    if not violations.empty:
+        print("输入参数使模型无解：")
+        print_violations(violations)
+        return {}
+
+    seeds = list(seeds)
+    workers = workers or min(len(seeds), os.cpu_count() or 1)
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    schedules = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(solve_seed_in_env, params, seed, peak_mode, objective, threads): seed
+                   for seed in seeds}
+        for future in as_completed(futures):
+            seed = futures[future]
+            schedules[seed] = future.result()
+            print(f"种子 {seed}: {'无解' if schedules[seed] is None else '完成'}（{len(schedules)}/{len(seeds)}）")
+    return {seed: schedules[seed] for seed in seeds}
+
+
+def write_schedules(path, schedules):
+    """
+    将多个动态时刻表写入一个压缩的npz文件
+
+    文件包含 seeds（有解的种子）、flows（形状为 (方案数, 288, 4) 的int16流量，列顺序同 FLOWS）
+    和 failed（无解的种子），50个方案只占几十KB。
+
+    Args:
+        path: 输出文件路径
+        schedules: generate_schedules 的结果
+    """
+    solved = [seed for seed, values in schedules.items() if values is not None]
+    failed = [seed for seed, values in schedules.items() if values is None]
+    # 显式给出形状，全部种子无解时也能写出空的 flows
+    flows = np.empty((len(solved), periods_per(24 * 60, 5), len(FLOWS)), dtype=np.int16)
+    for i, seed in enumerate(solved):
+        flows[i] = schedules[seed]
+    np.savez_compressed(path, seeds=np.array(solved, dtype=np.int64), flows=flows,
+                        failed=np.array(failed, dtype=np.int64))
+
+
+def read_schedules(path):
+    """
+    读取 write_schedules 写出的多方案文件
+
+    Returns:
+        dict: {种子: 动态时刻表DataFrame}，格式与 task1.solve_dynamic_schedule 的结果相同
+    """
+    with np.load(path) as data:
+        return {int(seed): schedule_to_frame(values.astype(float))
+                for seed, values in zip(data['seeds'], data['flows'])}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用不同随机种子并行生成多个动态时刻表")
+    parser.add_argument('--input', default=INPUT_FILE, help="时刻表输入文件")
+    parser.add_argument('--count', type=int, default=50, help="生成的方案数")
+    parser.add_argument('--first-seed', type=int, default=0, help="第一个随机种子，依次递增")
+    parser.add_argument('--workers', type=int, default=None, help="并行进程数")
+    parser.add_argument('--threads', type=int, default=None, help="每个进程的Gurobi求解线程数")
+    parser.add_argument('--peak-mode', default=PEAK_MODE, choices=PEAK_MODES, help="达到最大值的建模方式")
+    parser.add_argument('--objective', default=OBJECTIVE, choices=OBJECTIVES, help="平滑目标")
+    parser.add_argument('--output', default=BATCH_FILE, help="多方案输出文件")
+    parser.add_argument('--extract', type=int, default=None,
+                        help="从 --output 文件中取出该种子的方案写为 dynamic_sheet.xlsx，不求解")
+    args = parser.parse_args()
+
+    if args.extract is not None:
+        read_schedules(args.output)[args.extract].to_excel('dynamic_sheet.xlsx', index=False)
+    else:
+        seeds = range(args.first_seed, args.first_seed + args.count)
+        schedules = generate_schedules(load_schedule_parameters(args.input), seeds, args.workers, args.threads,
+                                       args.peak_mode, args.objective)
+        if schedules:
+            write_schedules(args.output, schedules)
+            solved = sum(values is not None for values in schedules.values())
+            if solved:
+                print(f"{solved}/{len(schedules)} 个方案已写入 {args.output}")
+            else:
+                print(f"!!!!!!!! 全部 {len(schedules)} 个种子均无解，{args.output} 中只记录了无解的种子 !!!!!!!!")
@@ -0,0 +1,234 @@
+import gurobipy as gp
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from gurobipy import GRB
+
+from utils import load_schedule_parameters
+
+# 四类流量在决策变量中的顺序
+FLOWS = ['ARR_DOM', 'ARR_INT', 'DEP_DOM', 'DEP_INT']
+
+# 滑动小时约束的九个类别，值为对四类流量的选取系数
+WINDOW_CATEGORIES = {
+    'ARR': [1, 1, 0, 0],
+    'DEP': [0, 0, 1, 1],
+    'TOT': [1, 1, 1, 1],
+    'ARR_DOM': [1, 0, 0, 0],
+    'ARR_INT': [0, 1, 0, 0],
+    'DEP_DOM': [0, 0, 1, 0],
+    'DEP_INT': [0, 0, 0, 1],
+    'DOM': [1, 0, 1, 0],
+    'INT': [0, 1, 0, 1],
+}
+
+# 相邻时段最大变化量 max_delta 按此长度（分钟）的时段总量计算，与 task1.py 的5分钟时段相同，不随决策时段长度变化
+DELTA_MINUTES = 5
+
+# 即时限制和15分钟限制的三个类别
+LIMIT_CATEGORIES = {
+    'ARR': [1, 1, 0, 0],
+    'DEP': [0, 0, 1, 1],
+    'TOT': [1, 1, 1, 1],
+}
+
+
+def window_matrix(num_periods, width, step=1):
+    """
+    构建滑动窗口求和的带状稀疏矩阵
+
+    Args:
+        num_periods: 时段数量
+        width: 窗口包含的时段数
+        step: 相邻窗口起点的间隔，step == width 时为互不重叠的分块求和
+
+    Returns:
+        scipy.sparse.csr_matrix: 第 i 行在时段 [i*step, i*step+width) 上为1
+    """
+    starts = np.arange(0, num_periods - width + 1, step)
+    rows = np.repeat(np.arange(len(starts)), width)
+    cols = (starts[:, None] + np.arange(width)).ravel()
+    return sp.csr_matrix((np.ones(len(cols)), (rows, cols)), shape=(len(starts), num_periods))
+
+
+def difference_matrix(num_periods):
+    """构建相邻时段差分矩阵，第 t 行为 x[t+1] - x[t]"""
+    return sp.diags([-np.ones(num_periods - 1), np.ones(num_periods - 1)], [0, 1],
+                    shape=(num_periods - 1, num_periods), format='csr')
+
+
+def delta_matrix(num_periods, slot_minutes):
+    """构建相邻 DELTA_MINUTES 时段总量的差分矩阵，时段长度为 DELTA_MINUTES 时即为 difference_matrix"""
+    width = periods_per(DELTA_MINUTES, slot_minutes)
+    return (difference_matrix(num_periods // width) @ window_matrix(num_periods, width, width)).tocsr()
+
+
+def category_matrix(categories, num_periods):
+    """构建类别选取矩阵，将按 FLOWS 顺序拼接的决策变量映射为各类别各时段的流量"""
+    return sp.vstack([sp.kron(np.array([coefs]), sp.identity(num_periods)) for coefs in categories.values()],
+                     format='csr')
+
+
+def periods_per(minutes, slot_minutes):
+    """计算给定时长包含的时段数，时长必须为时段长度的整数倍"""
+    if minutes % slot_minutes != 0:
+        raise ValueError(f"{minutes}分钟不是时段长度{slot_minutes}分钟的整数倍")
+    return minutes // slot_minutes
+
+
+def peak_targets(hourly_flows, first_hour=0):
+    """
+    为每个类别选定达到动态小时最大值的位置
+
+    滑动小时最多跨两个整点小时，取静态值之和最大的相邻两小时，在这两小时内的窗口中要求至少一个达到最大值。
+
+    Args:
+        hourly_flows: 规划静态时刻表，形状为 (24, 4)，列顺序同 FLOWS
+        first_hour: 只在第一个小时不早于该值的相邻两小时中选取
+
+    Returns:
+        dict: {类别: 相邻两小时中第一个小时}
+    """
+    hourly = hourly_flows @ np.array(list(WINDOW_CATEGORIES.values()), dtype=float).T
+    pairs = hourly[first_hour:-1] + hourly[first_hour + 1:]
+    return {category: first_hour + int(pairs[:, i].argmax()) for i, category in enumerate(WINDOW_CATEGORIES)}
+
+
+def build_dynamic_schedule_model(ref_flows, hourly_flows, window_max, slot_limits, limits_15,
+                                 slot_minutes=5, max_delta=3, seed=42, env=None):
+    """
+    使用矩阵API构建动态时刻表模型
+
+    滑动小时窗口、15分钟窗口、整点小时和现状时段均为带状稀疏矩阵，对四类流量只构建一次，
+    约束数量与时段数量成线性关系，时段长度可取1分钟或5分钟等能整除5分钟的值。
+
+    Args:
+        ref_flows: 现状动态统计，形状为 (现状时段数, 4)，列顺序同 FLOWS
+        hourly_flows: 规划静态时刻表，形状为 (24, 4)，列顺序同 FLOWS
+        window_max: 各类别的动态小时最大值，键同 WINDOW_CATEGORIES
+        slot_limits: 现状时段粒度（五分钟）的即时限制，键为 ARR、DEP、TOT
+        limits_15: 15分钟上限值，键为 ARR、DEP、TOT
+        slot_minutes: 决策时段长度（分钟）
+        max_delta: 相邻5分钟时段（DELTA_MINUTES）总量的最大变化量，时段长度小于5分钟时按5分钟汇总后约束
+        seed: 平滑扰动目标的随机种子
+        env: Gurobi环境，为 None 时使用默认环境
+
+    Returns:
+        (Gurobi模型, 按 FLOWS 顺序的四个决策变量MVar)
+    """
+    ref_flows = np.asarray(ref_flows, dtype=float)
+    hourly_flows = np.asarray(hourly_flows, dtype=float)
+    num_periods = periods_per(24 * 60, slot_minutes)
+    hour_width = periods_per(60, slot_minutes)
+    ref_width = periods_per(24 * 60 // len(ref_flows), slot_minutes)
+    width_15 = periods_per(15, slot_minutes)
+
+    model = gp.Model('dynamic_schedule', env=env)
+
+    # 定义变量，四类流量拼接为一个向量便于用稀疏矩阵表示各类别
+    flow_vars = [model.addMVar(num_periods, vtype=GRB.INTEGER, name=flow.lower()) for flow in FLOWS]
+    flows = gp.hstack(flow_vars)
+    num_windows = num_periods - hour_width + 1
+    b = gp.hstack([model.addMVar(num_windows, vtype=GRB.BINARY, name=f"b_{category}")
+                   for category in WINDOW_CATEGORIES])
+
+    window_categories = category_matrix(WINDOW_CATEGORIES, num_periods)
+    limit_categories = category_matrix(LIMIT_CATEGORIES, num_periods)
+
+    def per_flow(matrix):
+        return sp.block_diag([matrix] * len(FLOWS), format='csr')
+
+    def repeat(values, categories, size):
+        return np.repeat([values[category] for category in categories], size).astype(float)
+
+    # 约束1：每小时的总和等于静态值
+    model.addConstr(per_flow(window_matrix(num_periods, hour_width, hour_width)) @ flows
+                    == hourly_flows.T.ravel(), name="H")
+
+    # 约束2、3：滑动窗口总和 <= 动态小时最大值，且二元变量=1时必须达到最大值
+    window_sums = sp.block_diag([window_matrix(num_periods, hour_width)] * len(WINDOW_CATEGORIES),
+                                format='csr') @ window_categories
+    window_rhs = repeat(window_max, WINDOW_CATEGORIES, num_windows)
+    model.addConstr(window_sums @ flows <= window_rhs, name="MAX")
+    model.addConstr(window_sums @ flows >= window_rhs * b, name="EQ_MAX")
+
+    # 添加至少一个窗口达标约束
+    model.addConstr(sp.kron(sp.identity(len(WINDOW_CATEGORIES)), np.ones((1, num_windows))) @ b >= 1,
+                    name="AT_LEAST_ONE")
+
+    # 约束4：现状时段粒度的即时限制
+    ref_blocks = window_matrix(num_periods, ref_width, ref_width)
+    model.addConstr(sp.block_diag([ref_blocks] * len(LIMIT_CATEGORIES), format='csr') @ limit_categories @ flows
+                    <= repeat(slot_limits, LIMIT_CATEGORIES, ref_blocks.shape[0]), name="LIMIT")
+
+    # 约束5：现状时段粒度的未来值 >= 现状值
+    model.addConstr(per_flow(ref_blocks) @ flows >= ref_flows.T.ravel(), name="REF")
+
+    # 约束6：进出港15分钟上限值
+    blocks_15 = window_matrix(num_periods, width_15)
+    model.addConstr(sp.block_diag([blocks_15] * len(LIMIT_CATEGORIES), format='csr') @ limit_categories @ flows
+                    <= repeat(limits_15, LIMIT_CATEGORIES, blocks_15.shape[0]), name="15min")
+
+    # 相邻5分钟时段的最大变化量
+    deltas = per_flow(delta_matrix(num_periods, slot_minutes))
+    model.addConstr(deltas @ flows <= max_delta, name="max")
+    model.addConstr(deltas @ flows >= -max_delta, name="min")
+
+    # 整数规划参数调优
+    model.Params.IntegralityFocus = 1  # 强调整数可行性
+    model.Params.Heuristics = 1  # 增加启发式搜索
+    model.Params.Presolve = 1  # 基础预处理
+
+    # === 平滑扰动优化目标 ===
+    model.Params.MIPGap = 0.99  # smooth允许间隙
+    diffs = per_flow(difference_matrix(num_periods))
+    np.random.seed(seed)
+    noise_weights = np.random.uniform(0.5, 1.5, size=(4, num_periods - 1))
+    # 进港、出港总量的相邻差分带随机权重，四类流量的相邻差分权重为1
+    total_diffs = sp.kron(sp.identity(2), difference_matrix(num_periods)) @ limit_categories[:2 * num_periods]
+    smooth = (total_diffs.T @ sp.diags(noise_weights[:2].ravel()) @ total_diffs + diffs.T @ diffs).tocsr()
+    model.setObjective(flows @ smooth @ flows, GRB.MINIMIZE)
+
+    return model, flow_vars
+
+
+def schedule_to_frame(values, slot_minutes=5):
+    """将求解得到的 (时段数, 4) 流量数组整理为带时间列的动态时刻表"""
+    time_index = pd.date_range("00:00", periods=len(values), freq=f"{slot_minutes}min").strftime("%H:%M")
+    df = pd.DataFrame(values, columns=FLOWS, index=time_index)
+    df.reset_index(inplace=True)
+    df.rename(columns={"index": "Time"}, inplace=True)
+    return df
+
+
+def model_inputs(params):
+    """将时刻表输入参数整理为 build_dynamic_schedule_model 的参数"""
+    return dict(
+        ref_flows=np.column_stack([params.ref_arr_dom, params.ref_arr_int, params.ref_dep_dom, params.ref_dep_int]),
+        hourly_flows=np.column_stack([params.H_arr_dom, params.H_arr_int, params.H_dep_dom, params.H_dep_int]),
+        window_max={category: getattr(params, f"{category}_MAX") for category in WINDOW_CATEGORIES},
+        slot_limits={category: getattr(params, f"{category}_LIMIT") for category in LIMIT_CATEGORIES},
+        limits_15={category: getattr(params, f"{category}_15_LIMIT") for category in LIMIT_CATEGORIES},
+    )
+
+
+if __name__ == "__main__":
+    model, flow_vars = build_dynamic_schedule_model(**model_inputs(load_schedule_parameters()))
+    model.optimize()
+
+    # Presolve = 1 时预处理发现无解会返回 INF_OR_UNBD
+    if model.status in (GRB.INFEASIBLE, GRB.INF_OR_UNBD):
+        print("模型无解，正在分析导致无解的约束条件...")
+        model.computeIIS()
+        print("\n以下约束条件导致模型无解:")
+        for c in model.getConstrs():
+            if c.IISConstr:
+                print(f"约束名称: {c.ConstrName}")
+                print(f"约束表达式: {c.Sense} {c.RHS}")
+                print("-" * 50)
+
+    if model.status == GRB.OPTIMAL:
+        df = schedule_to_frame(np.column_stack([var.X for var in flow_vars]))
+        df.to_excel("dynamic_sheet.xlsx", index=False)
+    else:
+        print("!!!!!!!! No solution found !!!!!!!!")
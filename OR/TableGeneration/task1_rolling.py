@@ -0,0 +1,255 @@
+import argparse
+
+import gurobipy as gp
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB
+
+from task1_matrix import (FLOWS, WINDOW_CATEGORIES, LIMIT_CATEGORIES, DELTA_MINUTES, window_matrix,
+                          difference_matrix, delta_matrix, category_matrix, periods_per, peak_targets,
+                          schedule_to_frame, model_inputs)
+from utils import load_schedule_parameters
+
+
+def tail(history, count):
+    """返回已固定时段中的最后 count 个时段"""
+    return history[max(len(history) - count, 0):]
+
+
+def with_history(matrix, history):
+    """
+    将作用于 [已固定时段, 本段时段] 的矩阵拆分为决策变量部分和常数部分
+
+    Args:
+        matrix: 列数为 len(history) + 本段时段数的稀疏矩阵，对每类流量相同
+        history: 已固定时段的流量，形状为 (时段数, 4)，列顺序同 FLOWS
+
+    Returns:
+        (作用于按 FLOWS 顺序拼接的本段决策变量的矩阵, 已固定时段贡献的常数向量)
+    """
+    k = len(history)
+    free = sp.block_diag([matrix[:, k:]] * len(FLOWS), format='csr')
+    constant = np.concatenate([matrix[:, :k] @ history[:, i] for i in range(len(FLOWS))])
+    return free, constant
+
+
+def reached_categories(schedule, window_max, hour_width):
+    """返回已固定时段中已有滑动小时达到最大值的类别"""
+    if len(schedule) < hour_width:
+        return set()
+    categories = schedule @ np.array(list(WINDOW_CATEGORIES.values()), dtype=float).T
+    peaks = (window_matrix(len(schedule), hour_width) @ categories).max(axis=0)
+    return {category for i, category in enumerate(WINDOW_CATEGORIES) if peaks[i] >= window_max[category]}
+
+
+def build_block_model(ref_flows, hourly_flows, window_max, slot_limits, limits_15, start, end, history,
+                      reach, noise_weights, slot_minutes=1, max_delta=3, env=None):
+    """
+    构建滚动时域中一段时段 [start, end) 的动态时刻表模型
+
+    约束与 task1_matrix.build_dynamic_schedule_model 相同；跨越已固定时段的滑动小时、15分钟窗口和相邻差分
+    将已固定时段作为常数，只有 reach 中的类别需要达到动态小时最大值。
+
+    Args:
+        ref_flows, hourly_flows, window_max, slot_limits, limits_15: 见 task1_matrix.build_dynamic_schedule_model
+        start: 本段第一个时段，须为整点
+        end: 本段结束时段（不含），须为整点
+        history: 本段之前已固定的全部时段流量，形状为 (start, 4)
+        reach: {类别: (最早窗口起点, 最晚窗口起点)}，本段需在这些窗口中达到最大值的类别
+        noise_weights: 全天平滑扰动目标的随机权重，形状为 (4, 时段数 - 1)
+        slot_minutes: 决策时段长度（分钟）
+        max_delta: 相邻5分钟时段总量的最大变化量，见 task1_matrix.build_dynamic_schedule_model
+        env: Gurobi环境，为 None 时使用默认环境
+
+    Returns:
+        (Gurobi模型, 按 FLOWS 顺序的四个决策变量MVar)
+    """
+    num_periods = end - start
+    hour_width = periods_per(60, slot_minutes)
+    ref_width = periods_per(24 * 60 // len(ref_flows), slot_minutes)
+    width_15 = periods_per(15, slot_minutes)
+    no_history = history[:0]
+
+    model = gp.Model('dynamic_schedule_block', env=env)
+    flow_vars = [model.addMVar(num_periods, vtype=GRB.INTEGER, name=flow.lower()) for flow in FLOWS]
+    flows = gp.hstack(flow_vars)
+
+    def repeat(values, categories, size):
+        return np.repeat([values[category] for category in categories], size).astype(float)
+
+    # 约束1：本段每小时的总和等于静态值
+    hours, _ = with_history(window_matrix(num_periods, hour_width, hour_width), no_history)
+    model.addConstr(hours @ flows == hourly_flows[start // hour_width:end // hour_width].T.ravel(), name="H")
+
+    # 约束2：滑动窗口总和 <= 动态小时最大值，窗口可包含已固定时段
+    window_history = tail(history, hour_width - 1)
+    windows, window_constant = with_history(window_matrix(len(window_history) + num_periods, hour_width),
+                                            window_history)
+    num_windows = windows.shape[0] // len(FLOWS)
+    window_categories = category_matrix(WINDOW_CATEGORIES, num_windows)
+    window_sums = (window_categories @ windows).tocsr()
+    window_constant = window_categories @ window_constant
+    window_rhs = repeat(window_max, WINDOW_CATEGORIES, num_windows)
+    model.addConstr(window_sums @ flows <= window_rhs - window_constant, name="MAX")
+
+    # 约束3：选定位置的窗口中至少一个达到最大值
+    window_starts = start - len(window_history) + np.arange(num_windows)
+    for i, category in enumerate(WINDOW_CATEGORIES):
+        if category not in reach:
+            continue
+        first, last = reach[category]
+        rows = i * num_windows + np.nonzero((window_starts >= first) & (window_starts <= last))[0]
+        b = model.addMVar(len(rows), vtype=GRB.BINARY, name=f"b_{category}")
+        model.addConstr(window_sums[rows] @ flows + window_constant[rows] >= window_max[category] * b,
+                        name=f"EQ_MAX_{category}")
+        model.addConstr(b.sum() >= 1, name=f"AT_LEAST_ONE_{category}")
+
+    # 约束4、5：现状时段粒度的即时限制和现状值
+    ref_blocks, _ = with_history(window_matrix(num_periods, ref_width, ref_width), no_history)
+    num_ref = ref_blocks.shape[0] // len(FLOWS)
+    model.addConstr(category_matrix(LIMIT_CATEGORIES, num_ref) @ ref_blocks @ flows
+                    <= repeat(slot_limits, LIMIT_CATEGORIES, num_ref), name="LIMIT")
+    model.addConstr(ref_blocks @ flows >= ref_flows[start // ref_width:end // ref_width].T.ravel(), name="REF")
+
+    # 约束6：进出港15分钟上限值，窗口可包含已固定时段
+    history_15 = tail(history, width_15 - 1)
+    blocks_15, constant_15 = with_history(window_matrix(len(history_15) + num_periods, width_15), history_15)
+    num_15 = blocks_15.shape[0] // len(FLOWS)
+    limit_categories = category_matrix(LIMIT_CATEGORIES, num_15)
+    model.addConstr(limit_categories @ blocks_15 @ flows
+                    <= repeat(limits_15, LIMIT_CATEGORIES, num_15) - limit_categories @ constant_15, name="15min")
+
+    # 相邻5分钟时段的最大变化量，包含已固定的最后一个5分钟时段与本段第一个5分钟时段之差
+    delta_history = tail(history, periods_per(DELTA_MINUTES, slot_minutes))
+    deltas, delta_constant = with_history(delta_matrix(len(delta_history) + num_periods, slot_minutes),
+                                          delta_history)
+    model.addConstr(deltas @ flows + delta_constant <= max_delta, name="max")
+    model.addConstr(deltas @ flows + delta_constant >= -max_delta, name="min")
+
+    # 整数规划参数调优
+    model.Params.IntegralityFocus = 1  # 强调整数可行性
+    model.Params.Heuristics = 1  # 增加启发式搜索
+    model.Params.Presolve = 1  # 基础预处理
+
+    # === 平滑扰动优化目标 ===
+    # 与全天模型相同：进港、出港总量的相邻差分带随机权重，四类流量的相邻差分权重为1
+    model.Params.MIPGap = 0.99  # smooth允许间隙
+    diff_history = tail(history, 1)
+    diffs, diff_constant = with_history(difference_matrix(len(diff_history) + num_periods), diff_history)
+    num_diffs = diffs.shape[0] // len(FLOWS)
+    columns = np.arange(start - len(diff_history), end - 1)
+    totals = category_matrix({'ARR': LIMIT_CATEGORIES['ARR'], 'DEP': LIMIT_CATEGORIES['DEP']}, num_diffs)
+    weights = (totals.T @ sp.diags(noise_weights[:2, columns].ravel()) @ totals
+               + sp.identity(len(FLOWS) * num_diffs)).tocsr()
+    model.setObjective(flows @ (diffs.T @ weights @ diffs).tocsr() @ flows
+                       + (2 * diffs.T @ (weights @ diff_constant)) @ flows
+                       + diff_constant @ weights @ diff_constant, GRB.MINIMIZE)
+
+    return model, flow_vars
+
+
+def solve_rolling_horizon(ref_flows, hourly_flows, window_max, slot_limits, limits_15, slot_minutes=1,
+                          block_hours=4, overlap_hours=1, max_delta=3, seed=42, time_limit=None, env=None):
+    """
+    用滚动时域方法求解动态时刻表
+
+    依次求解相互重叠的若干小时的时段，每段只固定前 block_hours - overlap_hours 小时的结果，
+    重叠部分在下一段中重新求解；跨段的滑动窗口和相邻差分将已固定时段作为常数。
+    每个类别在 peak_targets 选定的相邻两小时内达到动态小时最大值，二元变量只在包含这两小时的段中添加，
+    因此相邻两段至少重叠1小时。某段无解时，依次改为在本段任一窗口达到最大值、改选本段之后静态值之和
+    最大的相邻两小时；选定两小时已全部固定仍未达到最大值的类别，之后各段在任一窗口达到即可。
+    每段模型的规模只与段长有关，适用于1分钟等细粒度时段；结果为可行解，但不保证全天最优。
+
+    Args:
+        ref_flows, hourly_flows, window_max, slot_limits, limits_15: 见 task1_matrix.build_dynamic_schedule_model
+        slot_minutes: 决策时段长度（分钟）
+        block_hours: 每段的小时数
+        overlap_hours: 相邻两段重叠的小时数
+        max_delta: 相邻5分钟时段总量的最大变化量，见 task1_matrix.build_dynamic_schedule_model
+        seed: 平滑扰动目标的随机种子
+        time_limit: 每段的求解时间上限（秒），为 None 时不限制
+        env: Gurobi环境，为 None 时使用默认环境
+
+    Returns:
+        ndarray: 形状为 (时段数, 4) 的流量，列顺序同 FLOWS；某段无解时返回 None
+    """
+    if not 1 <= overlap_hours < block_hours:
+        raise ValueError("重叠小时数须至少为1且小于每段的小时数")
+    ref_flows = np.asarray(ref_flows, dtype=float)
+    hourly_flows = np.asarray(hourly_flows, dtype=float)
+    num_periods = periods_per(24 * 60, slot_minutes)
+    hour_width = periods_per(60, slot_minutes)
+
+    np.random.seed(seed)
+    noise_weights = np.random.uniform(0.5, 1.5, size=(4, num_periods - 1))
+    targets = peak_targets(hourly_flows)
+
+    schedule = np.zeros((0, len(FLOWS)))
+    reached = set()
+    overdue = set()
+    for first_hour in range(0, 24, block_hours - overlap_hours):
+        last_hour = min(first_hour + block_hours, 24)
+        commit_hour = 24 if last_hour == 24 else last_hour - overlap_hours
+
+        # 选定的相邻两小时都在本段内时，本段的窗口须达到最大值；达到最大值的窗口未全部固定时，下一段继续要求。
+        # 选定两小时已全部固定仍未达到最大值的类别，改为在本段任一窗口达到
+        reach = {category: (hour * hour_width, (hour + 1) * hour_width) for category, hour in targets.items()
+                 if category not in reached and hour + 2 <= last_hour}
+        reach.update({category: (0, num_periods) for category in overdue})
+        # 本段无解时依次尝试：这些类别在本段任一窗口达到最大值；不是最后一段时改选本段之后的相邻两小时
+        attempts = [reach]
+        relaxed = {category: (0, num_periods) for category in reach}
+        if relaxed != reach:
+            attempts.append(relaxed)
+        if reach and last_hour < 24:
+            attempts.append({})
+
+        for attempt in attempts:
+            model, flow_vars = build_block_model(ref_flows, hourly_flows, window_max, slot_limits, limits_15,
+                                                 first_hour * hour_width, last_hour * hour_width, schedule,
+                                                 attempt, noise_weights, slot_minutes, max_delta, env)
+            model.Params.OutputFlag = 0
+            if time_limit is not None:
+                model.Params.TimeLimit = time_limit
+            model.optimize()
+            if model.SolCount > 0:
+                break
+            print(f"{first_hour}时-{last_hour}时无解，状态: {model.status}")
+        else:
+            return None
+        if attempt is relaxed:
+            print(f"{first_hour}时-{last_hour}时: {', '.join(sorted(reach))} 改为在本段任一窗口达到最大值")
+        elif attempt is not reach:
+            later = peak_targets(hourly_flows, last_hour - 1)
+            targets.update({category: later[category] for category in reach})
+            print(f"{first_hour}时-{last_hour}时: " + ', '.join(f"{category} 改在{later[category]}时起的相邻两小时"
+                                                              for category in sorted(reach)) + "达到最大值")
+        print(f"{first_hour}时-{last_hour}时: 目标值 {model.ObjVal:.1f}，用时 {model.Runtime:.2f}秒")
+
+        values = np.round(np.column_stack([var.X for var in flow_vars]))
+        schedule = np.vstack([schedule, values[:(commit_hour - first_hour) * hour_width]])
+        reached = reached_categories(schedule, window_max, hour_width)
+        overdue = {category for category, hour in targets.items()
+                   if category not in reached and hour + 2 <= commit_hour}
+        if last_hour == 24:
+            break
+
+    return schedule
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用滚动时域方法求解细粒度动态时刻表")
+    parser.add_argument('--slot-minutes', type=int, default=1, help="决策时段长度（分钟）")
+    parser.add_argument('--block-hours', type=int, default=4, help="每段的小时数")
+    parser.add_argument('--overlap-hours', type=int, default=1, help="相邻两段重叠的小时数")
+    parser.add_argument('--time-limit', type=float, default=None, help="每段的求解时间上限（秒）")
+    parser.add_argument('--output', default='dynamic_sheet.xlsx', help="输出文件")
+    args = parser.parse_args()
+
+    schedule = solve_rolling_horizon(**model_inputs(load_schedule_parameters()), slot_minutes=args.slot_minutes,
+                                     block_hours=args.block_hours, overlap_hours=args.overlap_hours,
+                                     time_limit=args.time_limit)
+    if schedule is not None:
+        schedule_to_frame(schedule, args.slot_minutes).to_excel(args.output, index=False)
+    else:
+        print("!!!!!!!! No solution found !!!!!!!!")
@@ -1,123 +1,185 @@
-import pandas as pd
-
-
-
-# 预处理函数：将时间字符串转换为分钟数
-def time_to_minutes(t_str):
-    h, m = map(int, t_str.split(':'))
-    return h * 60 + m  # 机型和市场配额约束（日期均为2）
-
+import hashlib
+import os
+from collections import namedtuple
 
-xls = pd.ExcelFile("python时刻表输入v3.xlsx")
-
-# 读取指定的 sheet
-df1 = pd.read_excel(xls, sheet_name="规划静态时刻表")
-df2 = pd.read_excel(xls, sheet_name="其它参数设置")
-df3 = pd.read_excel(xls, sheet_name="现状动态统计")
-df4 = pd.read_excel(xls, sheet_name="现状时刻表")
-
-print("Reading excel data...")
-ref_arr_dom = df3['DOM ARR'].values
-ref_arr_int = df3['INT ARR'].values
-ref_dep_dom = df3['DOM DEP'].values
-ref_dep_int = df3['INT DEP'].values
-
-H_arr_dom = df1["ARR DOM"][:24].values
-H_arr_int = df1["ARR INT"][:24].values
-H_dep_dom = df1["DEP DOM"][:24].values
-H_dep_int = df1["DEP INT"][:24].values
-
-ARR_DOM_MAX = df1["ARR DOM"][26]
-ARR_INT_MAX = df1["ARR INT"][26]
-DEP_DOM_MAX = df1["DEP DOM"][26]
-DEP_INT_MAX = df1["DEP INT"][26]
-
-ARR_MAX = df1["ARR"][26]
-DEP_MAX = df1["DEP"][26]
-DOM_MAX = df1["DOM"][26]
-INT_MAX = df1["INT"][26]
-TOT_MAX = df1["TOT"][26]
-
-ARR_LIMIT = df1["ARR"][27]
-DEP_LIMIT = df1["DEP"][27]
-TOT_LIMIT = df1["TOT"][27]
-
-ARR_15_LIMIT = df1["ARR"][28]
-DEP_15_LIMIT = df1["DEP"][28]
-TOT_15_LIMIT = df1["TOT"][28]
-
-DOM_MIX_p = df2.iloc[20, 3]
-INT_MIX_p = df2.iloc[20, 4]
-
-DOM_INT_MIX_p = df2.iloc[24, 3]
-
-quotas = {
-    ('DOM', 'B'): {'ARR': df2.iloc[2, 3], 'DEP': df2.iloc[2, 5]},
-    ('DOM', 'C'): {'ARR': df2.iloc[3, 3], 'DEP': df2.iloc[3, 5]},
-    ('DOM', 'D'): {'ARR': df2.iloc[4, 3], 'DEP': df2.iloc[4, 5]},
-    ('DOM', 'E'): {'ARR': df2.iloc[5, 3], 'DEP': df2.iloc[5, 5]},
-    ('DOM', 'F'): {'ARR': df2.iloc[6, 3], 'DEP': df2.iloc[6, 5]},
-    ('INT', 'B'): {'ARR': df2.iloc[2, 4], 'DEP': df2.iloc[2, 6]},
-    ('INT', 'C'): {'ARR': df2.iloc[3, 4], 'DEP': df2.iloc[3, 6]},
-    ('INT', 'D'): {'ARR': df2.iloc[4, 4], 'DEP': df2.iloc[4, 6]},
-    ('INT', 'E'): {'ARR': df2.iloc[5, 4], 'DEP': df2.iloc[5, 6]},
-    ('INT', 'F'): {'ARR': df2.iloc[6, 4], 'DEP': df2.iloc[6, 6]},
-}
-quotas = {k: v for k, v in quotas.items() if not (pd.isna(v['ARR']) and pd.isna(v['DEP']))}
-
-
-min_times = {
-    ('DOM', 'C'): df2.iloc[29, 3],
-    ('DOM', 'E'): df2.iloc[31, 3],
-    ('DOM', 'F'): df2.iloc[32, 3],
-    ('INT', 'C'): df2.iloc[29, 4],
-    ('INT', 'E'): df2.iloc[31, 4],
-    ('INT', 'F'): df2.iloc[32, 4],
-}
-
-dep_hour_distribution = [(row[0], row[1], row[2]) for row in df2.iloc[37:61, 2:5].values]
-print("Finished reading! Now out of utils.")
-if __name__ == "__main__":
-    # test
-    print(ref_arr_dom)
-    print(ref_arr_int)
-    print(ref_dep_dom)
-    print(ref_dep_int)
-    print(len(ref_arr_dom))
+import pandas as pd
 
-    print(H_arr_dom)
-    print(H_arr_int)
-    print(H_dep_dom)
-    print(H_dep_int)
-    print(H_dep_dom[0])
+# 时刻表输入文件
+INPUT_FILE = "python时刻表输入v3.xlsx"
 
-    print(ARR_DOM_MAX)
-    print(ARR_INT_MAX)
-    print(DEP_DOM_MAX)
-    print(DEP_INT_MAX)
+# 时刻表输入文件中读取的各项参数
+PARAMETER_FIELDS = ['ref_arr_dom', 'ref_arr_int', 'ref_dep_dom', 'ref_dep_int',
+                    'H_arr_dom', 'H_arr_int', 'H_dep_dom', 'H_dep_int',
+                    'ARR_DOM_MAX', 'ARR_INT_MAX', 'DEP_DOM_MAX', 'DEP_INT_MAX',
+                    'ARR_MAX', 'DEP_MAX', 'DOM_MAX', 'INT_MAX', 'TOT_MAX',
+                    'ARR_LIMIT', 'DEP_LIMIT', 'TOT_LIMIT', 'ARR_15_LIMIT', 'DEP_15_LIMIT', 'TOT_15_LIMIT',
+                    'DOM_MIX_p', 'INT_MIX_p', 'DOM_INT_MIX_p',
+                    'quotas', 'min_times', 'dep_hour_distribution', 'peak_ratios']
 
-    print(ARR_MAX)
-    print(DEP_MAX)
-    print(DOM_MAX)
-    print(INT_MAX)
-    print(TOT_MAX)
+ScheduleParameters = namedtuple('ScheduleParameters', PARAMETER_FIELDS)
 
-    print(ARR_LIMIT)
-    print(DEP_LIMIT)
-    print(TOT_LIMIT)
+# 已加载的参数，键为 (文件绝对路径, 文件哈希)
+loaded_parameters = {}
 
-    print(ARR_15_LIMIT)
-    print(DEP_15_LIMIT)
-    print(TOT_15_LIMIT)
+# 已计算的文件哈希，键为文件绝对路径，值为 ((修改时间, 文件大小), 哈希)
+file_digests = {}
 
-    print(quotas)
 
-    print(DOM_MIX_p)
-    print(INT_MIX_p)
+# 预处理函数：将时间字符串转换为分钟数
+def time_to_minutes(t_str):
+    h, m = map(int, t_str.split(':'))
+    return h * 60 + m  # 机型和市场配额约束（日期均为2）
 
-    print(DOM_INT_MIX_p)
 
+def read_schedule_parameters(file_path=INPUT_FILE):
+    """
+    读取时刻表输入文件中的全部参数
+
+    Args:
+        file_path: 时刻表输入文件路径
+
+    Returns:
+        ScheduleParameters: 按字段名访问的参数，如 params.ARR_MAX
+    """
+    print("Reading excel data...")
+    xls = pd.ExcelFile(file_path)
+
+    # 读取指定的 sheet
+    df1 = pd.read_excel(xls, sheet_name="规划静态时刻表")
+    df2 = pd.read_excel(xls, sheet_name="其它参数设置")
+    df3 = pd.read_excel(xls, sheet_name="现状动态统计")
+
+    quotas = {
+        ('DOM', 'B'): {'ARR': df2.iloc[2, 3], 'DEP': df2.iloc[2, 5]},
+        ('DOM', 'C'): {'ARR': df2.iloc[3, 3], 'DEP': df2.iloc[3, 5]},
+        ('DOM', 'D'): {'ARR': df2.iloc[4, 3], 'DEP': df2.iloc[4, 5]},
+        ('DOM', 'E'): {'ARR': df2.iloc[5, 3], 'DEP': df2.iloc[5, 5]},
+        ('DOM', 'F'): {'ARR': df2.iloc[6, 3], 'DEP': df2.iloc[6, 5]},
+        ('INT', 'B'): {'ARR': df2.iloc[2, 4], 'DEP': df2.iloc[2, 6]},
+        ('INT', 'C'): {'ARR': df2.iloc[3, 4], 'DEP': df2.iloc[3, 6]},
+        ('INT', 'D'): {'ARR': df2.iloc[4, 4], 'DEP': df2.iloc[4, 6]},
+        ('INT', 'E'): {'ARR': df2.iloc[5, 4], 'DEP': df2.iloc[5, 6]},
+        ('INT', 'F'): {'ARR': df2.iloc[6, 4], 'DEP': df2.iloc[6, 6]},
+    }
+    quotas = {k: v for k, v in quotas.items() if not (pd.isna(v['ARR']) and pd.isna(v['DEP']))}
+
+    min_times = {
+        ('DOM', 'C'): df2.iloc[29, 3],
+        ('DOM', 'E'): df2.iloc[31, 3],
+        ('DOM', 'F'): df2.iloc[32, 3],
+        ('INT', 'C'): df2.iloc[29, 4],
+        ('INT', 'E'): df2.iloc[31, 4],
+        ('INT', 'F'): df2.iloc[32, 4],
+    }
+
+    # 各高峰小时类别的机型比例，列依次为 国内进港、国内离港、国内双向、国际进港、国际离港、国际双向
+    peak_ratios = {}
+    for name, col in [('国内进港', 3), ('国内离港', 4), ('国内双向', 5), ('国际进港', 6), ('国际离港', 7), ('国际双向', 8)]:
+        peak_ratios[name] = {'C': df2.iloc[12, col], 'E': df2.iloc[14, col], 'F': df2.iloc[15, col]}
+
+    params = ScheduleParameters(
+        ref_arr_dom=df3['DOM ARR'].values,
+        ref_arr_int=df3['INT ARR'].values,
+        ref_dep_dom=df3['DOM DEP'].values,
+        ref_dep_int=df3['INT DEP'].values,
+        H_arr_dom=df1["ARR DOM"][:24].values,
+        H_arr_int=df1["ARR INT"][:24].values,
+        H_dep_dom=df1["DEP DOM"][:24].values,
+        H_dep_int=df1["DEP INT"][:24].values,
+        ARR_DOM_MAX=df1["ARR DOM"][26],
+        ARR_INT_MAX=df1["ARR INT"][26],
+        DEP_DOM_MAX=df1["DEP DOM"][26],
+        DEP_INT_MAX=df1["DEP INT"][26],
+        ARR_MAX=df1["ARR"][26],
+        DEP_MAX=df1["DEP"][26],
+        DOM_MAX=df1["DOM"][26],
+        INT_MAX=df1["INT"][26],
+        TOT_MAX=df1["TOT"][26],
+        ARR_LIMIT=df1["ARR"][27],
+        DEP_LIMIT=df1["DEP"][27],
+        TOT_LIMIT=df1["TOT"][27],
+        ARR_15_LIMIT=df1["ARR"][28],
+        DEP_15_LIMIT=df1["DEP"][28],
+        TOT_15_LIMIT=df1["TOT"][28],
+        DOM_MIX_p=df2.iloc[20, 3],
+        INT_MIX_p=df2.iloc[20, 4],
+        DOM_INT_MIX_p=df2.iloc[24, 3],
+        quotas=quotas,
+        min_times=min_times,
+        dep_hour_distribution=[(row[0], row[1], row[2]) for row in df2.iloc[37:61, 2:5].values],
+        peak_ratios=peak_ratios,
+    )
+    print("Finished reading!")
+    return params
+
+
+def file_hash(file_path):
+    """计算文件内容的SHA1哈希"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_digest(file_path):
+    """返回文件内容的哈希，文件的修改时间和大小与上次相同时直接返回上次的结果，不再读取整个文件"""
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = file_digests.get(path)
+    if cached is None or cached[0] != signature:
+        cached = file_digests[path] = (signature, file_hash(path))
+    return cached[1]
+
+
+def load_schedule_parameters(file_path=INPUT_FILE, use_sidecar=True):
+    """
+    加载时刻表输入参数，首次访问时才读取Excel文件
+
+    同一进程中按 (文件路径, 文件哈希) 缓存，文件的修改时间和大小未变化时不重新计算哈希；读取结果同时保存到
+    输入文件旁的 `<输入文件>.cache.pkl`，文件内容不变时各步骤直接读取该文件，整条流程只读取一次Excel。
+
+    Args:
+        file_path: 时刻表输入文件路径
+        use_sidecar: 是否使用输入文件旁的pickle缓存
+
+    Returns:
+        ScheduleParameters: 按字段名访问的参数，如 params.ARR_MAX
+    """
+    digest = file_digest(file_path)
+    key = (os.path.abspath(file_path), digest)
+    if key in loaded_parameters:
+        return loaded_parameters[key]
+
+    sidecar = f"{file_path}.cache.pkl"
+    params = None
+    if use_sidecar and os.path.exists(sidecar):
+        try:
+            cached = pd.read_pickle(sidecar)
+            if cached.get('hash') == digest:
+                params = ScheduleParameters(*cached['params'])
+        except Exception as e:
+            print(f"读取参数缓存 {sidecar} 失败: {e}")
+
+    if params is None:
+        params = read_schedule_parameters(file_path)
+        if use_sidecar:
+            pd.to_pickle({'hash': digest, 'params': tuple(params)}, sidecar)
+
+    loaded_parameters[key] = params
+    return params
+
+
+def __getattr__(name):
+    """兼容按模块属性访问参数的旧代码（如 from utils import quotas），访问时才加载默认输入文件"""
+    if name in PARAMETER_FIELDS:
+        return getattr(load_schedule_parameters(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    print(min_times)
 
-    print(dep_hour_distribution)
\ No newline at end of file
+if __name__ == "__main__":
+    # test
+    params = load_schedule_parameters()
+    for field in PARAMETER_FIELDS:
+        print(field, getattr(params, field))